@@ -0,0 +1,18 @@
+"""Benchmarks of the request pipeline.
+
+Micro-benchmarks time each stage of the echo pipeline (DTO validation, ``to_domain``,
+``EchoService.process_input``, ``EchoResponse.from_domain``, serialization and routing) and measure
+the memory allocated per call with tracemalloc. Macro-benchmarks drive the full ``app`` in-process
+through an ASGI transport and through a local uvicorn server.
+
+Every benchmark runs with small, medium and large payloads, and the results are compared against
+``baseline.json``. Run ``python -m benchmarks --help`` from the repository root for the options.
+"""
+
+import os
+
+# Set before the application modules are imported, as they load the configuration on import, and
+# inherited by the uvicorn server of the macro-benchmarks: the DEBUG level and log file of config.json
+# would turn every benchmark into a benchmark of logging and fill app.log
+os.environ["DYNACONF_LOG_FILE_ENABLED"] = "false"
+os.environ["DYNACONF_LOG_LEVEL"] = "WARNING"
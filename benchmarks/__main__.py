@@ -0,0 +1,77 @@
+"""Command line entry point: ``python -m benchmarks``."""
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import asdict
+from typing import List, Optional
+
+from .results import BenchmarkResult, compare, format_table, load_baseline, save_baseline
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the request pipeline")
+    parser.add_argument("--suite", choices=("all", "micro", "macro"), default="all", help="Benchmarks to run")
+    parser.add_argument("--skip-uvicorn", action="store_true", help="Skip the macro-benchmarks through uvicorn")
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per micro-benchmark")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per macro-benchmark")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent clients in macro-benchmarks")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument(
+        "--gate-timings",
+        action="store_true",
+        help="Also fail on latency and throughput regressions; only reliable on a dedicated, otherwise idle machine",
+    )
+    parser.add_argument("--json", dest="json_output", help="Also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    from .micro import run_reference
+
+    results: List[BenchmarkResult] = [run_reference(args.iterations)]
+    if args.suite in ("all", "micro"):
+        from .micro import run_micro
+
+        results += run_micro(args.iterations)
+    if args.suite in ("all", "macro"):
+        from .macro import run_asgi, run_uvicorn
+
+        results += run_asgi(args.requests, args.concurrency)
+        if not args.skip_uvicorn:
+            results += run_uvicorn(args.requests, args.concurrency)
+
+    baseline = load_baseline(args.baseline)
+    print(format_table(results, baseline))
+
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as f:
+            json.dump([asdict(result) for result in results], f, indent=2)
+
+    if args.update_baseline:
+        save_baseline(args.baseline, results, baseline)
+        print(f"\nBaseline updated: {args.baseline}")
+        return 0
+
+    # Allocations are deterministic and gate every run; timings vary with the load of the machine
+    if not args.gate_timings:
+        changes = compare(results, baseline, kinds=("latency", "throughput"))
+        if changes:
+            print("\nTiming changes beyond the thresholds (not gated without --gate-timings):")
+            for change in changes:
+                print(f"  {change}")
+    kinds = ("latency", "throughput", "allocations") if args.gate_timings else ("allocations",)
+    regressions = compare(results, baseline, kinds=kinds)
+    if regressions:
+        print("\nRegressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Macro-benchmarks driving the full application over HTTP."""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import List, Optional, Tuple
+
+import httpx
+
+from .payloads import PAYLOADS, REQUEST_SHARE
+from .results import BenchmarkResult, summarize
+
+WARMUP_REQUESTS = 20
+
+
+async def _drive(client: httpx.AsyncClient, body: bytes, requests: int, concurrency: int) -> Tuple[List[float], float]:
+    """Send ``requests`` echo requests from ``concurrency`` concurrent clients.
+
+    Returns:
+        Latency of every request in seconds and the wall time of the run
+    """
+    headers = {"Content-Type": "application/json"}
+    remaining = requests
+    latencies: List[float] = []
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            before = time.perf_counter()
+            response = await client.post("/echo", content=body, headers=headers)
+            latencies.append(time.perf_counter() - before)
+            if response.status_code != 200:
+                raise RuntimeError(f"Unexpected status {response.status_code}: {response.text[:200]}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+async def _run_payloads(
+    client: httpx.AsyncClient, prefix: str, requests: int, concurrency: int
+) -> List[BenchmarkResult]:
+    results = []
+    for size, payload in PAYLOADS.items():
+        body = json.dumps(payload).encode("utf-8")
+        count = max(int(requests * REQUEST_SHARE[size]), concurrency)
+        await _drive(client, body, min(WARMUP_REQUESTS, count), concurrency)
+        latencies, elapsed = await _drive(client, body, count, concurrency)
+        results.append(summarize(f"{prefix}.{size}", latencies, elapsed))
+    return results
+
+
+def run_asgi(requests: int = 1000, concurrency: int = 10) -> List[BenchmarkResult]:
+    """Drive the application in-process through httpx's ASGI transport (no network, no server)"""
+    from src.app import app
+
+    async def run() -> List[BenchmarkResult]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            return await _run_payloads(client, "macro.asgi", requests, concurrency)
+
+    return asyncio.run(run())
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _wait_until_up(base_url: str, server: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("uvicorn did not start in time")
+
+
+def run_uvicorn(requests: int = 1000, concurrency: int = 10, port: Optional[int] = None) -> List[BenchmarkResult]:
+    """Drive the application through a single local uvicorn worker started in a subprocess"""
+    port = port or _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    command = [sys.executable, "-m", "uvicorn", "src.app:app", "--port", str(port), "--log-level", "warning"]
+    # Inherits the logging settings of the package, see benchmarks/__init__.py
+    server = subprocess.Popen(command, env=dict(os.environ))
+    try:
+        _wait_until_up(base_url, server)
+
+        async def run() -> List[BenchmarkResult]:
+            limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+                return await _run_payloads(client, "macro.uvicorn", requests, concurrency)
+
+        return asyncio.run(run())
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
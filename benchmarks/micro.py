@@ -0,0 +1,127 @@
+"""Micro-benchmarks of the single stages of the echo pipeline."""
+
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+
+from src.controller.blueprint.responses import render_model
+from src.controller.dto.echo import EchoRequest, EchoResponse
+from src.services.echo_service import EchoService
+
+from .payloads import PAYLOADS
+from .results import REFERENCE, BenchmarkResult, summarize
+
+# Calls measured with tracemalloc per stage; tracing slows calls down, so this is kept separate from timing
+ALLOCATION_SAMPLES = 50
+
+# Fast operations are timed in batches of at least this duration, so the timer overhead does not dominate
+MIN_BATCH_SECONDS = 50e-6
+
+
+def measure(name: str, operation: Callable[[], Any], iterations: int) -> BenchmarkResult:
+    """Time an operation and measure the memory it allocates per call.
+
+    Args:
+        name: Benchmark name
+        operation: The operation to measure
+        iterations: Number of timed calls
+
+    Returns:
+        BenchmarkResult: Latency percentiles, throughput and allocated bytes per call; for batched
+        operations the percentiles are those of the mean latency per batch
+    """
+    warmup = min(iterations, 100)
+    before = time.perf_counter()
+    for _ in range(warmup):
+        operation()
+    batch = max(int(MIN_BATCH_SECONDS / max((time.perf_counter() - before) / warmup, 1e-9)), 1)
+
+    latencies: List[float] = []
+    # Like timeit, time without the garbage collector, whose pauses land on random calls
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(max(iterations // batch, 1)):
+            before = time.perf_counter()
+            for _ in range(batch):
+                operation()
+            latencies.append((time.perf_counter() - before) / batch)
+        elapsed = (time.perf_counter() - start) / batch
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    try:
+        allocated = 0
+        for _ in range(ALLOCATION_SAMPLES):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            operation()
+            allocated += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+
+    return summarize(name, latencies, elapsed, alloc_bytes=allocated / ALLOCATION_SAMPLES)
+
+
+def _route_match(routes: List[Any], scope: Dict[str, Any]) -> Any:
+    """Find the route handling a request, the way the Starlette router does"""
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route
+    return None
+
+
+def run_reference(iterations: int = 2000) -> BenchmarkResult:
+    """Time a fixed standard library workload that the other timings are compared relative to.
+
+    It does not touch the application, so it only changes with the machine and the Python version.
+    """
+    body = json.dumps(PAYLOADS["medium"])
+    return measure(REFERENCE, lambda: json.loads(body), iterations)
+
+
+def run_micro(iterations: int = 2000) -> List[BenchmarkResult]:
+    """Run the micro-benchmarks for every payload size.
+
+    Args:
+        iterations: Number of timed calls per stage; large payloads use a tenth of it
+
+    Returns:
+        List of results
+    """
+    from src.app import app
+
+    service = EchoService()
+    results = []
+    for size, payload in PAYLOADS.items():
+        count = iterations if size != "large" else max(iterations // 10, 20)
+        raw = json.dumps(payload).encode("utf-8")
+        request = EchoRequest.model_validate_json(raw)
+        domain = request.to_domain()
+        message = service.process_input(domain)
+        response = EchoResponse.from_domain(message)
+
+        stages: Dict[str, Callable[[], Any]] = {
+            "validate": lambda: EchoRequest.model_validate_json(raw),
+            "to_domain": request.to_domain,
+            "process_input": lambda: service.process_input(domain),
+            "from_domain": lambda: EchoResponse.from_domain(message),
+            # What FastAPI does for a response model: dump to JSON-compatible data, then render it
+            "serialize": lambda: json.dumps(response.model_dump(mode="json")).encode("utf-8"),
+            # How trusted response DTOs are rendered with the default response class
+            "serialize_trusted": lambda: render_model(JSONResponse, response, 200),
+        }
+        for stage, operation in stages.items():
+            results.append(measure(f"micro.{stage}.{size}", operation, count))
+
+    scope = {"type": "http", "method": "POST", "path": "/echo", "root_path": "", "headers": []}
+    results.append(measure("micro.routing", lambda: _route_match(app.router.routes, scope), iterations))
+    return results
@@ -0,0 +1,23 @@
+"""Echo payloads of different sizes."""
+
+from typing import Any, Dict
+
+
+def _items(count: int) -> Dict[str, Any]:
+    return {
+        "items": [
+            {"id": i, "name": f"item-{i}", "tags": ["alpha", "beta", "gamma"], "price": i * 1.25, "active": i % 2 == 0}
+            for i in range(count)
+        ]
+    }
+
+
+# Serialized sizes: about 50 bytes, 10 KB and 1 MB
+PAYLOADS: Dict[str, Dict[str, Any]] = {
+    "small": {"data": {"message": "hello"}},
+    "medium": {"data": _items(100), "metadata": {"source": "benchmark"}},
+    "large": {"data": _items(10_000), "metadata": {"source": "benchmark"}},
+}
+
+# Share of the configured number of requests sent per payload, so large payloads don't dominate the run
+REQUEST_SHARE: Dict[str, float] = {"small": 1.0, "medium": 1.0, "large": 0.1}
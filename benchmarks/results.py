@@ -0,0 +1,179 @@
+"""Benchmark results and the comparison against a stored baseline."""
+
+import json
+import math
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence
+
+# Allowed relative deviation from the baseline before a benchmark counts as regressed. Latency and
+# throughput changes also have to exceed "noise_floor_us" per operation, which filters out the jitter
+# of sub-microsecond operations. p99 latencies are reported but not compared: tails depend on what
+# else runs on the machine far more than on the code.
+DEFAULT_THRESHOLDS: Dict[str, float] = {
+    "latency": 0.25,
+    "throughput": 0.25,
+    "allocations": 0.10,
+    "noise_floor_us": 1.0,
+}
+
+# Benchmark of a fixed standard library workload, run with every suite. Timings are compared relative to
+# it, so a baseline recorded on another (faster or slower) machine still applies.
+REFERENCE = "reference"
+
+
+@dataclass
+class BenchmarkResult:
+    """Result of one benchmark.
+
+    Attributes:
+        name: Benchmark name, e.g. ``micro.validate.small``
+        ops_per_sec: Throughput in operations (calls or requests) per second
+        p50_us: Median latency in microseconds
+        p99_us: 99th percentile latency in microseconds
+        alloc_bytes: Peak memory allocated per operation, None if not measured
+    """
+
+    name: str
+    ops_per_sec: float
+    p50_us: float
+    p99_us: float
+    alloc_bytes: Optional[float] = None
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values, ``q`` between 0 and 100"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(
+    name: str, latencies: List[float], elapsed: float, alloc_bytes: Optional[float] = None
+) -> BenchmarkResult:
+    """Build a result from the latencies of the single operations.
+
+    Args:
+        name: Benchmark name
+        latencies: Latency of every operation in seconds
+        elapsed: Wall time of the whole run in seconds
+        alloc_bytes: Peak memory allocated per operation
+
+    Returns:
+        BenchmarkResult: The summarized result
+    """
+    latencies = sorted(latencies)
+    return BenchmarkResult(
+        name=name,
+        ops_per_sec=len(latencies) / elapsed if elapsed > 0 else 0.0,
+        p50_us=percentile(latencies, 50) * 1e6,
+        p99_us=percentile(latencies, 99) * 1e6,
+        alloc_bytes=alloc_bytes,
+    )
+
+
+def load_baseline(path: str) -> Dict[str, Dict]:
+    """Load a baseline file, an empty baseline if it does not exist"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            baseline: Dict[str, Dict] = json.load(f)
+            return baseline
+    except FileNotFoundError:
+        return {"thresholds": dict(DEFAULT_THRESHOLDS), "results": {}}
+
+
+def save_baseline(path: str, results: List[BenchmarkResult], previous: Dict[str, Dict]) -> None:
+    """Store results as the new baseline, keeping the thresholds and results of benchmarks not run"""
+    stored = dict(previous.get("results", {}))
+    for result in results:
+        stored[result.name] = {k: round(v, 1) for k, v in asdict(result).items() if k != "name" and v is not None}
+    thresholds = previous.get("thresholds", dict(DEFAULT_THRESHOLDS))
+    baseline = {"thresholds": thresholds, "results": dict(sorted(stored.items()))}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+
+
+def speed_factor(results: List[BenchmarkResult], baseline: Dict[str, Dict]) -> float:
+    """How much slower this run is than the baseline run, measured by the reference benchmark.
+
+    Returns:
+        The ratio of the reference p50 latencies, 1.0 if the run or the baseline lacks the reference
+    """
+    current = next((result.p50_us for result in results if result.name == REFERENCE), None)
+    recorded = baseline.get("results", {}).get(REFERENCE, {}).get("p50_us")
+    if not current or not recorded:
+        return 1.0
+    return float(current / recorded)
+
+
+def compare(
+    results: List[BenchmarkResult],
+    baseline: Dict[str, Dict],
+    kinds: Sequence[str] = ("latency", "throughput", "allocations"),
+) -> List[str]:
+    """Compare results against a baseline.
+
+    Latency and throughput are compared after scaling the baseline by ``speed_factor``, so only
+    changes relative to the reference benchmark count. Allocations are compared as they are.
+
+    Args:
+        results: Results of the current run
+        baseline: Baseline as returned by ``load_baseline``
+        kinds: Metrics to compare, named like their thresholds
+
+    Returns:
+        Descriptions of all metrics exceeding their threshold, empty if nothing regressed
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **baseline.get("thresholds", {})}
+    stored = baseline.get("results", {})
+    factor = speed_factor(results, baseline)
+    floor = thresholds["noise_floor_us"]
+    regressions = []
+    for result in results:
+        reference = stored.get(result.name)
+        if reference is None or result.name == REFERENCE:
+            continue
+
+        expected = reference.get("p50_us", 0) * factor
+        if "latency" in kinds and expected and result.p50_us:
+            change = result.p50_us / expected - 1
+            if change > thresholds["latency"] and result.p50_us - expected > floor:
+                regressions.append(
+                    f"{result.name} p50_us: {result.p50_us:.1f} vs. scaled baseline {expected:.1f} ({change:+.0%})"
+                )
+
+        expected = reference.get("alloc_bytes")
+        if "allocations" in kinds and result.alloc_bytes is not None and expected:
+            change = result.alloc_bytes / expected - 1
+            if change > thresholds["allocations"]:
+                regressions.append(
+                    f"{result.name} alloc_bytes: {result.alloc_bytes:.1f} vs. baseline {expected:.1f} ({change:+.0%})"
+                )
+
+        expected = reference.get("ops_per_sec", 0) / factor
+        if "throughput" in kinds and expected and result.ops_per_sec:
+            change = result.ops_per_sec / expected - 1
+            slower_us = 1e6 / result.ops_per_sec - 1e6 / expected
+            if change < -thresholds["throughput"] and slower_us > floor:
+                regressions.append(
+                    f"{result.name} ops_per_sec: {result.ops_per_sec:.1f} vs. scaled baseline {expected:.1f} "
+                    f"({change:+.0%})"
+                )
+    return regressions
+
+
+def format_table(results: List[BenchmarkResult], baseline: Dict[str, Dict]) -> str:
+    """Render results as a text table with the p50 change against the scaled baseline"""
+    stored = baseline.get("results", {})
+    factor = speed_factor(results, baseline)
+    lines = [f"{'benchmark':<36} {'ops/s':>12} {'p50 us':>10} {'p99 us':>10} {'alloc B':>10} {'p50 vs base':>12}"]
+    for result in results:
+        reference = stored.get(result.name, {}).get("p50_us")
+        change = f"{result.p50_us / (reference * factor) - 1:+.0%}" if reference else "new"
+        alloc = f"{result.alloc_bytes:.0f}" if result.alloc_bytes is not None else "-"
+        lines.append(
+            f"{result.name:<36} {result.ops_per_sec:>12.1f} {result.p50_us:>10.1f} {result.p99_us:>10.1f} "
+            f"{alloc:>10} {change:>12}"
+        )
+    return "\n".join(lines)
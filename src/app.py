@@ -7,18 +7,71 @@ with appropriate settings for development or production.
 """
 
 import logging
-from typing import Optional
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import AsyncIterator, Optional
 
 from fastapi import FastAPI
 
-from src.config import ConfigParameter, ConfigurationManager
+from src.clients import ClientSettings, shared_client
+from src.config import ConfigParameter, ConfigSnapshot, ConfigurationManager
+from src.config.metrics import prepare_multiprocess
+from src.config.server import ServerSettings
 from src.controller import configure_routes
+from src.controller.blueprint.responses import json_response_class
+from src.repositories import DatabaseSettings, shared_database
+from src.services import configure_batchers, configure_caches
+from src.services.batching import DEFAULT_MAX_BATCH_SIZE, DEFAULT_WINDOW
+from src.services.cache import DEFAULT_MAX_ENTRIES, DEFAULT_NEGATIVE_TTL, DEFAULT_STALE_TTL, DEFAULT_TTL
 
 # Initialize settings and logger
 settings = ConfigurationManager()
 logger = logging.getLogger("api")
 
 
+def _configure_caches(snapshot: ConfigSnapshot) -> None:
+    """Apply the default settings of the read-through caches"""
+    configure_caches(
+        max_entries=int(snapshot.get(ConfigParameter.READ_CACHE_MAX_ENTRIES, DEFAULT_MAX_ENTRIES)),
+        ttl=float(snapshot.get(ConfigParameter.READ_CACHE_TTL, DEFAULT_TTL)),
+        negative_ttl=float(snapshot.get(ConfigParameter.READ_CACHE_NEGATIVE_TTL, DEFAULT_NEGATIVE_TTL)),
+        stale_ttl=float(snapshot.get(ConfigParameter.READ_CACHE_STALE_TTL, DEFAULT_STALE_TTL)),
+        enabled=bool(snapshot.get(ConfigParameter.READ_CACHE_ENABLED, True)),
+    )
+
+
+def _configure_batchers(snapshot: ConfigSnapshot) -> None:
+    """Apply the default settings of the micro-batchers of services"""
+    configure_batchers(
+        window=float(snapshot.get(ConfigParameter.MICRO_BATCH_WINDOW, DEFAULT_WINDOW)),
+        max_batch_size=int(snapshot.get(ConfigParameter.MICRO_BATCH_MAX_SIZE, DEFAULT_MAX_BATCH_SIZE)),
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Start and stop per-worker background tasks and resources.
+
+    Runs once in every worker process, so each worker watches the config file on its own and has
+    its own pools of outbound HTTP and database connections.
+
+    Args:
+        app: The FastAPI application instance
+    """
+    if settings.get_config(ConfigParameter.CONFIG_WATCH, False):
+        settings.start_watching()
+    await shared_client.start(ClientSettings.from_snapshot(settings.snapshot))
+    database_settings = DatabaseSettings.from_snapshot(settings.snapshot)
+    if database_settings.url:
+        await shared_database.start(database_settings)
+    try:
+        yield
+    finally:
+        settings.stop_watching()
+        await shared_client.close()
+        await shared_database.close()
+
+
 def create_application() -> FastAPI:
     """Create and configure the FastAPI application.
 
@@ -35,8 +88,16 @@ def create_application() -> FastAPI:
         docs_url=None if is_production else "/docs",
         redoc_url=None if is_production else "/redoc",
         openapi_url=None if is_production else "/openapi.json",
+        lifespan=lifespan,
+        default_response_class=json_response_class(settings.get_config(ConfigParameter.APP_RESPONSE_ENCODER, "json")),
     )
 
+    # Caches of repositories and clients and batchers of services follow the configured defaults, also after a reload
+    _configure_caches(settings.snapshot)
+    settings.add_reload_listener(_configure_caches)
+    _configure_batchers(settings.snapshot)
+    settings.add_reload_listener(_configure_batchers)
+
     # Configure routes
     configure_routes(app, settings)
 
@@ -62,7 +123,7 @@ def run_development(host: str = "0.0.0.0", port: Optional[int] = None) -> None:
     if port is None:
         port = settings.get_config(ConfigParameter.APP_PORT)
 
-    logger.info(f"Starting development server on http://{host}:{port}")
+    logger.info("Starting development server on http://%s:%s", host, port)
     logger.info("Auto-reload enabled. Watching for file changes in 'src/'")
 
     uvicorn.run(
@@ -79,30 +140,40 @@ def run_development(host: str = "0.0.0.0", port: Optional[int] = None) -> None:
 def run_production(host: str = "0.0.0.0", port: Optional[int] = None) -> None:
     """Run the application in production mode using Uvicorn.
 
-    In a real production environment, you would typically run this using Gunicorn
-    with Uvicorn workers. This is provided as a fallback.
+    The worker model and server tunables come from the ``server_*`` configuration parameters,
+    see ``ServerSettings``. The effective settings are logged at boot.
 
     Args:
         host: Host to bind to (default: 0.0.0.0)
         port: Port to bind to (default: from config)
     """
-    import multiprocessing
-
     import uvicorn
 
     if port is None:
         port = settings.get_config(ConfigParameter.APP_PORT)
 
-    workers = multiprocessing.cpu_count() * 2 + 1
+    snapshot = settings.snapshot
+    server_settings = ServerSettings.from_snapshot(snapshot)
 
-    logger.info(f"Starting production server with {workers} workers on http://{host}:{port}")
+    if server_settings.workers > 1 and snapshot.get(ConfigParameter.METRICS_MULTIPROCESS, True):
+        # Must happen before the workers start, they inherit the environment
+        metrics_dir = snapshot.get(ConfigParameter.METRICS_MULTIPROCESS_DIR, "/tmp/prometheus_multiproc")
+        prepare_multiprocess(metrics_dir, snapshot.get(ConfigParameter.METRICS_GAUGE_AGGREGATION, "livesum"))
+        logger.info("Aggregating metrics of all workers in %s", metrics_dir)
+
+    logger.info(
+        "Starting production server on http://%s:%s with %s",
+        host,
+        port,
+        ", ".join(f"{key}={value}" for key, value in asdict(server_settings).items()),
+    )
 
     uvicorn.run(
         "src.app:app",
         host=host,
         port=port,
         log_level="info",
-        workers=workers,
+        **server_settings.uvicorn_kwargs(),
     )
 
 
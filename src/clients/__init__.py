@@ -6,7 +6,13 @@ This package contains all external service clients and API integrations.
 # Import clients here as they are created
 # Example:
 # from .external_api_client import ExternalAPIClient
+from .base_client import BaseClient, CircuitBreaker, ClientSettings, SharedClient, shared_client
 
 __all__: list[str] = [
+    "BaseClient",
+    "CircuitBreaker",
+    "ClientSettings",
+    "SharedClient",
+    "shared_client",
     # Add client names here as they are added
 ]
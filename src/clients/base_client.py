@@ -0,0 +1,422 @@
+"""Base class for clients of HTTP services.
+
+All clients of a worker share one ``httpx.AsyncClient``, ``shared_client``, which is opened in the
+application lifespan and closed at shutdown. Its connection pool keeps connections alive between
+requests, so calls do not pay for a new TCP and TLS handshake each time. A client for a service
+subclasses ``BaseClient``::
+
+    class PaymentClient(BaseClient):
+        name = "payments"
+
+        async def process_payment(self, payment: dict) -> dict:
+            response = await self.post("/payments", json=payment, retry=True)
+            response.raise_for_status()
+            return response.json()
+
+    payments = PaymentClient("https://payments.internal", headers={"Authorization": f"Bearer {api_key}"})
+
+Requests are limited per host, retried with jittered exponential backoff on connection errors and
+on 429, 502, 503 and 504 (idempotent methods only, unless ``retry=True``), and suspended by a
+circuit breaker while the service keeps failing.
+
+For tests, start a separate ``SharedClient`` with a stand-in transport, e.g.
+``httpx.ASGITransport(stand_in_app)`` or ``httpx.MockTransport(handler)``, and pass it to the client.
+"""
+
+import asyncio
+import email.utils
+import importlib.util
+import logging
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+from prometheus_client import Counter, Histogram
+
+from src.config import ConfigParameter, ConfigSnapshot
+from src.config.metrics import gauge
+from src.models import CircuitOpenError, ServiceUnavailableError
+
+# Methods whose requests can be repeated without changing the result (RFC 9110)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+@dataclass(frozen=True)
+class ClientSettings:
+    """Settings of the shared HTTP client and the defaults of all clients.
+
+    Attributes:
+        timeout: Seconds to wait for a response (per read, write and pool wait)
+        connect_timeout: Seconds to wait for a connection to be established
+        max_connections: Maximum open connections of the pool
+        max_keepalive_connections: Idle connections kept open for reuse
+        keepalive_expiry: Seconds an idle connection is kept open
+        http2: Use HTTP/2 with hosts that support it (needs the ``http2`` extra)
+        max_per_host: Maximum concurrent requests per host, 0 for no limit but the pool's
+        retries: Retries of a failed request
+        retry_backoff: Base delay of the first retry in seconds, doubled on every further retry
+        retry_max_backoff: Maximum delay between retries in seconds; a response asking for a longer Retry-After
+            is returned without retrying
+        breaker_failures: Consecutive failures that open a client's circuit
+        breaker_reset: Seconds an open circuit rejects calls before letting a trial call through
+    """
+
+    timeout: float = 10.0
+    connect_timeout: float = 5.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 5.0
+    http2: bool = False
+    max_per_host: int = 50
+    retries: int = 2
+    retry_backoff: float = 0.1
+    retry_max_backoff: float = 2.0
+    breaker_failures: int = 5
+    breaker_reset: float = 30.0
+
+    @classmethod
+    def from_snapshot(cls, snapshot: ConfigSnapshot) -> "ClientSettings":
+        """Resolve the client settings from the configuration.
+
+        Args:
+            snapshot: The configuration snapshot
+
+        Returns:
+            ClientSettings: The effective settings
+        """
+        http2 = bool(snapshot.get(ConfigParameter.CLIENT_HTTP2, False))
+        if http2 and importlib.util.find_spec("h2") is None:
+            logging.getLogger("api").warning("h2 is not installed, clients fall back to HTTP/1.1")
+            http2 = False
+
+        return cls(
+            timeout=float(snapshot.get(ConfigParameter.CLIENT_TIMEOUT, cls.timeout)),
+            connect_timeout=float(snapshot.get(ConfigParameter.CLIENT_CONNECT_TIMEOUT, cls.connect_timeout)),
+            max_connections=int(snapshot.get(ConfigParameter.CLIENT_MAX_CONNECTIONS, cls.max_connections)),
+            max_keepalive_connections=int(
+                snapshot.get(ConfigParameter.CLIENT_MAX_KEEPALIVE_CONNECTIONS, cls.max_keepalive_connections)
+            ),
+            keepalive_expiry=float(snapshot.get(ConfigParameter.CLIENT_KEEPALIVE_EXPIRY, cls.keepalive_expiry)),
+            http2=http2,
+            max_per_host=int(snapshot.get(ConfigParameter.CLIENT_MAX_PER_HOST, cls.max_per_host)),
+            retries=int(snapshot.get(ConfigParameter.CLIENT_RETRIES, cls.retries)),
+            retry_backoff=float(snapshot.get(ConfigParameter.CLIENT_RETRY_BACKOFF, cls.retry_backoff)),
+            retry_max_backoff=float(snapshot.get(ConfigParameter.CLIENT_RETRY_MAX_BACKOFF, cls.retry_max_backoff)),
+            breaker_failures=int(snapshot.get(ConfigParameter.CLIENT_BREAKER_FAILURES, cls.breaker_failures)),
+            breaker_reset=float(snapshot.get(ConfigParameter.CLIENT_BREAKER_RESET, cls.breaker_reset)),
+        )
+
+
+class SharedClient:
+    """The ``httpx.AsyncClient`` shared by all clients of a worker, with per-host concurrency limits."""
+
+    def __init__(self) -> None:
+        self.settings = ClientSettings()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._transport: Optional[httpx.AsyncBaseTransport] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    async def start(self, settings: ClientSettings, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        """Open the client, closing a previously opened one.
+
+        Args:
+            settings: Pool, timeout and retry settings
+            transport: Transport replacing the network, e.g. a stand-in server in tests
+        """
+        await self.close()
+        self.settings = settings
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(
+                http2=settings.http2,
+                limits=httpx.Limits(
+                    max_connections=settings.max_connections,
+                    max_keepalive_connections=settings.max_keepalive_connections,
+                    keepalive_expiry=settings.keepalive_expiry,
+                ),
+            )
+        self._transport = transport
+        self._client = httpx.AsyncClient(
+            transport=transport, timeout=httpx.Timeout(settings.timeout, connect=settings.connect_timeout)
+        )
+
+    async def close(self) -> None:
+        """Close all connections"""
+        client, self._client = self._client, None
+        self._host_slots.clear()
+        if client is not None:
+            await client.aclose()
+            _pool_connections.labels("active").set(0)
+            _pool_connections.labels("idle").set(0)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The open client
+
+        Raises:
+            RuntimeError: If the client has not been started (it is opened in the application lifespan)
+        """
+        if self._client is None:
+            raise RuntimeError("The shared HTTP client is not started, it is opened in the application lifespan")
+        return self._client
+
+    def host_slots(self, host: str) -> Optional[asyncio.Semaphore]:
+        """The semaphore limiting the concurrent requests to a host, None if they are not limited"""
+        if self.settings.max_per_host <= 0:
+            return None
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(self.settings.max_per_host)
+        return slots
+
+    def record_pool_usage(self) -> None:
+        """Update the pool connection gauges from the transport's connection pool"""
+        # httpx does not expose its pool; transports other than the network one have none
+        pool = getattr(self._transport, "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return
+        idle = sum(1 for connection in connections if connection.is_idle())
+        _pool_connections.labels("active").set(len(connections) - idle)
+        _pool_connections.labels("idle").set(idle)
+
+
+class CircuitBreaker:
+    """Suspends calls to a service after consecutive failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls fail immediately
+    with ``CircuitOpenError``. Once ``reset_timeout`` seconds have passed, one trial call is let
+    through; it closes the circuit if it succeeds and opens it for another period if it fails.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently suspended or limited to trial calls"""
+        return self._opened_at is not None
+
+    def allow(self) -> None:
+        """Check whether a call may be made.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, with the seconds until the next trial call as Retry-After
+        """
+        if self._opened_at is None:
+            return
+        now = time.monotonic()
+        wait = self._opened_at + self.reset_timeout - now
+        if wait > 0:
+            raise CircuitOpenError(headers={"Retry-After": str(math.ceil(wait))})
+        # Let this call through as the trial; further calls wait for its outcome or another period
+        self._opened_at = now
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+
+class BaseClient:
+    """Base class of the clients of an HTTP service.
+
+    Subclasses set ``name``, which labels the client's metrics and log messages, and implement the
+    service's operations with ``request`` or its shortcuts. HTTP error statuses are returned, not
+    raised; connection failures that persist after the retries raise ``ServiceUnavailableError``.
+    """
+
+    name: str = "client"
+
+    def __init__(
+        self,
+        base_url: str,
+        headers: Optional[Dict[str, str]] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        shared: Optional[SharedClient] = None,
+    ) -> None:
+        """Initialize the client.
+
+        Args:
+            base_url: URL of the service, request paths are appended to it
+            headers: Headers sent with every request, e.g. authorization
+            circuit_breaker: Breaker of the service, by default one per client with the configured thresholds
+            shared: The shared HTTP client, ``shared_client`` by default
+        """
+        self.base_url = base_url.rstrip("/")
+        self.host = httpx.URL(self.base_url).netloc.decode("ascii")
+        self.headers = headers or {}
+        self.shared = shared or shared_client
+        self._circuit_breaker = circuit_breaker
+        self.logger = logging.getLogger(f"api.clients.{self.name}")
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """The client's circuit breaker, created with the settings of the started shared client"""
+        if self._circuit_breaker is None:
+            settings = self.shared.settings
+            self._circuit_breaker = CircuitBreaker(settings.breaker_failures, settings.breaker_reset)
+        return self._circuit_breaker
+
+    async def request(self, method: str, path: str, *, retry: Optional[bool] = None, **kwargs: Any) -> httpx.Response:
+        """Send a request to the service.
+
+        Args:
+            method: HTTP method
+            path: Path relative to the base URL
+            retry: Retry failed attempts; by default only requests with an idempotent method are retried
+            **kwargs: Arguments of ``httpx.AsyncClient.request``, e.g. ``json``, ``params`` or ``timeout``
+
+        Returns:
+            The response, with its body read
+
+        Raises:
+            CircuitOpenError: If the service's circuit is open
+            ServiceUnavailableError: If the service cannot be reached
+        """
+        method = method.upper()
+        url = self.base_url + "/" + path.lstrip("/")
+        if self.headers:
+            kwargs["headers"] = {**self.headers, **(kwargs.get("headers") or {})}
+        settings = self.shared.settings
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+        retries = settings.retries if retry else 0
+        breaker = self.circuit_breaker
+
+        attempt = 0
+        while True:
+            try:
+                breaker.allow()
+            except CircuitOpenError:
+                _requests.labels(self.name, method, "rejected").inc()
+                _circuit_open.labels(self.name).set(1)
+                raise
+
+            try:
+                response = await self._send(method, url, **kwargs)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                _circuit_open.labels(self.name).set(int(breaker.is_open))
+                _requests.labels(self.name, method, "error").inc()
+                if attempt >= retries:
+                    self.logger.warning("%s %s failed: %r", method, url, e)
+                    raise ServiceUnavailableError(
+                        message=f"The {self.name} service cannot be reached", code="upstream_unavailable"
+                    ) from e
+                delay = self._jitter(attempt)
+            else:
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                _circuit_open.labels(self.name).set(int(breaker.is_open))
+                _requests.labels(self.name, method, f"{response.status_code // 100}xx").inc()
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+                retry_delay = self._backoff(attempt, response.headers.get("retry-after"))
+                if retry_delay is None:
+                    # The service asks to wait longer than a retry may wait
+                    return response
+                delay = retry_delay
+
+            attempt += 1
+            _retries.labels(self.name).inc()
+            await asyncio.sleep(delay)
+
+    async def get(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def put(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("PUT", path, **kwargs)
+
+    async def patch(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("PATCH", path, **kwargs)
+
+    async def delete(self, path: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("DELETE", path, **kwargs)
+
+    async def _send(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send one attempt, waiting for a free slot of the host"""
+        slots = self.shared.host_slots(self.host)
+        client = self.shared.client
+        in_flight = _in_flight.labels(self.name)
+        if slots is not None:
+            if slots.locked():
+                queued = _queued.labels(self.name)
+                queued.inc()
+                try:
+                    await slots.acquire()
+                finally:
+                    queued.dec()
+            else:
+                await slots.acquire()
+
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            return await client.request(method, url, **kwargs)
+        finally:
+            _duration.labels(self.name).observe(time.perf_counter() - start)
+            in_flight.dec()
+            if slots is not None:
+                slots.release()
+            self.shared.record_pool_usage()
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> Optional[float]:
+        """Delay before the next attempt: full jitter over an exponential bound, or the server's Retry-After.
+
+        Returns None if Retry-After exceeds ``retry_max_backoff``; retrying earlier would be refused again.
+        """
+        settings = self.shared.settings
+        if retry_after is not None:
+            seconds = _retry_after_seconds(retry_after)
+            if seconds is not None:
+                return seconds if seconds <= settings.retry_max_backoff else None
+        return self._jitter(attempt)
+
+    def _jitter(self, attempt: int) -> float:
+        """Random delay up to the exponential bound of an attempt (full jitter)"""
+        settings = self.shared.settings
+        return random.uniform(0, min(settings.retry_max_backoff, settings.retry_backoff * 2**attempt))
+
+
+def _retry_after_seconds(value: str) -> Optional[float]:
+    """Seconds of a Retry-After header, given as seconds or as an HTTP date"""
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_requests = Counter(
+    "http_client_requests_total",
+    "Outbound HTTP requests by status class (error for connection failures, rejected by an open circuit)",
+    ["client", "method", "status_class"],
+)
+_retries = Counter("http_client_retries_total", "Retried outbound HTTP requests", ["client"])
+_duration = Histogram("http_client_request_duration_seconds", "Outbound HTTP request duration", ["client"])
+_in_flight = gauge("http_client_requests_in_flight", "Outbound HTTP requests waiting for a response", ["client"])
+_queued = gauge("http_client_requests_queued", "Outbound HTTP requests waiting for a slot of their host", ["client"])
+_pool_connections = gauge("http_client_pool_connections", "Connections of the shared HTTP client pool", ["state"])
+_circuit_open = gauge("http_client_circuit_open", "Whether a client's circuit is open (1) or closed (0)", ["client"])
+
+# Opened and closed in the application lifespan
+shared_client = SharedClient()
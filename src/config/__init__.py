@@ -6,8 +6,10 @@ variables, settings, and logging configuration.
 
 from .config import ConfigurationManager
 from .params import ConfigParameter
+from .snapshot import ConfigSnapshot
 
 __all__: list[str] = [
     "ConfigurationManager",
     "ConfigParameter",
+    "ConfigSnapshot",
 ]
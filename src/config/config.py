@@ -1,10 +1,46 @@
+import atexit
+import json
 import logging
 import os
-from typing import List, Optional
+import threading
+from typing import Callable, List, Optional
 
 from dynaconf import Dynaconf  # type: ignore[import]
 
+from .log_buffer import RingBufferHandler
+from .log_format import JsonFormatter, RequestContextFilter, SamplingFilter, SamplingRule
+from .log_rotation import COMPRESSION_SUFFIXES, CompressingRotatingFileHandler
+from .log_queue import BoundedQueueHandler, LogWriter, OverflowPolicy
+from .metrics import GAUGE_MODES
 from .params import ConfigParameter
+from .server import HTTP_CHOICES, LOOP_CHOICES
+from .snapshot import ConfigSnapshot
+from .watcher import ConfigWatcher
+
+# Keys resolved into the snapshot; lookups for these never fall back to Dynaconf
+_PARAMETER_KEYS: frozenset[str] = frozenset(param.value for param in ConfigParameter)
+
+
+def _check_positive(
+    errors: List[str], settings: Dynaconf, *params: ConfigParameter, integer: bool = False, zero: bool = False
+) -> None:
+    """Add an error for each set parameter that is not a positive number.
+
+    Args:
+        errors: Validation errors to append to
+        settings: The settings to check
+        params: The parameters to check
+        integer: Require integers instead of numbers
+        zero: Allow zero
+    """
+    kind = "integer" if integer else "number"
+    types = int if integer else (int, float)
+    for param in params:
+        value = settings.get(param.value)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, types) or value < 0 or (value == 0 and not zero):
+            errors.append(f"'{param.value}' must be a {'non-negative' if zero else 'positive'} {kind}")
 
 
 class ConfigurationManager:
@@ -21,16 +57,26 @@ class ConfigurationManager:
                        will look for 'config/config.json' in the current working directory.
         """
         self._settings = None
+        self._snapshot: Optional[ConfigSnapshot] = None
         self._log_handlers: List[logging.Handler] = []
+        self._log_writer: Optional[LogWriter] = None
+        self._log_buffer: Optional[RingBufferHandler] = None
         self.logger = logging.getLogger("config")
         self._valid = True
         self._reason = ""
+        self._reload_error: Optional[str] = None
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[ConfigWatcher] = None
+        self._reload_listeners: List[Callable[[ConfigSnapshot], None]] = []
 
         if config_path is None:
             config_path = os.path.join(os.getcwd(), "config", "config.json")
+        self._config_path = config_path
 
+        # Also sets up logging
         self.reload_config(config_path)
-        self._setup_logging()
+        # Flush records still waiting in the logging queue when the process exits
+        atexit.register(self._stop_log_writer)
 
     def invalidate(self, reason: str) -> None:
         """
@@ -42,6 +88,7 @@ class ConfigurationManager:
         """
         self._valid = False
         self._reason = reason
+        self._notify_reload_listeners()
 
     def is_valid(self) -> bool:
         """
@@ -61,60 +108,359 @@ class ConfigurationManager:
         """
         return self._reason
 
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """The current immutable configuration snapshot.
+
+        Hold on to the returned object for the duration of an operation to read a consistent
+        set of values, even if the configuration is reloaded concurrently.
+
+        Raises:
+            RuntimeError: If the configuration has not been loaded yet
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise RuntimeError("Config not initialized")
+        return snapshot
+
+    def add_reload_listener(self, listener: Callable[[ConfigSnapshot], None]) -> None:
+        """Call a function whenever a new configuration is applied or the configuration is invalidated.
+
+        Listeners run synchronously on the thread that applied the change (e.g. the config watcher),
+        so they should be quick, e.g. clear a cache. Exceptions are logged and do not stop the reload.
+
+        Args:
+            listener: Called with the current snapshot
+        """
+        self._reload_listeners.append(listener)
+
+    def _notify_reload_listeners(self) -> None:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return
+        for listener in list(self._reload_listeners):
+            try:
+                listener(snapshot)
+            except Exception:
+                self.logger.exception("Configuration reload listener %r failed", listener)
+
+    @property
+    def watching(self) -> bool:
+        """Whether the configuration file is being watched for changes"""
+        return self._watcher is not None and self._watcher.running
+
     def reload_config(self, config_path: str) -> None:
         """Reload the config from the specified path"""
-        self.logger.debug(f"Looking for config file in: {config_path}")
-        self._settings = Dynaconf(
+        self.logger.debug("Looking for config file in: %s", config_path)
+        with self._reload_lock:
+            self._config_path = config_path
+            self._apply_settings(self._load_settings(config_path))
+
+    def try_reload_config(self, config_path: Optional[str] = None) -> bool:
+        """Reparse and validate the config file and apply it only if it is valid.
+
+        If the file cannot be parsed or fails validation, the configuration is invalidated (so the
+        readiness check fails) and the last good snapshot stays active. A later successful reload
+        restores the validity, unless the configuration was invalidated for another reason.
+
+        Args:
+            config_path: Path of the config file. Defaults to the path the manager was loaded from.
+
+        Returns:
+            True if the new configuration was applied, False otherwise
+        """
+        config_path = config_path or self._config_path
+        with self._reload_lock:
+            try:
+                with open(config_path, "r", encoding="utf-8") as f:
+                    json.load(f)
+                settings = self._load_settings(config_path)
+                errors = self._validate_settings(settings)
+            except Exception as e:
+                errors = [f"cannot be loaded: {e}"]
+
+            if errors:
+                reason = f"Invalid configuration in {config_path}: {'; '.join(errors)}"
+                self.logger.error("%s. Keeping configuration generation %d", reason, self.snapshot.generation)
+                self._reload_error = reason
+                self.invalidate(reason)
+                return False
+
+            self._config_path = config_path
+            # Restored before the listeners run, so they see the recovered validity
+            if self._reload_error is not None and self._reason == self._reload_error:
+                # Only lift the invalidation caused by a previous failed reload
+                self._valid = True
+                self._reason = ""
+            self._reload_error = None
+            self._apply_settings(settings)
+
+        self.logger.info("Applied configuration generation %d from %s", self.snapshot.generation, config_path)
+        return True
+
+    def start_watching(self, interval: Optional[float] = None) -> None:
+        """Watch the config file and reload it in place whenever it changes.
+
+        Args:
+            interval: Polling interval in seconds. Defaults to the ``config_watch_interval`` setting.
+        """
+        if self.watching:
+            return
+        if interval is None:
+            interval = float(self.snapshot.get(ConfigParameter.CONFIG_WATCH_INTERVAL, 2.0))
+        self._watcher = ConfigWatcher(self._config_path, self._reload_changed_config, interval=interval)
+        self._watcher.start()
+
+    def _reload_changed_config(self) -> None:
+        """Watcher callback; a rejected file is logged and reported by the readiness check"""
+        self.try_reload_config()
+
+    def stop_watching(self) -> None:
+        """Stop watching the config file"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def _load_settings(self, config_path: str) -> Dynaconf:
+        return Dynaconf(
             settings_files=[config_path, "settings.toml"],
             merge_enabled=True,
         )
+
+    def _apply_settings(self, settings: Dynaconf) -> None:
+        generation = self._snapshot.generation + 1 if self._snapshot is not None else 1
+        snapshot = ConfigSnapshot.from_settings(settings, generation)
+
+        # Both references are replaced only after the new snapshot is fully built, so readers
+        # either see the previous or the new configuration, never a mix of both.
+        self._settings = settings
+        self._snapshot = snapshot
         self._setup_logging()
+        self._notify_reload_listeners()
 
-    def get_config(self, key: str | ConfigParameter, default_value=None):
-        """Get a configuration value from the config file"""
-        self.logger.debug(f"Looking for config value: {key}")
+    @staticmethod
+    def _validate_settings(settings: Dynaconf) -> List[str]:
+        """Check the settings for values that would break the running service.
 
-        if not self.is_valid():
-            self.logger.fatal("Config is invalid. Reason: %s", self.get_reason())
-            raise RuntimeError("Config is invalid")
+        Returns:
+            List of validation errors, empty if the settings are valid
+        """
+        errors = []
+        for param in (ConfigParameter.LOG_LEVEL, ConfigParameter.LOG_LOGGER_LEVEL):
+            level = settings.get(param.value)
+            if level is not None and not isinstance(logging.getLevelName(str(level).upper()), int):
+                errors.append(f"'{param.value}' is not a valid log level: {level}")
+
+        port = settings.get(ConfigParameter.APP_PORT.value)
+        if port is not None and (not isinstance(port, int) or not 0 < port < 65536):
+            errors.append(f"'{ConfigParameter.APP_PORT.value}' is not a valid port: {port}")
+
+        encoder = settings.get(ConfigParameter.APP_RESPONSE_ENCODER.value)
+        if encoder is not None and encoder not in ("json", "orjson", "msgspec"):
+            errors.append(f"'{ConfigParameter.APP_RESPONSE_ENCODER.value}' must be json, orjson or msgspec: {encoder}")
+
+        server_choices = ((ConfigParameter.SERVER_LOOP, LOOP_CHOICES), (ConfigParameter.SERVER_HTTP, HTTP_CHOICES))
+        for param, choices in server_choices:
+            value = settings.get(param.value)
+            if value is not None and value not in choices:
+                errors.append(f"'{param.value}' must be one of {', '.join(choices)}: {value}")
+
+        gauge_mode = settings.get(ConfigParameter.METRICS_GAUGE_AGGREGATION.value)
+        if gauge_mode is not None and gauge_mode not in GAUGE_MODES:
+            errors.append(
+                f"'{ConfigParameter.METRICS_GAUGE_AGGREGATION.value}' must be one of {', '.join(GAUGE_MODES)}"
+            )
+
+        for param in (ConfigParameter.METRICS_LATENCY_BUCKETS, ConfigParameter.METRICS_SIZE_BUCKETS):
+            buckets = settings.get(param.value)
+            if buckets is not None and (
+                not isinstance(buckets, list)
+                or not buckets
+                or not all(isinstance(bound, (int, float)) and bound > 0 for bound in buckets)
+                or sorted(buckets) != list(buckets)
+            ):
+                errors.append(f"'{param.value}' must be a non-empty ascending list of positive numbers")
+
+        logger_names = settings.get(ConfigParameter.LOG_LOGGER_NAMES.value)
+        if logger_names is not None and not isinstance(logger_names, list):
+            errors.append(f"'{ConfigParameter.LOG_LOGGER_NAMES.value}' must be a list")
+
+        overflow = settings.get(ConfigParameter.LOG_QUEUE_OVERFLOW.value)
+        if overflow is not None and overflow not in {policy.value for policy in OverflowPolicy}:
+            errors.append(f"'{ConfigParameter.LOG_QUEUE_OVERFLOW.value}' is not a valid overflow policy: {overflow}")
+
+        compression = settings.get(ConfigParameter.LOG_ROTATION_COMPRESSION.value)
+        if compression is not None and compression not in COMPRESSION_SUFFIXES:
+            errors.append(f"'{ConfigParameter.LOG_ROTATION_COMPRESSION.value}' must be none, gzip or zstd")
+
+        log_format = settings.get(ConfigParameter.LOG_FORMAT.value)
+        if log_format is not None and log_format not in ("text", "json"):
+            errors.append(f"'{ConfigParameter.LOG_FORMAT.value}' must be 'text' or 'json': {log_format}")
+
+        sampling = settings.get(ConfigParameter.LOG_SAMPLING.value)
+        if sampling is not None:
+            try:
+                rules = [SamplingRule.from_config(rule) for rule in sampling]
+                if any(not 0 <= rule.rate <= 1 or not isinstance(rule.always_level, int) for rule in rules):
+                    raise ValueError("rate must be between 0 and 1 and always_level a log level")
+            except Exception as e:
+                errors.append(f"'{ConfigParameter.LOG_SAMPLING.value}' contains an invalid rule: {e}")
+
+        _check_positive(
+            errors, settings, ConfigParameter.RESPONSE_CACHE_MAX_ENTRIES, ConfigParameter.RESPONSE_CACHE_TTL
+        )
+
+        encodings = settings.get(ConfigParameter.COMPRESSION_ENCODINGS.value)
+        if encodings is not None and (not isinstance(encodings, list) or not set(encodings) <= {"gzip", "br", "zstd"}):
+            errors.append(f"'{ConfigParameter.COMPRESSION_ENCODINGS.value}' must be a list of gzip, br and zstd")
+
+        _check_positive(errors, settings, ConfigParameter.COMPRESSION_MINIMUM_SIZE, integer=True, zero=True)
+        _check_positive(errors, settings, ConfigParameter.COMPRESSION_MAX_REQUEST_BYTES, integer=True)
+        _check_positive(
+            errors,
+            settings,
+            ConfigParameter.IDEMPOTENCY_TTL,
+            ConfigParameter.IDEMPOTENCY_MAX_ENTRIES,
+            ConfigParameter.IDEMPOTENCY_MAX_BODY_BYTES,
+            ConfigParameter.IDEMPOTENCY_WAIT_TIMEOUT,
+        )
 
-        if self._settings is None:
+        store = settings.get(ConfigParameter.IDEMPOTENCY_STORE.value)
+        if store is not None and store not in ("memory", "sqlite"):
+            errors.append(f"'{ConfigParameter.IDEMPOTENCY_STORE.value}' must be 'memory' or 'sqlite': {store}")
+
+        _check_positive(
+            errors,
+            settings,
+            ConfigParameter.CLIENT_TIMEOUT,
+            ConfigParameter.CLIENT_CONNECT_TIMEOUT,
+            ConfigParameter.CLIENT_MAX_CONNECTIONS,
+            ConfigParameter.CLIENT_KEEPALIVE_EXPIRY,
+            ConfigParameter.CLIENT_BREAKER_FAILURES,
+            ConfigParameter.CLIENT_BREAKER_RESET,
+        )
+        _check_positive(
+            errors,
+            settings,
+            ConfigParameter.CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+            ConfigParameter.CLIENT_MAX_PER_HOST,
+            ConfigParameter.CLIENT_RETRIES,
+            ConfigParameter.CLIENT_RETRY_BACKOFF,
+            ConfigParameter.CLIENT_RETRY_MAX_BACKOFF,
+            zero=True,
+        )
+        _check_positive(errors, settings, ConfigParameter.DATABASE_POOL_SIZE, ConfigParameter.DATABASE_POOL_TIMEOUT)
+        _check_positive(errors, settings, ConfigParameter.DATABASE_STATEMENT_CACHE_SIZE, integer=True, zero=True)
+        _check_positive(errors, settings, ConfigParameter.READ_CACHE_MAX_ENTRIES, ConfigParameter.READ_CACHE_TTL)
+        _check_positive(
+            errors, settings, ConfigParameter.READ_CACHE_NEGATIVE_TTL, ConfigParameter.READ_CACHE_STALE_TTL, zero=True
+        )
+        _check_positive(errors, settings, ConfigParameter.MICRO_BATCH_WINDOW, zero=True)
+        _check_positive(errors, settings, ConfigParameter.MICRO_BATCH_MAX_SIZE, integer=True)
+        _check_positive(errors, settings, ConfigParameter.CONFIG_WATCH_INTERVAL)
+
+        return errors
+
+    def get_config(self, key: str | ConfigParameter, default_value=None):
+        """Get a configuration value.
+
+        Known parameters are served from the current snapshot. Other keys fall back to a
+        Dynaconf lookup. While the configuration is invalid (e.g. after a rejected reload), values
+        are still served from the last good configuration; only the readiness check reports it.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or self._settings is None:
             self.logger.fatal("Config was not initialized before first use.")
             raise RuntimeError("Config not initialized")
 
         if isinstance(key, ConfigParameter):
             key = key.value
 
+        if key in _PARAMETER_KEYS:
+            return snapshot.values.get(key, default_value)
+
         return self._settings(key, default_value)
 
     def _setup_logging(self) -> None:
-        """Configure logging based on the current configuration"""
+        """Configure logging based on the current configuration.
+
+        New handlers are attached before the previous ones are closed, so the logging setup can be
+        swapped while other threads keep logging.
+        """
         try:
-            log_level = self.get_config(ConfigParameter.LOG_LEVEL, "INFO").upper()
-            log_file = self.get_config(ConfigParameter.LOG_FILE, "app.log")
+            snapshot = self.snapshot
+            log_level = snapshot.get(ConfigParameter.LOG_LEVEL, "INFO").upper()
+            log_file = snapshot.get(ConfigParameter.LOG_FILE, "app.log")
             log_message_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
             log_date_format = "%Y-%m-%dT%H:%M:%S"
 
-            # Clear existing handlers
-            for handler in self._log_handlers:
-                try:
-                    handler.close()
-                except Exception as e:
-                    print(f"Error closing log handler: {e}")
-            self._log_handlers = []
+            previous_handlers = self._log_handlers
+            previous_writer = self._log_writer
+            handlers: List[logging.Handler] = []
+
+            formatter: logging.Formatter
+            if snapshot.get(ConfigParameter.LOG_FORMAT, "text") == "json":
+                formatter = JsonFormatter()
+            else:
+                formatter = logging.Formatter(log_message_format, datefmt=log_date_format)
 
             # Configure file handler
-            file_handler = logging.FileHandler(log_file)
-            file_handler.setFormatter(logging.Formatter(log_message_format, datefmt=log_date_format))
-            self._log_handlers.append(file_handler)
+            if snapshot.get(ConfigParameter.LOG_FILE_ENABLED, True):
+                max_bytes = int(snapshot.get(ConfigParameter.LOG_ROTATION_MAX_BYTES, 0))
+                max_age = float(snapshot.get(ConfigParameter.LOG_ROTATION_MAX_AGE, 0))
+                file_handler: logging.FileHandler
+                if max_bytes > 0 or max_age > 0:
+                    file_handler = CompressingRotatingFileHandler(
+                        log_file,
+                        max_bytes=max_bytes,
+                        max_age=max_age,
+                        backup_count=int(snapshot.get(ConfigParameter.LOG_ROTATION_BACKUP_COUNT, 5)),
+                        compression=snapshot.get(ConfigParameter.LOG_ROTATION_COMPRESSION, "gzip"),
+                    )
+                else:
+                    file_handler = logging.FileHandler(log_file)
+                file_handler.setFormatter(formatter)
+                handlers.append(file_handler)
+
+            # Configure in-memory buffer handler, keeping the recorded history across reloads
+            buffer_size = int(snapshot.get(ConfigParameter.LOG_BUFFER_SIZE, 0))
+            log_buffer = self._log_buffer
+            if buffer_size <= 0:
+                log_buffer = None
+            elif log_buffer is None or log_buffer.capacity != buffer_size:
+                log_buffer = RingBufferHandler(buffer_size)
+            if log_buffer is not None:
+                log_buffer.setFormatter(formatter)
+                log_buffer.filters.clear()
+                handlers.append(log_buffer)
 
             # Configure console handler
             console_handler = logging.StreamHandler()
-            console_handler.setFormatter(logging.Formatter(log_message_format, datefmt=log_date_format))
-            self._log_handlers.append(console_handler)
+            console_handler.setFormatter(formatter)
+            handlers.append(console_handler)
+
+            writer: Optional[LogWriter] = None
+            if snapshot.get(ConfigParameter.LOG_QUEUE_ENABLED, False):
+                # Loggers only enqueue records, a writer thread passes them to the blocking handlers
+                queue_handler = BoundedQueueHandler(
+                    queue_size=snapshot.get(ConfigParameter.LOG_QUEUE_SIZE, 10000),
+                    overflow=snapshot.get(ConfigParameter.LOG_QUEUE_OVERFLOW, OverflowPolicy.BLOCK),
+                )
+                writer = LogWriter(queue_handler, *handlers)
+                writer.start()
+                handlers = [queue_handler]
+
+            # Filters run on the handlers the loggers call directly, i.e. before records are queued
+            filters: List[logging.Filter] = [RequestContextFilter()]
+            sampling_rules = snapshot.get(ConfigParameter.LOG_SAMPLING, [])
+            if sampling_rules:
+                filters.append(SamplingFilter(SamplingRule.from_config(rule) for rule in sampling_rules))
+            for handler in handlers:
+                for log_filter in filters:
+                    handler.addFilter(log_filter)
 
             # Get logger names to configure
-            loggers = self.get_config(
+            loggers = snapshot.get(
                 ConfigParameter.LOG_LOGGER_NAMES,
                 ["api", "httpx", "twisted", "asyncio", "httpcore", "werkzeug"],
             )
@@ -123,36 +469,52 @@ class ConfigurationManager:
             root_logger = logging.getLogger()
             root_logger.setLevel(logging.WARNING)  # Default to WARNING for root
 
-            # Remove any existing handlers from root logger
-            for handler in root_logger.handlers[:]:
-                root_logger.removeHandler(handler)
-
-            # Add our handlers to root logger
-            for handler in self._log_handlers:
-                root_logger.addHandler(handler)
+            # Replace the handler list in one assignment instead of removing and adding one by one
+            root_logger.handlers = list(handlers)
 
             # Configure specific loggers with their levels and disable propagation
             for logger_name in loggers:
                 try:
                     logger = logging.getLogger(logger_name)
-                    logger.setLevel(self.get_config(ConfigParameter.LOG_LOGGER_LEVEL, log_level).upper())
+                    logger.setLevel(snapshot.get(ConfigParameter.LOG_LOGGER_LEVEL, log_level).upper())
                     # Disable propagation to prevent duplicate logs
                     logger.propagate = False
-                    # Clear any existing handlers
-                    for handler in logger.handlers[:]:
-                        logger.removeHandler(handler)
+                    # Replace any existing handlers with ours
+                    logger.handlers = list(handlers)
                 except Exception as e:
                     print(f"Failed to configure logger '{logger_name}': {e}")
                     continue
 
-                # Add our handlers to this logger
-                for handler in self._log_handlers:
-                    logger.addHandler(handler)
+            self._log_handlers = handlers
+            self._log_writer = writer
+            self._log_buffer = log_buffer
+
+            # Close the previous handlers only after nothing references them anymore
+            if previous_writer is not None:
+                previous_writer.stop()
+                previous_handlers = previous_handlers + list(previous_writer.handlers)
+            for handler in previous_handlers:
+                if handler is log_buffer:
+                    continue
+                try:
+                    handler.close()
+                except Exception as e:
+                    print(f"Error closing log handler: {e}")
 
         except Exception as e:
             print(f"Failed to configure logging: {e}")
             logging.basicConfig(level=logging.INFO)
 
+    def _stop_log_writer(self) -> None:
+        """Stop the logging writer thread after it has written all queued records"""
+        if self._log_writer is not None:
+            self._log_writer.stop()
+
+    @property
+    def log_buffer(self) -> Optional[RingBufferHandler]:
+        """The in-memory buffer of recent log records, None if ``log_buffer_size`` is not set"""
+        return self._log_buffer
+
     def get_log_level(self) -> int:
         """Get the current log level as a logging level constant"""
         level_str = self.get_config(ConfigParameter.LOG_LEVEL, "INFO").upper()
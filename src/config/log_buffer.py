@@ -0,0 +1,86 @@
+"""In-memory ring buffer for recent log records.
+
+Keeps the last N formatted records of a worker in a preallocated buffer, so recent logs can be
+served without file I/O, e.g. on a read-only container file system.
+"""
+
+import logging
+from typing import List, NamedTuple, Optional
+
+
+class BufferedRecord(NamedTuple):
+    """A formatted record stored in the ring buffer"""
+
+    created: float
+    levelno: int
+    name: str
+    message: str
+
+
+class RingBufferHandler(logging.Handler):
+    """Logging handler that keeps the last ``capacity`` formatted records."""
+
+    def __init__(self, capacity: int = 1000) -> None:
+        """Initialize the handler and preallocate its buffer.
+
+        Args:
+            capacity: Number of records to keep
+        """
+        super().__init__()
+        self.capacity = max(int(capacity), 1)
+        self._records: List[Optional[BufferedRecord]] = [None] * self.capacity
+        self._next = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            entry = BufferedRecord(record.created, record.levelno, record.name, self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        # Handler.handle() holds the handler lock while calling emit()
+        self._records[self._next] = entry
+        self._next = (self._next + 1) % self.capacity
+
+    def get_records(
+        self,
+        limit: int,
+        min_level: int = logging.NOTSET,
+        logger_name: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> List[BufferedRecord]:
+        """Return the newest records matching all given filters, newest first.
+
+        Args:
+            limit: Maximum number of records to return
+            min_level: Only return records at or above this level
+            logger_name: Only return records of this logger or its children
+            since: Only return records created at or after this UNIX timestamp
+            until: Only return records created at or before this UNIX timestamp
+
+        Returns:
+            List of matching records
+        """
+        self.acquire()
+        try:
+            oldest = self._next
+            records = self._records[oldest:] + self._records[:oldest]
+        finally:
+            self.release()
+
+        prefix = f"{logger_name}."
+        result: List[BufferedRecord] = []
+        for record in reversed(records):
+            if len(result) >= limit or record is None:
+                break
+            if record.levelno < min_level:
+                continue
+            if logger_name and record.name != logger_name and not record.name.startswith(prefix):
+                continue
+            if since is not None and record.created < since:
+                # Records are ordered by time, all remaining ones are older
+                break
+            if until is not None and record.created > until:
+                continue
+            result.append(record)
+        return result
@@ -0,0 +1,173 @@
+"""Following a log file for live streaming.
+
+A single ``LogFollower`` per file and worker polls the file for appended lines and fans them out to
+any number of subscribers. Every subscriber has a bounded queue; a subscriber that falls behind is
+dropped instead of buffering without limit.
+"""
+
+import asyncio
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import ClassVar, Dict, List, Optional, Set
+
+# Level of a line in the text (" - INFO - ") or JSON ('"level":"INFO"') log format
+_LEVEL_PATTERN = re.compile(
+    r' - (DEBUG|INFO|WARNING|ERROR|CRITICAL) - |"level":\s*"(DEBUG|INFO|WARNING|ERROR|CRITICAL)"'
+)
+
+# Maximum number of bytes read per poll, so a burst of log lines cannot stall the loop
+_MAX_READ = 1024 * 1024
+
+
+@dataclass(eq=False)
+class LogSubscription:
+    """A subscriber of a ``LogFollower``.
+
+    Attributes:
+        queue: Matching lines; None marks the end of the subscription
+        min_level: Only lines at or above this level are delivered
+        contains: Only lines containing this substring are delivered
+        dropped: Whether the subscriber was dropped for falling behind
+    """
+
+    queue: "asyncio.Queue[Optional[str]]"
+    min_level: int = logging.NOTSET
+    contains: Optional[str] = None
+    dropped: bool = field(default=False)
+
+    def accepts(self, line: str, level: int) -> bool:
+        """Whether the line passes the subscriber's filters"""
+        if level < self.min_level:
+            return False
+        return self.contains is None or self.contains in line
+
+
+class LogFollower:
+    """Polls a log file for new lines and distributes them to subscribers."""
+
+    _followers: ClassVar[Dict[str, "LogFollower"]] = {}
+
+    def __init__(self, path: str, poll_interval: float = 0.5) -> None:
+        """Initialize the follower. Use ``for_file`` to share one follower per file.
+
+        Args:
+            path: Path of the log file
+            poll_interval: Seconds between checks for new lines
+        """
+        self.path = path
+        self.poll_interval = poll_interval
+        self.logger = logging.getLogger("api.actuators.logs")
+        self._subscribers: Set[LogSubscription] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._last_level = logging.NOTSET
+
+    @classmethod
+    def for_file(cls, path: str, poll_interval: float = 0.5) -> "LogFollower":
+        """Get the follower for a file, creating it on first use"""
+        path = os.path.abspath(path)
+        follower = cls._followers.get(path)
+        if follower is None:
+            follower = cls._followers[path] = cls(path, poll_interval)
+        follower.poll_interval = poll_interval
+        return follower
+
+    def subscribe(
+        self, max_pending: int = 1000, min_level: int = logging.NOTSET, contains: Optional[str] = None
+    ) -> LogSubscription:
+        """Subscribe to lines appended from now on.
+
+        Args:
+            max_pending: Maximum number of undelivered lines before the subscriber is dropped
+            min_level: Only deliver lines at or above this level
+            contains: Only deliver lines containing this substring
+
+        Returns:
+            LogSubscription: The new subscription; pass it to ``unsubscribe`` when done
+        """
+        subscription = LogSubscription(asyncio.Queue(maxsize=max_pending), min_level, contains)
+        self._subscribers.add(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._follow())
+        return subscription
+
+    def unsubscribe(self, subscription: LogSubscription) -> None:
+        """Remove a subscription; the polling task stops with the last subscriber"""
+        self._subscribers.discard(subscription)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _publish(self, line: str) -> None:
+        match = _LEVEL_PATTERN.search(line)
+        if match:
+            self._last_level = logging.getLevelNamesMapping()[match.group(1) or match.group(2)]
+        # Continuation lines (e.g. tracebacks) inherit the level of the record they belong to
+        level = self._last_level
+
+        for subscription in list(self._subscribers):
+            if not subscription.accepts(line, level):
+                continue
+            try:
+                subscription.queue.put_nowait(line)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _publish_lines(self, data: bytes) -> bytes:
+        """Publish all complete lines in data and return the incomplete rest"""
+        lines: List[bytes] = data.split(b"\n")
+        remainder = lines.pop()
+        for line in lines:
+            self._publish(line.decode("utf-8", errors="replace").rstrip("\r"))
+        return remainder
+
+    def _drop(self, subscription: LogSubscription) -> None:
+        self.logger.warning("Dropping log stream subscriber that fell behind")
+        self._subscribers.discard(subscription)
+        subscription.dropped = True
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    async def _follow(self) -> None:
+        handle = None
+        inode: Optional[int] = None
+        position = 0
+        remainder = b""
+        try:
+            while self._subscribers:
+                try:
+                    stat = await asyncio.to_thread(os.stat, self.path)
+                except OSError:
+                    stat = None
+
+                if stat is not None and (handle is None or stat.st_ino != inode or stat.st_size < position):
+                    # First poll, rotated or truncated file: (re)open it
+                    if handle is not None:
+                        if stat.st_ino != inode:
+                            # Deliver what was written to the rotated file since the last poll
+                            handle.seek(position)
+                            while chunk := await asyncio.to_thread(handle.read, _MAX_READ):
+                                remainder = self._publish_lines(remainder + chunk)
+                            if remainder:
+                                self._publish(remainder.decode("utf-8", errors="replace"))
+                        handle.close()
+                    handle = await asyncio.to_thread(open, self.path, "rb")
+                    position = stat.st_size if inode is None else 0
+                    inode = stat.st_ino
+                    remainder = b""
+
+                if handle is not None and stat is not None and stat.st_size > position:
+                    handle.seek(position)
+                    data = await asyncio.to_thread(handle.read, min(stat.st_size - position, _MAX_READ))
+                    position += len(data)
+                    remainder = self._publish_lines(remainder + data)
+                    if stat.st_size > position:
+                        # More data is waiting, continue without sleeping
+                        continue
+
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            if handle is not None:
+                handle.close()
@@ -0,0 +1,190 @@
+"""Structured log formatting and sampling.
+
+``JsonFormatter`` renders records as one JSON object per line. The message is only rendered from
+its arguments when a record is actually formatted, so log calls should pass arguments instead of
+pre-formatted f-strings.
+
+``RequestContextFilter`` adds the path of the current request to each record.
+``SamplingFilter`` keeps only a configurable share of the records per logger and route. The
+sampling decision is made once per request, so the records of a request are either all kept or
+all dropped. Records at or above a rule's ``always_level`` (WARNING by default) are always kept.
+The records a request drops are held until it completes (up to ``MAX_HELD_RECORDS``), and written
+after all if it fails with a 5xx status or an exception, so failed requests are always logged in full.
+"""
+
+import json
+import logging
+import random
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+try:
+    import orjson  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+# Records of a request dropped by sampling that are held in case it fails
+MAX_HELD_RECORDS = 1000
+
+# Path of the request being handled, its sampling value and the records it dropped, set by the request middleware
+request_route: ContextVar[Optional[str]] = ContextVar("request_route", default=None)
+request_sample: ContextVar[Optional[float]] = ContextVar("request_sample", default=None)
+request_held: ContextVar[Optional[List[logging.LogRecord]]] = ContextVar("request_held", default=None)
+
+# Attributes every LogRecord has; everything else was passed via ``extra``
+_RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__.keys() | {"message", "asctime", "taskName"}
+)
+
+
+def bind_request(route: str) -> Tuple[Token, Token, Token]:
+    """Bind the current request to the logging context.
+
+    Args:
+        route: Path of the request
+
+    Returns:
+        Tokens to pass to ``unbind_request`` once the request is done
+    """
+    return request_route.set(route), request_sample.set(random.random()), request_held.set([])
+
+
+def unbind_request(tokens: Tuple[Token, Token, Token]) -> None:
+    """Restore the logging context that was active before ``bind_request``"""
+    route_token, sample_token, held_token = tokens
+    request_route.reset(route_token)
+    request_sample.reset(sample_token)
+    request_held.reset(held_token)
+
+
+def flush_held_records() -> None:
+    """Write the records the current request dropped by sampling, e.g. because it failed.
+
+    Records logged by the request afterwards are sampled as before.
+    """
+    held = request_held.get()
+    if not held:
+        return
+    records = held[:]
+    held.clear()
+    for record in records:
+        # Kept by the sampling filter of every handler this time
+        record._sampled = True
+        logging.getLogger(record.name).handle(record)
+
+
+def _dumps(payload: Dict[str, Any]) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload, default=str).decode("utf-8")
+    return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats log records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+        return _dumps(payload)
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps the current request path onto records as ``route``.
+
+    Runs in the logging thread, so the path is still available when the record is formatted later
+    by a writer thread.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        route = request_route.get()
+        if route is not None:
+            record.route = route
+        return True
+
+
+class SamplingRule:
+    """Keep ``rate`` of the records of loggers and routes matching the rule."""
+
+    def __init__(
+        self,
+        rate: float,
+        logger: Optional[str] = None,
+        route: Optional[str] = None,
+        always_level: str | int = logging.WARNING,
+    ) -> None:
+        """Initialize the rule.
+
+        Args:
+            rate: Share of the matching records to keep, between 0 and 1
+            logger: Logger name; also matches its child loggers. Matches all loggers if omitted.
+            route: Request path, may contain shell-style wildcards. Matches all records if omitted.
+            always_level: Records at or above this level are always kept
+        """
+        self.rate = float(rate)
+        self.logger = logger
+        self.route = route
+        self.always_level = always_level if isinstance(always_level, int) else logging.getLevelName(always_level)
+
+    @classmethod
+    def from_config(cls, rule: Mapping[str, Any]) -> "SamplingRule":
+        """Create a rule from its configuration, e.g. ``{"route": "/echo", "rate": 0.01}``"""
+        return cls(
+            rate=rule["rate"],
+            logger=rule.get("logger"),
+            route=rule.get("route"),
+            always_level=str(rule.get("always_level", "WARNING")).upper(),
+        )
+
+    def matches(self, record: logging.LogRecord, route: Optional[str]) -> bool:
+        """Whether this rule applies to a record logged while handling ``route``"""
+        if self.logger is not None and record.name != self.logger and not record.name.startswith(self.logger + "."):
+            return False
+        if self.route is not None and (route is None or not fnmatchcase(route, self.route)):
+            return False
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Drops records according to the first matching ``SamplingRule``. Unmatched records are kept."""
+
+    def __init__(self, rules: Iterable[SamplingRule]) -> None:
+        super().__init__()
+        self.rules: List[SamplingRule] = list(rules)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # The decision is stored on the record, so every handler keeps or drops it alike
+        sampled = getattr(record, "_sampled", None)
+        if sampled is None:
+            sampled = record._sampled = self._sample(record)
+        return sampled
+
+    def _sample(self, record: logging.LogRecord) -> bool:
+        route = request_route.get()
+        for rule in self.rules:
+            if rule.matches(record, route):
+                if record.levelno >= rule.always_level:
+                    return True
+                sample = request_sample.get()
+                if (sample if sample is not None else random.random()) < rule.rate:
+                    return True
+                held = request_held.get()
+                if held is not None and len(held) < MAX_HELD_RECORDS:
+                    held.append(record)
+                return False
+        return True
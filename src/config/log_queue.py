@@ -0,0 +1,147 @@
+"""Non-blocking, queue based logging pipeline.
+
+Loggers only push records into a bounded in-memory queue. A dedicated writer thread drains the
+queue and passes the records to the actual (blocking) file and console handlers, so request
+handlers on the event loop never wait for disk or stdout.
+"""
+
+import logging
+import queue
+import time
+from enum import Enum
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+from prometheus_client import Counter, Histogram
+
+LOG_QUEUE_RECORDS = Counter("log_queue_records_total", "Log records put into the logging queue")
+LOG_QUEUE_DROPPED = Counter(
+    "log_queue_dropped_total",
+    "Log records dropped because the logging queue was full",
+    ["policy"],
+)
+LOG_QUEUE_FLUSH_SECONDS = Histogram(
+    "log_queue_flush_seconds",
+    "Time the writer thread needs to pass one record to the log handlers",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1),
+)
+
+
+# Seconds stopping the writer waits for room for its stop marker before dropping records
+SENTINEL_TIMEOUT = 5.0
+
+
+class OverflowPolicy(str, Enum):
+    """What to do with a record when the logging queue is full"""
+
+    BLOCK = "block"  # Wait until the writer thread made room
+    DROP_OLDEST = "drop_oldest"  # Discard the oldest queued record
+    DROP_DEBUG = "drop_debug"  # Discard DEBUG records, wait for room for everything else
+
+
+def _drop_oldest(records: "queue.Queue[Any]", overflow: OverflowPolicy) -> None:
+    try:
+        records.get_nowait()
+        LOG_QUEUE_DROPPED.labels(policy=overflow.value).inc()
+    except queue.Empty:
+        pass
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Queue handler with a bounded queue and a configurable overflow policy."""
+
+    def __init__(self, queue_size: int = 10000, overflow: OverflowPolicy | str = OverflowPolicy.BLOCK) -> None:
+        """Initialize the handler with its own bounded queue.
+
+        Args:
+            queue_size: Maximum number of records waiting for the writer thread
+            overflow: Policy applied when the queue is full
+        """
+        self.records: "queue.Queue[Any]" = queue.Queue(maxsize=max(int(queue_size), 1))
+        super().__init__(self.records)
+        self.overflow = OverflowPolicy(overflow)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Render the message of the record, leaving the formatting to the writer thread.
+
+        The arguments are merged into the message now, so mutable arguments are logged in their
+        current state. The queue never leaves the process, so records need not be made picklable.
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Put a record into the queue, applying the overflow policy if it is full"""
+        try:
+            self.records.put_nowait(record)
+        except queue.Full:
+            if not self._enqueue_overflow(record):
+                LOG_QUEUE_DROPPED.labels(policy=self.overflow.value).inc()
+                return
+        LOG_QUEUE_RECORDS.inc()
+
+    def _enqueue_overflow(self, record: logging.LogRecord) -> bool:
+        if self.overflow is OverflowPolicy.DROP_DEBUG and record.levelno <= logging.DEBUG:
+            return False
+
+        if self.overflow is OverflowPolicy.DROP_OLDEST:
+            while True:
+                _drop_oldest(self.records, self.overflow)
+                try:
+                    self.records.put_nowait(record)
+                    return True
+                except queue.Full:
+                    continue
+
+        self.records.put(record)
+        return True
+
+
+class LogWriter(QueueListener):
+    """Writer thread that drains a ``BoundedQueueHandler`` into the actual log handlers."""
+
+    def __init__(self, queue_handler: BoundedQueueHandler, *handlers: logging.Handler) -> None:
+        """Initialize the writer.
+
+        Args:
+            queue_handler: The handler whose queue is drained
+            handlers: The handlers that write the records
+        """
+        super().__init__(queue_handler.records, *handlers, respect_handler_level=True)
+        self.records = queue_handler.records
+        self.overflow = queue_handler.overflow
+        self._running = False
+
+    def start(self) -> None:
+        """Start the writer thread"""
+        super().start()
+        self._running = True
+
+    def stop(self) -> None:
+        """Write all queued records and stop the writer thread. Safe to call more than once."""
+        if self._running:
+            self._running = False
+            super().stop()
+
+    def enqueue_sentinel(self) -> None:
+        """Queue the stop marker behind the waiting records, making room if the writer cannot.
+
+        The base class uses ``put_nowait``, which fails on a full bounded queue.
+        """
+        sentinel = self._sentinel  # type: ignore[attr-defined]
+        try:
+            self.records.put(sentinel, timeout=SENTINEL_TIMEOUT)
+        except queue.Full:
+            while True:
+                _drop_oldest(self.records, self.overflow)
+                try:
+                    self.records.put_nowait(sentinel)
+                    return
+                except queue.Full:
+                    continue
+
+    def handle(self, record: Any) -> None:
+        start = time.perf_counter()
+        super().handle(record)
+        LOG_QUEUE_FLUSH_SECONDS.observe(time.perf_counter() - start)
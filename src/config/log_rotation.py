@@ -0,0 +1,262 @@
+"""Size and age based log rotation with compressed archives.
+
+Rotated files are named ``<log_file>.1``, ``<log_file>.2``, ... (newest first) and get a ``.gz`` or
+``.zst`` suffix when compressed. Compression runs in a background thread, so the logging thread only
+pays for renames.
+
+Several processes (e.g. uvicorn workers) can write and rotate the same file. Writers hold a shared
+``flock`` on ``<log_file>.lock`` while they check that their file is still the current one and append
+to it; rotations and the replacement of archives by their compressed version hold it exclusively. So a
+rotation is done by one process at a time, every process reopens the file once it was rotated, and no
+record is appended to an archive.
+"""
+
+import contextlib
+import gzip
+import io
+import logging
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import RotatingFileHandler
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows, where only one process may rotate
+    fcntl = None  # type: ignore[assignment]
+
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+# Errors of the rotation itself are written to stderr instead of the log that is being rotated
+_errors = logging.getLogger("log_rotation")
+_errors.propagate = False
+_errors.addHandler(logging.StreamHandler(sys.stderr))
+
+
+def open_log_segment(path: str) -> BinaryIO:
+    """Open a (possibly compressed) log file for reading binary data as a stream.
+
+    Args:
+        path: Path of the log file; the compression is derived from its suffix
+
+    Returns:
+        A binary file object that yields the decompressed content
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")  # type: ignore[return-value]
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"Reading {path} requires the 'zstandard' package")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+    return open(path, "rb")
+
+
+def _file_id(path: str) -> Optional[Tuple[int, int]]:
+    """Device and inode of a file, which stay the same when it is renamed; None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """File handler that rotates by size and age and compresses rotated files in the background."""
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = 0,
+        max_age: float = 0,
+        backup_count: int = 5,
+        compression: str = "gzip",
+        encoding: Optional[str] = "utf-8",
+    ) -> None:
+        """Initialize the handler.
+
+        Args:
+            filename: Path of the log file
+            max_bytes: Rotate once the file would exceed this size; 0 disables size based rotation
+            max_age: Rotate once the current file has been written for this many seconds; 0 disables it
+            backup_count: Number of rotated files to keep
+            compression: ``none``, ``gzip`` or ``zstd``
+            encoding: Encoding of the log file
+        """
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown log compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("zstd log compression requires the 'zstandard' package")
+
+        self._file_id: Optional[Tuple[int, int]] = None
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.max_age = float(max_age)
+        self.compression = compression
+        self.lock_path = self.baseFilename + ".lock"
+        # Opening it for appending keeps the modification time, which is the time of the last rotation
+        self._lock_file = open(self.lock_path, "a")
+        self._rotated_at = self._last_rotation()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _open(self) -> io.TextIOWrapper:
+        stream = super()._open()
+        stat = os.fstat(stream.fileno())
+        self._file_id = (stat.st_dev, stat.st_ino)
+        return stream
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            with self._shared_lock():
+                if self.stream is not None and _file_id(self.baseFilename) != self._file_id:
+                    # Rotated by another process
+                    self._reopen()
+                logging.FileHandler.emit(self, record)
+        except Exception:
+            self.handleError(record)
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.max_age > 0 and time.time() - self._rotated_at >= self.max_age:
+            # Another process may have rotated the file in the meantime
+            self._rotated_at = self._last_rotation()
+            if time.time() - self._rotated_at >= self.max_age:
+                return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        with self._exclusive_lock():
+            if _file_id(self.baseFilename) != self._file_id:
+                # Already rotated by another process
+                self._reopen()
+                return
+
+            if self.stream:
+                self.stream.close()
+                self.stream = None  # type: ignore[assignment]
+            self._shift_archives()
+            if self.backupCount > 0:
+                os.rename(self.baseFilename, f"{self.baseFilename}.1")
+            else:
+                os.remove(self.baseFilename)
+            os.utime(self.lock_path)
+            self._rotated_at = time.time()
+            self.stream = self._open()
+
+        if self.compression != "none" and self.backupCount > 0:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-compression")
+            self._executor.submit(self._compress_archives)
+
+    def _reopen(self) -> None:
+        if self.stream:
+            self.stream.close()
+        self.stream = self._open()
+        self._rotated_at = self._last_rotation()
+
+    def _last_rotation(self) -> float:
+        """Time of the last rotation, the modification time of the lock file, so it survives restarts"""
+        try:
+            return os.stat(self.lock_path).st_mtime
+        except OSError:
+            return time.time()
+
+    @contextlib.contextmanager
+    def _shared_lock(self) -> Iterator[None]:
+        """Hold the lock shared with the writers of other processes; only used under the handler lock"""
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_file, fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    @contextlib.contextmanager
+    def _exclusive_lock(self) -> Iterator[None]:
+        """Hold the lock exclusively, e.g. to rotate.
+
+        Opens the lock file anew, as ``flock`` only excludes other open file descriptions, including the
+        one of the shared lock of this handler.
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _archives(self, index: int) -> List[str]:
+        """Existing files of an archive index, compressed or not (e.g. after a failed compression)"""
+        names = [f"{self.baseFilename}.{index}{suffix}" for suffix in COMPRESSION_SUFFIXES.values()]
+        return [name for name in names if os.path.exists(name)]
+
+    def _shift_archives(self) -> None:
+        last = 0
+        while last < self.backupCount and self._archives(last + 1):
+            last += 1
+        for index in range(last, 0, -1):
+            for source in self._archives(index):
+                if index == self.backupCount:
+                    os.remove(source)
+                else:
+                    suffix = source.removeprefix(f"{self.baseFilename}.{index}")
+                    os.replace(source, f"{self.baseFilename}.{index + 1}{suffix}")
+
+    def _compress_archives(self) -> None:
+        """Compress all uncompressed archives, including those of failed or interrupted compressions"""
+        index = 1
+        # Archive indexes are contiguous
+        while index <= self.backupCount and (archives := self._archives(index)):
+            source = f"{self.baseFilename}.{index}"
+            if source in archives:
+                self._compress(source, source + COMPRESSION_SUFFIXES[self.compression])
+            index += 1
+
+    def _compress(self, source: str, dest: str) -> None:
+        # Compressed without holding the lock, which would stall rotations and writers in the meantime
+        temporary = f"{dest}.{os.getpid()}.tmp"
+        try:
+            with open(source, "rb") as src, open(temporary, "wb") as raw:
+                opened = os.fstat(src.fileno())
+                if self.compression == "zstd":
+                    with zstandard.ZstdCompressor().stream_writer(raw, closefd=False) as dst:
+                        shutil.copyfileobj(src, dst)
+                else:
+                    with gzip.GzipFile(fileobj=raw, mode="wb") as dst:
+                        shutil.copyfileobj(src, dst)
+            with self._exclusive_lock():
+                try:
+                    current = os.stat(source)
+                except FileNotFoundError:
+                    current = None
+                # The modification time tells the file apart from a new one that reuses the inode
+                if current is None or (current.st_ino, current.st_mtime_ns) != (opened.st_ino, opened.st_mtime_ns):
+                    # Shifted or compressed by another process in the meantime
+                    os.remove(temporary)
+                    return
+                os.replace(temporary, dest)
+                os.remove(source)
+        except Exception:
+            # Keep the uncompressed file, it is still readable by /logs and compressed again by the next rotation
+            _errors.exception("Failed to compress rotated log file '%s'", source)
+            with contextlib.suppress(OSError):
+                os.remove(temporary)
+
+    def close(self) -> None:
+        super().close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._lock_file.close()
@@ -0,0 +1,163 @@
+"""Reading the end of log files.
+
+Lines are read backwards from the end of the file in fixed-size blocks, so the cost depends on the
+number of requested lines and not on the size of the file. Compressed rotated files cannot be read
+backwards; they are decompressed as a stream while only the last lines are kept.
+"""
+
+import os
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from .log_rotation import COMPRESSION_SUFFIXES, open_log_segment
+
+# Position in a log file and its rotated archives: (segment index, byte offset or None for its end).
+# Segment 0 is the current log file.
+LogCursor = Tuple[int, Optional[int]]
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+
+def read_tail(
+    path: str,
+    count: int,
+    before: Optional[int] = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> Tuple[List[str], Optional[int]]:
+    """Read the last lines of a file.
+
+    This performs blocking file I/O; call it from a worker thread in async code.
+
+    Args:
+        path: Path of the file
+        count: Maximum number of lines to return
+        before: Only return lines that end before this byte offset. Pass the cursor returned by a
+            previous call to page further back. Defaults to the end of the file.
+        block_size: Number of bytes read per step
+
+    Returns:
+        The lines in file order (oldest first) without line endings, and the byte offset of the
+        first returned line to use as ``before`` for the next page. The offset is None if the
+        beginning of the file was reached.
+    """
+    if count <= 0:
+        return [], before
+
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        end = size if before is None else max(0, min(before, size))
+
+        position = end
+        chunks: List[bytes] = []
+        newlines = 0
+        # count + 1 line breaks guarantee count complete lines, even if the range ends with one
+        while position > 0 and newlines <= count:
+            length = min(block_size, position)
+            position -= length
+            f.seek(position)
+            chunk = f.read(length)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+
+    data = b"".join(reversed(chunks))
+    if not data:
+        return [], None
+    lines = data.split(b"\n")
+    trailing_newline = data.endswith(b"\n")
+    if trailing_newline:
+        lines.pop()
+    if position > 0:
+        # The first line was cut off by the block boundary
+        lines = lines[1:]
+
+    selected = lines[-count:]
+    selected_length = len(b"\n".join(selected)) + (1 if trailing_newline else 0)
+    start = position + len(data) - selected_length
+
+    return [line.decode("utf-8", errors="replace").rstrip("\r") for line in selected], start if start > 0 else None
+
+
+def read_compressed_tail(path: str, count: int, before: Optional[int] = None) -> Tuple[List[str], Optional[int]]:
+    """Read the last lines of a compressed file without decompressing it into memory.
+
+    Offsets refer to the decompressed content. Memory use is proportional to ``count``.
+
+    Args:
+        path: Path of the compressed file
+        count: Maximum number of lines to return
+        before: Only return lines that end before this (decompressed) byte offset
+
+    Returns:
+        The lines in file order and the offset of the first returned line, None if it is the first
+        line of the file
+    """
+    if count <= 0:
+        return [], before
+
+    lines: Deque[Tuple[int, bytes]] = deque(maxlen=count)
+    offset = 0
+    with open_log_segment(path) as f:
+        for line in f:
+            end = offset + len(line)
+            if before is not None and end > before:
+                break
+            lines.append((offset, line))
+            offset = end
+
+    if not lines:
+        return [], None
+    start = lines[0][0]
+    return [line.rstrip(b"\r\n").decode("utf-8", errors="replace") for _, line in lines], start if start > 0 else None
+
+
+def log_segments(path: str) -> List[str]:
+    """List a log file and its rotated archives, newest first.
+
+    Args:
+        path: Path of the current log file
+
+    Returns:
+        Paths of the existing segments; index 0 is the current log file
+    """
+    segments = [path]
+    index = 1
+    while True:
+        # An uncompressed archive exists while its compression is still running
+        candidates = [f"{path}.{index}{suffix}" for suffix in COMPRESSION_SUFFIXES.values()]
+        existing = next((candidate for candidate in candidates if os.path.exists(candidate)), None)
+        if existing is None:
+            return segments
+        segments.append(existing)
+        index += 1
+
+
+def read_log_tail(path: str, count: int, cursor: Optional[LogCursor] = None) -> Tuple[List[str], Optional[LogCursor]]:
+    """Read the last lines of a log file, continuing into its rotated archives if needed.
+
+    Args:
+        path: Path of the current log file
+        count: Maximum number of lines to return
+        cursor: Cursor returned by a previous call to page further back; defaults to the end of the log
+
+    Returns:
+        The lines in log order (oldest first) and the cursor for the next page, None once the
+        beginning of the oldest archive was reached
+    """
+    segment, before = cursor if cursor is not None else (0, None)
+    segments = log_segments(path)
+    lines: List[str] = []
+
+    while segment < len(segments) and len(lines) < count:
+        segment_path = segments[segment]
+        if segment_path.endswith(tuple(suffix for suffix in COMPRESSION_SUFFIXES.values() if suffix)):
+            segment_lines, start = read_compressed_tail(segment_path, count - len(lines), before)
+        else:
+            segment_lines, start = read_tail(segment_path, count - len(lines), before)
+        lines = segment_lines + lines
+
+        if start is not None:
+            return lines, (segment, start)
+        segment, before = segment + 1, None
+
+    return lines, (segment - 1, 0) if segment < len(segments) else None
@@ -0,0 +1,197 @@
+"""Prometheus metrics across worker processes.
+
+With several uvicorn workers, every worker keeps its own metric values. In multiprocess mode the
+workers write their values to memory-mapped files in a shared directory, and ``/metrics``
+aggregates the files of all workers, so every scrape sees the whole service.
+
+The directory and the gauge aggregation mode are passed to the workers through the
+``PROMETHEUS_MULTIPROC_DIR`` and ``PROMETHEUS_GAUGE_MODE`` environment variables, which have to be
+set before the workers start (see ``prepare_multiprocess``).
+
+The counters, histograms and summaries of workers that exited are merged into one archive file
+per type (e.g. ``counter_archive.db``), so their totals are kept without one file per worker
+that ever ran accumulating in the directory.
+"""
+
+import glob
+import logging
+import os
+import re
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Literal, Optional, Sequence, Tuple, cast, get_args
+
+from prometheus_client import CollectorRegistry, Gauge, make_asgi_app, multiprocess
+from prometheus_client.metrics_core import Metric
+from prometheus_client.mmap_dict import MmapedDict
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+GAUGE_MODE_ENV = "PROMETHEUS_GAUGE_MODE"
+
+# Aggregations supported for gauges in multiprocess mode; "live*" modes only include running workers
+GaugeMode = Literal[
+    "all", "liveall", "min", "livemin", "max", "livemax", "sum", "livesum", "mostrecent", "livemostrecent"
+]
+GAUGE_MODES: Tuple[GaugeMode, ...] = get_args(GaugeMode)
+
+# Metric types whose values of dead workers are summed into an archive file
+ARCHIVED_TYPES = ("counter", "histogram", "summary")
+
+# Held exclusively while archiving and shared while collecting, so a scrape never sees a worker's
+# values both in its own file and in the archive, or a file that disappears while it is read
+ARCHIVE_LOCK = "archive.lock"
+
+_PID_PATTERN = re.compile(r"_(\d+)\.db$")
+
+
+def multiprocess_dir() -> Optional[str]:
+    """The shared metrics directory, None if multiprocess mode is off"""
+    return os.environ.get(MULTIPROC_DIR_ENV) or None
+
+
+def prepare_multiprocess(directory: str, gauge_mode: str = "livesum") -> None:
+    """Enable multiprocess mode for worker processes started afterwards.
+
+    Creates the directory, removes the files of a previous run and exports the environment
+    variables the workers inherit. Call this in the parent process before the workers are started.
+
+    Args:
+        directory: Directory for the metric files
+        gauge_mode: Aggregation of gauges across workers, one of ``GAUGE_MODES``
+    """
+    if gauge_mode not in GAUGE_MODES:
+        raise ValueError(f"Unknown gauge aggregation: {gauge_mode}")
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        os.remove(path)
+    os.environ[MULTIPROC_DIR_ENV] = directory
+    os.environ[GAUGE_MODE_ENV] = gauge_mode
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    """Create a gauge that is aggregated across workers according to the configured mode.
+
+    Args:
+        name: Metric name
+        documentation: Metric description
+        labelnames: Label names of the metric
+
+    Returns:
+        Gauge: The new gauge
+    """
+    mode = cast(GaugeMode, os.environ.get(GAUGE_MODE_ENV, "livesum"))
+    return Gauge(name, documentation, labelnames, multiprocess_mode=mode)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextmanager
+def _archive_lock(directory: str, exclusive: bool) -> Iterator[None]:
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, ARCHIVE_LOCK), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _archive(directory: str, kind: str, paths: Iterable[str]) -> None:
+    """Add the values of metric files to the archive of their type and remove them"""
+    archive = os.path.join(directory, f"{kind}_archive.db")
+    values: Dict[str, Tuple[float, float]] = {}
+    sources = [archive] if os.path.exists(archive) else []
+    sources.extend(paths)
+    for source in sources:
+        for key, value, timestamp, _ in MmapedDict.read_all_values_from_file(source):
+            total, latest = values.get(key, (0.0, 0.0))
+            values[key] = (total + value, max(latest, timestamp))
+
+    # Replaced at once, so a crash cannot leave a partly written archive
+    temporary = archive + ".tmp"
+    merged = MmapedDict(temporary)
+    try:
+        for key, (value, timestamp) in values.items():
+            merged.write_value(key, value, timestamp)
+    finally:
+        merged.close()
+    os.replace(temporary, archive)
+    for path in paths:
+        os.remove(path)
+
+
+def cleanup_dead_workers(directory: str) -> None:
+    """Clean up the metric files of workers that are no longer running.
+
+    Live gauge values of dead workers are removed. Their counters, histograms and summaries are
+    added to the archive file of their type, so the totals do not drop.
+
+    Args:
+        directory: The shared metrics directory
+    """
+    pids = set()
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        match = _PID_PATTERN.search(path)
+        if match:
+            pids.add(int(match.group(1)))
+    dead = [pid for pid in pids if pid != os.getpid() and not _pid_alive(pid)]
+    if not dead:
+        return
+
+    with _archive_lock(directory, exclusive=True):
+        for kind in ARCHIVED_TYPES:
+            # Checked again under the lock, another worker may have archived them in the meantime
+            paths = [path for pid in dead if os.path.exists(path := os.path.join(directory, f"{kind}_{pid}.db"))]
+            if paths:
+                _archive(directory, kind, paths)
+        for pid in dead:
+            multiprocess.mark_process_dead(pid, directory)
+
+
+class _ArchiveAwareCollector(multiprocess.MultiProcessCollector):
+    """Collector that does not read the metric files while dead workers are archived"""
+
+    def collect(self) -> Iterable[Metric]:
+        with _archive_lock(self._path, exclusive=False):
+            return super().collect()  # type: ignore[no-any-return]
+
+
+class MultiprocessMetricsApp:
+    """ASGI app serving metrics aggregated across all workers."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        registry = CollectorRegistry()
+        _ArchiveAwareCollector(registry, path=directory)
+        self.app = make_asgi_app(registry)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            try:
+                cleanup_dead_workers(self.directory)
+            except OSError:
+                logging.getLogger("api.actuators").exception("Failed to clean up metrics of dead workers")
+        await self.app(scope, receive, send)
+
+
+def metrics_app() -> ASGIApp:
+    """ASGI app for ``/metrics``, aggregating across workers if multiprocess mode is on"""
+    directory = multiprocess_dir()
+    if directory is not None:
+        return MultiprocessMetricsApp(directory)
+    return make_asgi_app()
@@ -9,9 +9,84 @@ class ConfigParameter(Enum):
     APP_ENVIRONMENT = "app_environment"
     APP_URL_PREFIX = "app_url_prefix"
     APP_MCP = "app_mcp"  # Flag to enable/disable MCP functionality
+    APP_RESPONSE_ENCODER = "app_response_encoder"  # JSON encoder of responses: json, orjson or msgspec
+    SERVER_WORKERS = "server_workers"  # Production worker processes, 0 for one per available CPU core
+    SERVER_LOOP = "server_loop"  # auto, uvloop or asyncio
+    SERVER_HTTP = "server_http"  # auto, httptools or h11
+    SERVER_BACKLOG = "server_backlog"  # Maximum number of pending connections
+    SERVER_KEEPALIVE_TIMEOUT = "server_keepalive_timeout"  # Seconds to keep idle connections open
+    SERVER_LIMIT_CONCURRENCY = "server_limit_concurrency"  # Max concurrent connections per worker, 0 for no limit
+    SERVER_LIMIT_MAX_REQUESTS = "server_limit_max_requests"  # Recycle a worker after this many requests, 0 to disable
+    SERVER_MAX_REQUESTS_JITTER = "server_max_requests_jitter"  # Random extra requests before recycling a worker
+    METRICS_MULTIPROCESS = "metrics_multiprocess"  # Aggregate /metrics across production workers
+    METRICS_MULTIPROCESS_DIR = "metrics_multiprocess_dir"  # Shared directory for the workers' metric files
+    METRICS_GAUGE_AGGREGATION = "metrics_gauge_aggregation"  # How gauges are combined, e.g. sum, max or livesum
+    METRICS_LATENCY_BUCKETS = "metrics_latency_buckets"  # Histogram buckets for request durations in seconds
+    METRICS_SIZE_BUCKETS = "metrics_size_buckets"  # Histogram buckets for request and response sizes in bytes
+    ECHO_PASSTHROUGH = "echo_passthrough"  # Echo the raw request body without parsing it (restart required)
+    ECHO_BATCH_MAX_ITEMS = "echo_batch_max_items"  # Maximum number of items per /echo/batch request
+    ECHO_BATCH_MAX_BYTES = "echo_batch_max_bytes"  # Maximum body size of /echo/batch requests
+    ECHO_BATCH_CONCURRENCY = "echo_batch_concurrency"  # Batch chunks processed in parallel
+    ECHO_STREAM_MAX_LINE_BYTES = "echo_stream_max_line_bytes"  # Maximum size of one line of /echo/stream
+    RESPONSE_CACHE_ENABLED = "response_cache_enabled"  # Cache the responses of endpoints marked with @cached
+    RESPONSE_CACHE_MAX_ENTRIES = "response_cache_max_entries"  # Cached responses kept per worker
+    RESPONSE_CACHE_TTL = "response_cache_ttl"  # Default seconds a cached response is served
+    COMPRESSION_ENABLED = "compression_enabled"  # Compress responses for clients that accept it
+    COMPRESSION_ENCODINGS = "compression_encodings"  # Offered response encodings, most preferred first
+    COMPRESSION_MINIMUM_SIZE = "compression_minimum_size"  # Smaller responses are sent uncompressed
+    COMPRESSION_MAX_REQUEST_BYTES = "compression_max_request_bytes"  # Maximum decompressed size of request bodies
+    IDEMPOTENCY_ENABLED = "idempotency_enabled"  # Replay responses of @idempotent endpoints for repeated keys
+    IDEMPOTENCY_TTL = "idempotency_ttl"  # Default seconds a response is replayed for its Idempotency-Key
+    IDEMPOTENCY_MAX_ENTRIES = "idempotency_max_entries"  # Responses kept by the idempotency store
+    IDEMPOTENCY_MAX_BODY_BYTES = "idempotency_max_body_bytes"  # Larger responses are not stored for replay
+    IDEMPOTENCY_WAIT_TIMEOUT = "idempotency_wait_timeout"  # Seconds a duplicate waits for the first request
+    IDEMPOTENCY_STORE = "idempotency_store"  # memory (per worker) or sqlite (shared by workers, restart required)
+    IDEMPOTENCY_SQLITE_PATH = "idempotency_sqlite_path"  # Database file of the sqlite store (restart required)
+    CLIENT_TIMEOUT = "client_timeout"  # Seconds outbound requests wait for a response
+    CLIENT_CONNECT_TIMEOUT = "client_connect_timeout"  # Seconds outbound requests wait for a connection
+    CLIENT_MAX_CONNECTIONS = "client_max_connections"  # Connection pool size of the HTTP clients (restart required)
+    CLIENT_MAX_KEEPALIVE_CONNECTIONS = "client_max_keepalive_connections"  # Idle connections kept (restart required)
+    CLIENT_KEEPALIVE_EXPIRY = "client_keepalive_expiry"  # Seconds an idle connection is kept (restart required)
+    CLIENT_HTTP2 = "client_http2"  # Use HTTP/2 for outbound requests, needs the http2 extra (restart required)
+    CLIENT_MAX_PER_HOST = "client_max_per_host"  # Concurrent outbound requests per host, 0 for no limit
+    CLIENT_RETRIES = "client_retries"  # Retries of failed idempotent outbound requests
+    CLIENT_RETRY_BACKOFF = "client_retry_backoff"  # Base delay of the first retry in seconds
+    CLIENT_RETRY_MAX_BACKOFF = "client_retry_max_backoff"  # Maximum delay between retries in seconds
+    CLIENT_BREAKER_FAILURES = "client_breaker_failures"  # Consecutive failures that open a client's circuit
+    CLIENT_BREAKER_RESET = "client_breaker_reset"  # Seconds an open circuit rejects calls
+    DATABASE_URL = "database_url"  # Database of the repositories, e.g. sqlite:///data/app.db; empty for none
+    DATABASE_POOL_SIZE = "database_pool_size"  # Maximum open database connections per worker (restart required)
+    DATABASE_POOL_TIMEOUT = "database_pool_timeout"  # Seconds to wait for a free database connection
+    DATABASE_STATEMENT_CACHE_SIZE = "database_statement_cache_size"  # Prepared statements kept per connection
+    READ_CACHE_ENABLED = "read_cache_enabled"  # Serve @read_through methods from their caches
+    READ_CACHE_MAX_ENTRIES = "read_cache_max_entries"  # Default number of values kept per cache
+    READ_CACHE_TTL = "read_cache_ttl"  # Default seconds a cached value is served
+    READ_CACHE_NEGATIVE_TTL = "read_cache_negative_ttl"  # Default seconds a None result is served, 0 for never
+    READ_CACHE_STALE_TTL = "read_cache_stale_ttl"  # Default seconds an expired value is served while reloading
+    MICRO_BATCH_WINDOW = "micro_batch_window"  # Default seconds calls are collected into a micro-batch
+    MICRO_BATCH_MAX_SIZE = "micro_batch_max_size"  # Default number of calls that dispatch a micro-batch right away
+    TRACING_SERVER_TIMING = "tracing_server_timing"  # Per-layer timings in a Server-Timing header, reveals internals
+    TRACING_OTLP_ENDPOINT = "tracing_otlp_endpoint"  # OTLP/HTTP traces endpoint, empty to disable export
+    PROFILER_ENABLED = "profiler_enabled"  # Allow on-demand CPU profiles via POST /profile
+    PROFILER_MAX_SECONDS = "profiler_max_seconds"  # Longest profile that can be requested
     LOG_LEVEL = "log_level"
     LOG_FILE = "log_file"
+    LOG_FILE_ENABLED = "log_file_enabled"  # Set to false to disable writing the log file
+    LOG_ROTATION_MAX_BYTES = "log_rotation_max_bytes"  # Rotate the log file at this size, 0 to disable
+    LOG_ROTATION_MAX_AGE = "log_rotation_max_age"  # Rotate the log file after this many seconds, 0 to disable
+    LOG_ROTATION_BACKUP_COUNT = "log_rotation_backup_count"  # Number of rotated log files to keep
+    LOG_ROTATION_COMPRESSION = "log_rotation_compression"  # none, gzip or zstd
+    LOG_BUFFER_SIZE = "log_buffer_size"  # Number of recent records kept in memory for /logs, 0 to disable
     LOG_LOGGER_NAMES = "log_logger_names"
     LOG_LOGGER_LEVEL = "log_logger_level"
+    LOG_FORMAT = "log_format"  # text or json
+    LOG_SAMPLING = "log_sampling"  # List of sampling rules, see src/config/log_format.py
+    LOG_STREAM_POLL_INTERVAL = "log_stream_poll_interval"  # Seconds between checks for new lines on /logs/stream
+    LOG_STREAM_MAX_PENDING = "log_stream_max_pending"  # Undelivered lines before a stream client is dropped
+    LOG_QUEUE_ENABLED = "log_queue_enabled"  # Write logs from a background thread via a bounded queue
+    LOG_QUEUE_SIZE = "log_queue_size"  # Maximum number of records waiting in the queue
+    LOG_QUEUE_OVERFLOW = "log_queue_overflow"  # block, drop_oldest or drop_debug
+    CONFIG_WATCH = "config_watch"  # Reload the config file in place when it changes
+    CONFIG_WATCH_INTERVAL = "config_watch_interval"  # Seconds between change checks
 
     # extend parameters here (don't forget to add them to config.json)
@@ -0,0 +1,200 @@
+"""Statistical CPU profiler for a running worker.
+
+A background thread takes snapshots of the Python stacks of all threads of the process at a fixed
+rate via ``sys._current_frames()``. Coroutines run on the event loop thread's stack, so the event
+loop is covered as well. Nothing is instrumented, so the overhead is the cost of the snapshots
+themselves, which is reported with every profile.
+
+Profiles are rendered as collapsed stacks (for flamegraph.pl, speedscope, ...) or as speedscope
+JSON. Only one profile can run per worker at a time.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from types import CodeType, FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+# Functions threads block in while waiting (by file and name); samples ending in them are idle, not CPU time
+_IDLE_FUNCTIONS = frozenset(
+    {
+        ("selectors.py", "select"),
+        ("threading.py", "wait"),
+        ("threading.py", "_wait_for_tstate_lock"),
+    }
+)
+
+_profile_lock = threading.Lock()
+
+
+def _short_path(filename: str) -> str:
+    """Path of a source file relative to the longest matching ``sys.path`` entry"""
+    best = ""
+    for entry in sys.path:
+        if entry and filename.startswith(entry.rstrip(os.sep) + os.sep) and len(entry) > len(best):
+            best = entry.rstrip(os.sep) + os.sep
+    return filename.removeprefix(best)
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is still running"""
+
+
+@dataclass
+class Profile:
+    """Result of a profiling run.
+
+    Attributes:
+        frames: Distinct frames as (function, file, line)
+        stacks: Number of samples per (thread name, frame indexes root first)
+        duration: Seconds the profiler ran
+        interval: Seconds between two samples
+        samples: Number of snapshots taken
+        overhead: Seconds spent taking snapshots
+    """
+
+    frames: List[Tuple[str, str, int]] = field(default_factory=list)
+    stacks: Counter = field(default_factory=Counter)
+    duration: float = 0.0
+    interval: float = 0.0
+    samples: int = 0
+    overhead: float = 0.0
+
+    @property
+    def overhead_ratio(self) -> float:
+        """Share of the wall time spent taking snapshots"""
+        return self.overhead / self.duration if self.duration else 0.0
+
+    def collapsed(self) -> str:
+        """Render the profile as collapsed stacks, one ``thread;outer;...;inner count`` line per stack"""
+        names = [f"{name} ({filename}:{line})" for name, filename, line in self.frames]
+        lines = [
+            ";".join([thread] + [names[index] for index in stack]) + f" {count}"
+            for (thread, stack), count in self.stacks.most_common()
+        ]
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> Dict[str, Any]:
+        """Render the profile in the speedscope file format, one sampled profile per thread"""
+        per_thread: Dict[str, Tuple[List[List[int]], List[float]]] = {}
+        for (thread, stack), count in self.stacks.items():
+            samples, weights = per_thread.setdefault(thread, ([], []))
+            samples.append(list(stack))
+            weights.append(count * self.interval)
+
+        profiles = [
+            {
+                "type": "sampled",
+                "name": thread,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+            for thread, (samples, weights) in sorted(per_thread.items())
+        ]
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"pid {os.getpid()}",
+            "exporter": "avs-ai-blueprint-nanoservice",
+            "shared": {"frames": [{"name": n, "file": f, "line": line} for n, f, line in self.frames]},
+            "profiles": profiles,
+        }
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads of the process at a fixed rate."""
+
+    def __init__(self, hz: int = 100, include_idle: bool = False) -> None:
+        """Initialize the profiler.
+
+        Args:
+            hz: Samples per second
+            include_idle: Keep samples of threads waiting for I/O or work
+        """
+        self.interval = 1.0 / hz
+        self.include_idle = include_idle
+        self._frame_indexes: Dict[CodeType, int] = {}
+        self._idle_codes: Dict[CodeType, bool] = {}
+
+    def run(self, seconds: float) -> Profile:
+        """Profile the process for the given time, blocking the calling thread.
+
+        Args:
+            seconds: How long to sample
+
+        Returns:
+            Profile: The collected samples
+
+        Raises:
+            ProfilerBusyError: If another profile is running in this process
+        """
+        if not _profile_lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running in this worker")
+        try:
+            return self._sample(seconds)
+        finally:
+            _profile_lock.release()
+
+    def _sample(self, seconds: float) -> Profile:
+        profile = Profile(interval=self.interval)
+        self._frame_indexes = {}
+        own_thread = threading.get_ident()
+        start = time.perf_counter()
+        deadline = start + seconds
+        next_sample = start
+        thread_names: Dict[Optional[int], str] = {}
+
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            for ident, frame in sys._current_frames().items():
+                if ident == own_thread:
+                    continue
+                stack = self._stack(frame, profile)
+                if stack is not None:
+                    if ident not in thread_names:
+                        thread_names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                    profile.stacks[(thread_names.get(ident, f"thread-{ident}"), stack)] += 1
+            profile.samples += 1
+            profile.overhead += time.perf_counter() - now
+
+            # Sleep until the next sample is due; if sampling fell behind, skip ahead instead of bursting
+            next_sample += self.interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                time.sleep(max(0.0, min(delay, deadline - time.perf_counter())))
+            else:
+                next_sample = time.perf_counter()
+
+        profile.duration = time.perf_counter() - start
+        return profile
+
+    def _stack(self, frame: Optional[FrameType], profile: Profile) -> Optional[Tuple[int, ...]]:
+        """Frame indexes of a thread's stack, root first; None for an idle thread"""
+        if frame is not None and not self.include_idle and self._is_idle(frame.f_code):
+            return None
+        indexes = []
+        while frame is not None:
+            code = frame.f_code
+            index = self._frame_indexes.get(code)
+            if index is None:
+                index = len(profile.frames)
+                profile.frames.append((code.co_qualname, _short_path(code.co_filename), code.co_firstlineno))
+                self._frame_indexes[code] = index
+            indexes.append(index)
+            frame = frame.f_back
+        indexes.reverse()
+        return tuple(indexes)
+
+    def _is_idle(self, code: CodeType) -> bool:
+        idle = self._idle_codes.get(code)
+        if idle is None:
+            idle = (os.path.basename(code.co_filename), code.co_name) in _IDLE_FUNCTIONS
+            self._idle_codes[code] = idle
+        return idle
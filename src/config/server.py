@@ -0,0 +1,105 @@
+"""Production server settings.
+
+Resolves the uvicorn worker model and tunables from the configuration. The defaults suit an async
+application: one worker per available CPU core, since every worker runs its own event loop.
+"""
+
+import importlib.util
+import inspect
+import logging
+import os
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+from .params import ConfigParameter
+from .snapshot import ConfigSnapshot
+
+LOOP_CHOICES = ("auto", "uvloop", "asyncio")
+HTTP_CHOICES = ("auto", "httptools", "h11")
+
+
+def available_cpus() -> int:
+    """Number of CPU cores this process may use, honoring CPU affinity and cgroup v2 quotas"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - not available on all platforms
+        cpus = os.cpu_count() or 1
+
+    try:
+        with open("/sys/fs/cgroup/cpu.max", "r", encoding="utf-8") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+@dataclass(frozen=True)
+class ServerSettings:
+    """Effective uvicorn settings of the production server.
+
+    Attributes:
+        workers: Number of worker processes
+        loop: Event loop implementation
+        http: HTTP protocol implementation
+        backlog: Maximum number of pending connections of the listening socket
+        timeout_keep_alive: Seconds an idle keep-alive connection is kept open
+        limit_concurrency: Maximum concurrent connections or tasks per worker before returning 503
+        limit_max_requests: Requests after which a worker is recycled
+        limit_max_requests_jitter: Random extra requests per worker, so workers are not recycled together
+    """
+
+    workers: int
+    loop: str = "auto"
+    http: str = "auto"
+    backlog: int = 2048
+    timeout_keep_alive: int = 5
+    limit_concurrency: Optional[int] = None
+    limit_max_requests: Optional[int] = None
+    limit_max_requests_jitter: int = 0
+
+    @classmethod
+    def from_snapshot(cls, snapshot: ConfigSnapshot) -> "ServerSettings":
+        """Resolve the server settings from the configuration.
+
+        Args:
+            snapshot: The configuration snapshot
+
+        Returns:
+            ServerSettings: The effective settings
+        """
+        logger = logging.getLogger("api")
+
+        loop = snapshot.get(ConfigParameter.SERVER_LOOP, "auto")
+        if loop == "uvloop" and importlib.util.find_spec("uvloop") is None:
+            logger.warning("uvloop is not installed, falling back to the default event loop")
+            loop = "auto"
+
+        http = snapshot.get(ConfigParameter.SERVER_HTTP, "auto")
+        if http == "httptools" and importlib.util.find_spec("httptools") is None:
+            logger.warning("httptools is not installed, falling back to the default HTTP parser")
+            http = "auto"
+
+        return cls(
+            workers=int(snapshot.get(ConfigParameter.SERVER_WORKERS, 0)) or available_cpus(),
+            loop=loop,
+            http=http,
+            backlog=int(snapshot.get(ConfigParameter.SERVER_BACKLOG, 2048)),
+            timeout_keep_alive=int(snapshot.get(ConfigParameter.SERVER_KEEPALIVE_TIMEOUT, 5)),
+            limit_concurrency=int(snapshot.get(ConfigParameter.SERVER_LIMIT_CONCURRENCY, 0)) or None,
+            limit_max_requests=int(snapshot.get(ConfigParameter.SERVER_LIMIT_MAX_REQUESTS, 0)) or None,
+            limit_max_requests_jitter=int(snapshot.get(ConfigParameter.SERVER_MAX_REQUESTS_JITTER, 0)),
+        )
+
+    def uvicorn_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for ``uvicorn.run``, leaving out options the installed uvicorn lacks"""
+        import uvicorn
+
+        kwargs = asdict(self)
+        supported = inspect.signature(uvicorn.Config.__init__).parameters
+        if "limit_max_requests_jitter" not in supported:
+            if self.limit_max_requests_jitter:
+                logging.getLogger("api").warning("The installed uvicorn does not support max-requests jitter")
+            kwargs.pop("limit_max_requests_jitter")
+        return kwargs
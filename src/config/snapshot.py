@@ -0,0 +1,90 @@
+"""Immutable configuration snapshot.
+
+The snapshot holds the resolved value of every ``ConfigParameter`` and is built once per
+(re)load. Reads are plain dictionary lookups without logging or Dynaconf involvement. Nested
+values are frozen as well: lists become tuples and objects become ``FrozenDict``.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+from .params import ConfigParameter
+
+_MISSING = object()
+
+
+class FrozenDict(dict):
+    """A dict that cannot be changed, for objects in the configuration.
+
+    A dict subclass rather than a ``MappingProxyType``, so the values still serialize as JSON objects.
+    """
+
+    def _read_only(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError("Configuration values are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only  # type: ignore[assignment]
+    clear = pop = popitem = setdefault = update = _read_only  # type: ignore[assignment]
+
+
+def _freeze(value: Any) -> Any:
+    """Copy a configuration value with all nested lists and objects made immutable"""
+    if isinstance(value, Mapping):
+        return FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Frozen view of all configuration parameters at a given point in time.
+
+    Attributes:
+        values: Read-only mapping of parameter keys (e.g. ``"app_name"``) to their frozen values.
+            Parameters that are not configured are absent from the mapping.
+        generation: Monotonic counter, incremented on every successful (re)load.
+        loaded_at: UTC timestamp of the load that produced this snapshot.
+    """
+
+    values: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    generation: int = 0
+    loaded_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    @classmethod
+    def from_settings(cls, settings: Any, generation: int) -> "ConfigSnapshot":
+        """Resolve all known parameters from a Dynaconf settings object.
+
+        Args:
+            settings: The Dynaconf settings instance to read from
+            generation: The generation number of the new snapshot
+
+        Returns:
+            ConfigSnapshot: A new snapshot containing every configured parameter
+        """
+        values = {}
+        for param in ConfigParameter:
+            value = settings.get(param.value, _MISSING)
+            if value is not _MISSING:
+                values[param.value] = _freeze(value)
+        return cls(values=MappingProxyType(values), generation=generation)
+
+    def get(self, key: str | ConfigParameter, default: Optional[Any] = None) -> Any:
+        """Get a configuration value from the snapshot.
+
+        Args:
+            key: The parameter or its key
+            default: Value returned if the parameter is not configured
+
+        Returns:
+            The configured value or the default
+        """
+        if isinstance(key, ConfigParameter):
+            key = key.value
+        return self.values.get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        if isinstance(key, ConfigParameter):
+            key = key.value
+        return key in self.values
@@ -0,0 +1,237 @@
+"""Lightweight timing spans per request.
+
+A trace is started for every HTTP request by the timing middleware. Code in any layer can time a
+block with ``span``, as a context manager or as a decorator::
+
+    with span("to_domain"):
+        ...
+
+    @span("echo_service")
+    def process_input(...):
+        ...
+
+Outside of a request, or when tracing is disabled, ``span`` does nothing. The recorded spans are
+returned in the ``Server-Timing`` response header and can be exported to an OpenTelemetry
+collector via OTLP/HTTP (requires the ``otlp`` extra).
+"""
+
+import atexit
+import functools
+import inspect
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from opentelemetry import trace as otel_trace  # type: ignore[import]
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter  # type: ignore[import]
+    from opentelemetry.sdk.resources import Resource  # type: ignore[import]
+    from opentelemetry.sdk.trace import TracerProvider  # type: ignore[import]
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional dependency
+    otel_trace = None  # type: ignore[assignment]
+
+# Spans recorded per request beyond this limit are dropped, which bounds the header size
+MAX_SPANS = 64
+
+_INVALID_NAME_CHARS = re.compile(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]")
+
+
+@dataclass
+class Span:
+    """A timed block of a request, times are ``time.perf_counter()`` values in seconds"""
+
+    name: str
+    start: float
+    end: Optional[float] = None
+    parent: Optional[int] = None
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds, 0 while the span is still open"""
+        return 0.0 if self.end is None else self.end - self.start
+
+
+class Trace:
+    """The spans recorded while handling one request."""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.start_ns = time.time_ns()
+        self.spans: List[Span] = []
+        # Sync code of a request may record spans from several thread pool threads at once
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, end: Optional[float] = None, parent: Optional[int] = None) -> Optional[int]:
+        """Record a span.
+
+        Args:
+            name: Name of the span
+            start: Start time, a ``time.perf_counter()`` value
+            end: End time, None if the span is still open
+            parent: Index of the enclosing span
+
+        Returns:
+            Index of the new span, None if the trace is full
+        """
+        with self._lock:
+            if len(self.spans) >= MAX_SPANS:
+                return None
+            self.spans.append(Span(name, start, end, parent))
+            return len(self.spans) - 1
+
+    def wall_time_ns(self, timestamp: float) -> int:
+        """Convert a ``time.perf_counter()`` value of this trace to nanoseconds since the epoch"""
+        return self.start_ns + int((timestamp - self.start) * 1e9)
+
+    def server_timing(self) -> str:
+        """Render the finished spans and the total time so far as a ``Server-Timing`` header value"""
+        entries = [
+            f"{_INVALID_NAME_CHARS.sub('_', s.name)};dur={s.duration * 1000:.3f}"
+            for s in sorted(self.spans, key=lambda s: s.start)
+            if s.end is not None
+        ]
+        entries.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.3f}")
+        return ", ".join(entries)
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+# Index of the innermost open span; per task, so concurrent tasks of a request nest correctly
+_current_span: ContextVar[Optional[int]] = ContextVar("current_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """The trace of the request being handled, None outside of a traced request"""
+    return _trace.get()
+
+
+def current_span() -> Optional[int]:
+    """Index of the innermost open span in the current trace"""
+    return _current_span.get()
+
+
+def start_trace() -> Tuple[Trace, Token]:
+    """Start a trace for the current request.
+
+    Returns:
+        The new trace and a token to pass to ``end_trace``
+    """
+    trace = Trace()
+    return trace, _trace.set(trace)
+
+
+def end_trace(token: Token) -> None:
+    """Restore the context that was active before ``start_trace``"""
+    _trace.reset(token)
+
+
+class span:
+    """Time a block of code as a span of the current request's trace.
+
+    Usable as a context manager and as a decorator of sync and async functions.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._index: Optional[int] = None
+        self._token: Optional[Token] = None
+
+    def __enter__(self) -> "span":
+        trace = _trace.get()
+        if trace is not None:
+            self._index = trace.add(self.name, time.perf_counter(), parent=_current_span.get())
+            if self._index is not None:
+                self._token = _current_span.set(self._index)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._index is None:
+            return
+        trace = _trace.get()
+        if trace is not None:
+            trace.spans[self._index].end = time.perf_counter()
+        if self._token is not None:
+            _current_span.reset(self._token)
+        self._index = self._token = None
+
+    def __call__(self, func: Callable) -> Callable:
+        # Every call gets its own span instance, so decorated functions may run concurrently
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(self.name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(self.name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+class OTLPTraceExporter:
+    """Exports finished request traces to an OpenTelemetry collector via OTLP/HTTP.
+
+    Spans are sent in batches from a background thread, so exporting does not delay responses.
+    """
+
+    def __init__(self, endpoint: str, service_name: str) -> None:
+        """Initialize the exporter.
+
+        Args:
+            endpoint: OTLP/HTTP traces endpoint, e.g. ``http://localhost:4318/v1/traces``
+            service_name: Service name reported to the collector
+        """
+        if otel_trace is None:
+            raise RuntimeError("OTLP export requires the opentelemetry-sdk and opentelemetry-exporter-otlp packages")
+        self._provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        self._provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+        self._tracer = self._provider.get_tracer(__name__)
+        atexit.register(self.shutdown)
+
+    def export(self, trace: Trace, name: str, attributes: Dict[str, Any], end: float) -> None:
+        """Queue a finished trace for export.
+
+        Args:
+            trace: The finished trace
+            name: Name of the request span, e.g. ``GET /items/{item_id}``
+            attributes: Attributes of the request span
+            end: End of the request, a ``time.perf_counter()`` value
+        """
+        root = self._tracer.start_span(
+            name, kind=otel_trace.SpanKind.SERVER, attributes=attributes, start_time=trace.start_ns
+        )
+        exported: List[Any] = []
+        for s in trace.spans:
+            parent = root if s.parent is None else exported[s.parent]
+            child = self._tracer.start_span(
+                s.name,
+                context=otel_trace.set_span_in_context(parent),
+                start_time=trace.wall_time_ns(s.start),
+            )
+            exported.append(child)
+        for s, child in zip(trace.spans, exported):
+            child.end(end_time=trace.wall_time_ns(end if s.end is None else s.end))
+        root.end(end_time=trace.wall_time_ns(end))
+
+    def shutdown(self) -> None:
+        """Flush pending spans and stop the background thread"""
+        self._provider.shutdown()
+
+
+def create_exporter(endpoint: str, service_name: str) -> Optional[OTLPTraceExporter]:
+    """Create an OTLP exporter, or None if the OpenTelemetry packages are not installed"""
+    if otel_trace is None:
+        logging.getLogger("api").warning(
+            "OTLP trace export is configured, but the OpenTelemetry packages are not installed"
+        )
+        return None
+    return OTLPTraceExporter(endpoint, service_name)
@@ -0,0 +1,114 @@
+"""Configuration file watcher.
+
+Watches the configuration file and triggers a validated reload whenever it changes. File system
+events are received through ``watchfiles`` (inotify on Linux) when it is installed, otherwise the
+file is polled by comparing cheap ``stat`` fingerprints.
+"""
+
+import logging
+import os
+import threading
+from typing import Callable, Optional, Tuple
+
+try:
+    import watchfiles  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional dependency
+    watchfiles = None  # type: ignore[assignment]
+
+Fingerprint = Optional[Tuple[int, int, int]]
+
+
+def _fingerprint(path: str) -> Fingerprint:
+    """Return a cheap change indicator for a file, following symlinks (e.g. Kubernetes ConfigMaps)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class ConfigWatcher:
+    """Background thread that calls ``on_change`` whenever the watched file changes.
+
+    Each worker process runs its own watcher, so a change is applied in place in every worker
+    without restarting it.
+    """
+
+    def __init__(self, path: str, on_change: Callable[[], None], interval: float = 2.0) -> None:
+        """Initialize the watcher.
+
+        Args:
+            path: Path of the file to watch
+            on_change: Callback invoked from the watcher thread after the file has changed
+            interval: Polling interval in seconds; also used as debounce time for file system events
+        """
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.interval = max(float(interval), 0.1)
+        self.logger = logging.getLogger("config.watcher")
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fingerprint: Fingerprint = _fingerprint(self.path)
+
+    @property
+    def running(self) -> bool:
+        """Whether the watcher thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start watching in a daemon thread. Calling it on a running watcher has no effect."""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._fingerprint = _fingerprint(self.path)
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the watcher thread and wait for it to finish.
+
+        Args:
+            timeout: Maximum number of seconds to wait for the thread
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout if timeout is not None else self.interval * 2)
+            self._thread = None
+
+    def _run(self) -> None:
+        mode = "events" if watchfiles is not None else "polling"
+        self.logger.info("Watching %s for changes (%s)", self.path, mode)
+        try:
+            if watchfiles is not None:
+                self._watch_events()
+            else:
+                self._watch_polling()
+        except Exception:
+            self.logger.exception("Config watcher stopped unexpectedly")
+
+    def _watch_events(self) -> None:
+        # Watch the directory instead of the file: editors and ConfigMap updates replace the file
+        directory = os.path.dirname(self.path)
+        for _ in watchfiles.watch(
+            directory,
+            stop_event=self._stop_event,
+            debounce=int(self.interval * 1000),
+            rust_timeout=int(self.interval * 1000),
+            yield_on_timeout=True,
+        ):
+            self._check()
+
+    def _watch_polling(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self._check()
+
+    def _check(self) -> None:
+        fingerprint = _fingerprint(self.path)
+        if fingerprint == self._fingerprint or fingerprint is None:
+            return
+        self._fingerprint = fingerprint
+        self.logger.info("Detected change of %s", self.path)
+        try:
+            self.on_change()
+        except Exception:
+            self.logger.exception("Failed to apply changed configuration")
@@ -3,9 +3,31 @@ import pkgutil
 from typing import List, Type
 
 from fastapi import FastAPI
+from starlette.routing import Route
 
-from src.config import ConfigParameter, ConfigurationManager
+from src.config import ConfigParameter, ConfigSnapshot, ConfigurationManager
+from src.config.tracing import create_exporter
 from src.controller.blueprint import BaseController
+from src.controller.blueprint.compression import (
+    DEFAULT_MAX_REQUEST_BYTES,
+    DEFAULT_MINIMUM_SIZE,
+    ENCODINGS,
+    CompressionMiddleware,
+    response_compressor,
+)
+from src.controller.blueprint.idempotency import DEFAULT_MAX_BODY_BYTES
+from src.controller.blueprint.idempotency import DEFAULT_MAX_ENTRIES as DEFAULT_IDEMPOTENCY_MAX_ENTRIES
+from src.controller.blueprint.idempotency import DEFAULT_TTL as DEFAULT_IDEMPOTENCY_TTL
+from src.controller.blueprint.idempotency import DEFAULT_WAIT_TIMEOUT, create_store, idempotency_manager
+from src.controller.blueprint.logging_middleware import LoggingContextMiddleware
+from src.controller.blueprint.metrics_middleware import (
+    DEFAULT_LATENCY_BUCKETS,
+    DEFAULT_SIZE_BUCKETS,
+    RequestMetricsMiddleware,
+)
+from src.controller.blueprint.response_cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL, response_cache
+from src.controller.blueprint.routing import BlueprintRoute
+from src.controller.blueprint.timing_middleware import TimingMiddleware
 
 # READ BEVOR CHANGING
 # This file automatically imports all subclasses of BaseController and executes the "register_routes" method.
@@ -33,6 +55,36 @@ def _get_all_subclasses(base_class: Type) -> List[Type]:
     return all_subclasses
 
 
+def _configure_response_cache(snapshot: ConfigSnapshot) -> None:
+    """Apply the response cache settings, which also drops all cached responses"""
+    response_cache.configure(
+        max_entries=int(snapshot.get(ConfigParameter.RESPONSE_CACHE_MAX_ENTRIES, DEFAULT_MAX_ENTRIES)),
+        ttl=float(snapshot.get(ConfigParameter.RESPONSE_CACHE_TTL, DEFAULT_TTL)),
+        enabled=bool(snapshot.get(ConfigParameter.RESPONSE_CACHE_ENABLED, True)),
+    )
+
+
+def _configure_compression(snapshot: ConfigSnapshot) -> None:
+    """Apply the compression settings"""
+    response_compressor.configure(
+        encodings=snapshot.get(ConfigParameter.COMPRESSION_ENCODINGS, ENCODINGS),
+        minimum_size=int(snapshot.get(ConfigParameter.COMPRESSION_MINIMUM_SIZE, DEFAULT_MINIMUM_SIZE)),
+        max_request_bytes=int(snapshot.get(ConfigParameter.COMPRESSION_MAX_REQUEST_BYTES, DEFAULT_MAX_REQUEST_BYTES)),
+        enabled=bool(snapshot.get(ConfigParameter.COMPRESSION_ENABLED, True)),
+    )
+
+
+def _configure_idempotency(snapshot: ConfigSnapshot) -> None:
+    """Apply the idempotency settings; the store is only chosen at startup"""
+    idempotency_manager.configure(
+        ttl=float(snapshot.get(ConfigParameter.IDEMPOTENCY_TTL, DEFAULT_IDEMPOTENCY_TTL)),
+        max_entries=int(snapshot.get(ConfigParameter.IDEMPOTENCY_MAX_ENTRIES, DEFAULT_IDEMPOTENCY_MAX_ENTRIES)),
+        max_body_bytes=int(snapshot.get(ConfigParameter.IDEMPOTENCY_MAX_BODY_BYTES, DEFAULT_MAX_BODY_BYTES)),
+        wait_timeout=float(snapshot.get(ConfigParameter.IDEMPOTENCY_WAIT_TIMEOUT, DEFAULT_WAIT_TIMEOUT)),
+        enabled=bool(snapshot.get(ConfigParameter.IDEMPOTENCY_ENABLED, True)),
+    )
+
+
 def configure_routes(app: FastAPI, settings: ConfigurationManager) -> FastAPI:
     """Add all endpoints, defined in the controller classes, to the fast api app"""
 
@@ -47,6 +99,24 @@ def configure_routes(app: FastAPI, settings: ConfigurationManager) -> FastAPI:
     # Import all modules in the api package to ensure all controller classes are loaded
     _import_submodules("src.controller")
 
+    # Routes added from here on record dto, handler and serialize timing spans
+    app.router.route_class = BlueprintRoute
+
+    # Responses of @cached endpoints are dropped whenever the configuration changes
+    _configure_response_cache(settings.snapshot)
+    settings.add_reload_listener(_configure_response_cache)
+
+    # Responses of @idempotent endpoints are kept in memory, or in a SQLite file shared by the workers
+    idempotency_manager.use_store(
+        create_store(
+            str(settings.get_config(ConfigParameter.IDEMPOTENCY_STORE, "memory")),
+            str(settings.get_config(ConfigParameter.IDEMPOTENCY_SQLITE_PATH, "idempotency.db")),
+            int(settings.get_config(ConfigParameter.IDEMPOTENCY_MAX_ENTRIES, DEFAULT_IDEMPOTENCY_MAX_ENTRIES)),
+        )
+    )
+    _configure_idempotency(settings.snapshot)
+    settings.add_reload_listener(_configure_idempotency)
+
     # Get all controller classes
     controller_classes = _get_all_subclasses(BaseController)
 
@@ -55,6 +125,33 @@ def configure_routes(app: FastAPI, settings: ConfigurationManager) -> FastAPI:
         controller = controller_class(settings=settings)
         controller.register_routes(app, url_prefix=url_prefix)
 
+    # The OpenAPI schema is built once by FastAPI, but rendered to JSON on every request
+    for route in app.router.routes:
+        if isinstance(route, Route) and route.path == app.openapi_url:
+            response_cache.cache_route(route)
+
+    # Compress responses and decompress request bodies; innermost, so metrics and timing see the encoded sizes
+    _configure_compression(settings.snapshot)
+    settings.add_reload_listener(_configure_compression)
+    app.add_middleware(CompressionMiddleware)
+
+    # Bind every request to the logging context (request path, per-request log sampling)
+    app.add_middleware(LoggingContextMiddleware)
+
+    # Trace every request for the Server-Timing header and the optional OTLP export
+    server_timing = bool(settings.get_config(ConfigParameter.TRACING_SERVER_TIMING, False))
+    otlp_endpoint = settings.get_config(ConfigParameter.TRACING_OTLP_ENDPOINT, "")
+    exporter = create_exporter(otlp_endpoint, settings.get_config(ConfigParameter.APP_NAME)) if otlp_endpoint else None
+    if server_timing or exporter is not None:
+        app.add_middleware(TimingMiddleware, server_timing=server_timing, exporter=exporter)
+
+    # Record request rate, errors and duration per route; added last, so it also times the other middlewares
+    app.add_middleware(
+        RequestMetricsMiddleware,
+        latency_buckets=settings.get_config(ConfigParameter.METRICS_LATENCY_BUCKETS, DEFAULT_LATENCY_BUCKETS),
+        size_buckets=settings.get_config(ConfigParameter.METRICS_SIZE_BUCKETS, DEFAULT_SIZE_BUCKETS),
+    )
+
     # After all routes have been registered, set up the MCP server if available
     try:
         # Import here to avoid circular imports
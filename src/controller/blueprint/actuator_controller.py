@@ -1,11 +1,21 @@
+import asyncio
 import logging
+import os
+from datetime import datetime
+from typing import AsyncIterator, Optional
 
-from fastapi import FastAPI, HTTPException
-from prometheus_client import make_asgi_app
+from fastapi import FastAPI, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 
 from src.config.config import ConfigurationManager
+from src.config.log_follow import LogFollower
+from src.config.log_tail import read_log_tail
+from src.config.metrics import metrics_app
 from src.config.params import ConfigParameter
+from src.config.profiler import ProfilerBusyError, SamplingProfiler
 from src.controller.blueprint import BaseController
+from src.controller.blueprint.response_cache import cached
 from src.controller.dto.actuator import (
     HealthResponse,
     InfoResponse,
@@ -44,74 +54,210 @@ class ActuatorController(BaseController):
           - build
             - commit
             - ...
+          - config
+            - generation
+            - loaded_at
+            - ...
         """
         # Create the hierarchical structure
-        info_dict = {"app": {}, "logs": {}, "build": {}}
+        info_dict: dict = {"app": {}, "logs": {}, "build": {}}
+        sections = {"APP": "app", "LOG": "logs", "BUILD": "build"}
 
-        # Process app variables
-        for key in dir(ConfigParameter):
-            if key.startswith("APP_") and not key.startswith("__"):
-                try:
-                    param = getattr(ConfigParameter, key)
-                    value = self.settings.get_config(param)
-                    # Remove APP_ prefix and convert to lowercase
-                    clean_key = key[4:].lower()
-                    info_dict["app"][clean_key] = value
-                except Exception:
-                    pass
-
-        # Process log variables
-        for key in dir(ConfigParameter):
-            if key.startswith("LOG_") and not key.startswith("__"):
-                try:
-                    param = getattr(ConfigParameter, key)
-                    value = self.settings.get_config(param)
-                    # Remove LOG_ prefix and convert to lowercase
-                    clean_key = key[4:].lower()
-                    info_dict["logs"][clean_key] = value
-                except Exception:
-                    pass
-
-        # Process build variables
-        for key in dir(ConfigParameter):
-            if key.startswith("BUILD_") and not key.startswith("__"):
-                try:
-                    param = getattr(ConfigParameter, key)
-                    value = self.settings.get_config(param)
-                    # Remove BUILD_ prefix and convert to lowercase
-                    clean_key = key[6:].lower()
-                    info_dict["build"][clean_key] = value
-                except Exception:
-                    pass
+        # Read from a single snapshot so all values belong to the same configuration generation
+        snapshot = self.settings.snapshot
+        for param in ConfigParameter:
+            prefix, _, name = param.name.partition("_")
+            section = sections.get(prefix)
+            if section is not None:
+                # Remove the prefix and convert to lowercase
+                info_dict[section][name.lower()] = snapshot.get(param)
+
+        info_dict["config"] = {
+            "generation": snapshot.generation,
+            "loaded_at": snapshot.loaded_at.isoformat(),
+            "watching": self.settings.watching,
+            "valid": self.settings.is_valid(),
+        }
 
         return InfoResponse(info=info_dict)
 
-    async def get_logs(self, log_length: int = 100) -> LogsResponse:
-        """Return the last log entries as text
+    async def get_logs(
+        self,
+        log_length: int = Query(default=100, ge=0, description="Number of log lines to return"),
+        cursor: Optional[int] = Query(
+            default=None, ge=0, description="Byte offset returned by a previous call, to read older entries"
+        ),
+        segment: int = Query(default=0, ge=0, description="Log segment the cursor refers to, 0 is the current file"),
+        level: Optional[str] = Query(default=None, description="Only return entries at or above this log level"),
+        logger: Optional[str] = Query(default=None, description="Only return entries of this logger (and children)"),
+        since: Optional[datetime] = Query(default=None, description="Only return entries logged at or after this time"),
+        until: Optional[datetime] = Query(default=None, description="Only return entries logged up to this time"),
+    ) -> LogsResponse:
+        """Return the last log entries as text, newest first
+
+        The log file is read backwards in blocks in a worker thread, so neither the size of the log
+        file nor the read blocks the event loop. Reading continues into rotated (and compressed)
+        log files, and the returned cursor pages to older entries. Filtered requests are served from
+        the in-memory log buffer, which only holds the entries of the worker answering the request;
+        so are all requests if the log file is disabled.
 
         Args:
             log_length: Number of log lines to return (default: 100)
+            cursor: Byte offset to continue reading older entries from the log file
+            segment: Index of the rotated log file the cursor refers to
+            level: Minimum log level of the returned entries
+            logger: Logger name of the returned entries
+            since: Earliest time of the returned entries
+            until: Latest time of the returned entries
         """
+        snapshot = self.settings.snapshot
+        log_buffer = self.settings.log_buffer
+        filtered = level is not None or logger is not None or since is not None or until is not None
+        file_enabled = snapshot.get(ConfigParameter.LOG_FILE_ENABLED, True)
 
-        try:
-            log_file = self.settings.get_config("log_file")
-            with open(log_file, "r", encoding="utf-8") as f:
-                log_lines = f.readlines()
+        if log_buffer is not None and cursor is None and segment == 0 and (filtered or not file_enabled):
+            records = log_buffer.get_records(
+                log_length,
+                min_level=self._parse_level(level),
+                logger_name=logger,
+                since=since.timestamp() if since is not None else None,
+                until=until.timestamp() if until is not None else None,
+            )
+            return LogsResponse(logs=[record.message for record in records])
+
+        if filtered:
+            raise HTTPException(status_code=400, detail="Filtering logs requires the log buffer (log_buffer_size)")
+        if not file_enabled:
+            raise HTTPException(status_code=404, detail="The log file is disabled.")
 
-            # Filter the last log_length lines, then reverse them
-            last_logs = log_lines[-log_length:][::-1] if log_length > 0 else []
+        try:
+            log_file = snapshot.get(ConfigParameter.LOG_FILE, "app.log")
+            start = (segment, cursor) if cursor is not None or segment > 0 else None
+            log_lines, next_cursor = await run_in_threadpool(read_log_tail, log_file, log_length, start)
 
             processed_logs = []
-            for line in last_logs:
+            for line in reversed(log_lines):
                 if "Starting flask app" in line:
                     processed_logs.append("\nRESTART\n\n")
                 processed_logs.append(line.rstrip())
 
-            return LogsResponse(logs=processed_logs)
+            if next_cursor is None:
+                return LogsResponse(logs=processed_logs)
+            return LogsResponse(logs=processed_logs, segment=next_cursor[0], cursor=next_cursor[1])
         except Exception as e:
-            self.logger.error(f"Error retrieving logs: {e}")
+            self.logger.error("Error retrieving logs: %s", e)
             raise HTTPException(status_code=500, detail="Could not read logs.")
 
+    @staticmethod
+    def _parse_level(level: Optional[str]) -> int:
+        """Convert a log level name to its numeric value, raising HTTP 400 for unknown names"""
+        if level is None:
+            return logging.NOTSET
+        level_number = logging.getLevelName(level.upper())
+        if not isinstance(level_number, int):
+            raise HTTPException(status_code=400, detail=f"Unknown log level: {level}")
+        return level_number
+
+    async def stream_logs(
+        self,
+        level: Optional[str] = Query(default=None, description="Only stream lines at or above this log level"),
+        contains: Optional[str] = Query(default=None, description="Only stream lines containing this text"),
+    ) -> StreamingResponse:
+        """Stream new log lines as Server-Sent Events
+
+        All streams of a worker share one reader of the log file. Clients that cannot keep up are
+        sent a 'dropped' event and disconnected.
+
+        Args:
+            level: Minimum log level of the streamed lines
+            contains: Substring the streamed lines have to contain
+        """
+        min_level = self._parse_level(level)
+
+        snapshot = self.settings.snapshot
+        if not snapshot.get(ConfigParameter.LOG_FILE_ENABLED, True):
+            raise HTTPException(status_code=404, detail="The log file is disabled.")
+
+        follower = LogFollower.for_file(
+            snapshot.get(ConfigParameter.LOG_FILE, "app.log"),
+            poll_interval=float(snapshot.get(ConfigParameter.LOG_STREAM_POLL_INTERVAL, 0.5)),
+        )
+        max_pending = int(snapshot.get(ConfigParameter.LOG_STREAM_MAX_PENDING, 1000))
+        return StreamingResponse(
+            self._log_events(follower, max_pending, min_level, contains),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def _log_events(
+        self, follower: LogFollower, max_pending: int, min_level: int, contains: Optional[str]
+    ) -> AsyncIterator[str]:
+        """Subscribe to the follower and format the lines as Server-Sent Events.
+
+        The subscription is made once the response starts, so a client that disconnects before
+        leaves no subscription behind.
+        """
+        subscription = follower.subscribe(max_pending=max_pending, min_level=min_level, contains=contains)
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(subscription.queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line to keep proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                if line is None:
+                    if subscription.dropped:
+                        yield "event: dropped\ndata: client too slow, stream closed\n\n"
+                    return
+                yield f"data: {line}\n\n"
+        finally:
+            follower.unsubscribe(subscription)
+
+    async def run_profile(
+        self,
+        seconds: float = Query(default=10, gt=0, description="How long to sample, in seconds"),
+        hz: int = Query(default=100, ge=1, le=1000, description="Samples per second"),
+        output_format: str = Query(
+            default="collapsed", alias="format", pattern="^(collapsed|speedscope)$", description="Output format"
+        ),
+        include_idle: bool = Query(default=False, description="Include threads waiting for I/O or work"),
+    ) -> Response:
+        """Profile this worker's threads and event loop with a statistical sampler
+
+        The sampler runs in a worker thread, so the event loop keeps serving requests while it is
+        profiled. Only one profile can run per worker at a time.
+
+        Args:
+            seconds: Sampling duration, limited by the profiler_max_seconds setting
+            hz: Sampling rate
+            output_format: 'collapsed' for collapsed stacks or 'speedscope' for speedscope JSON
+            include_idle: Keep samples of threads that are waiting
+        """
+        snapshot = self.settings.snapshot
+        if not snapshot.get(ConfigParameter.PROFILER_ENABLED, False):
+            raise HTTPException(status_code=404, detail="The profiler is disabled.")
+        max_seconds = float(snapshot.get(ConfigParameter.PROFILER_MAX_SECONDS, 60))
+        if seconds > max_seconds:
+            raise HTTPException(status_code=400, detail=f"Profiles are limited to {max_seconds:g} seconds")
+
+        try:
+            profile = await run_in_threadpool(SamplingProfiler(hz, include_idle).run, seconds)
+        except ProfilerBusyError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+        self.logger.info(
+            "Profiled for %.1fs: %d samples, %.2f%% sampling overhead",
+            profile.duration,
+            profile.samples,
+            profile.overhead_ratio * 100,
+        )
+        headers = {"X-Profile-Samples": str(profile.samples), "X-Profile-Overhead": f"{profile.overhead_ratio:.4f}"}
+        if output_format == "speedscope":
+            headers["Content-Disposition"] = f'attachment; filename="profile-{os.getpid()}.speedscope.json"'
+            return JSONResponse(profile.speedscope(), headers=headers)
+        return PlainTextResponse(profile.collapsed(), headers=headers)
+
     async def check_readiness(self) -> ReadinessResponse:
         """Kubernetes readiness probe endpoint"""
 
@@ -138,7 +284,8 @@ class ActuatorController(BaseController):
 
         app.add_api_route(
             path=f"{url_prefix}/info",
-            endpoint=self.get_info,
+            # Changes only with the configuration, which clears the cache
+            endpoint=cached()(self.get_info),
             methods=["GET"],
             response_model=InfoResponse,
             summary="Service Information",
@@ -156,6 +303,26 @@ class ActuatorController(BaseController):
             tags=["actuators"],
         )
 
+        app.add_api_route(
+            path=f"{url_prefix}/logs/stream",
+            endpoint=self.stream_logs,
+            methods=["GET"],
+            response_class=StreamingResponse,
+            summary="Service Log Stream",
+            description="Streams new log lines as Server-Sent Events, optionally filtered by level and text",
+            tags=["actuators"],
+        )
+
+        app.add_api_route(
+            path=f"{url_prefix}/profile",
+            endpoint=self.run_profile,
+            methods=["POST"],
+            response_class=PlainTextResponse,
+            summary="CPU Profile",
+            description="Samples the stacks of this worker and returns collapsed stacks or speedscope JSON",
+            tags=["actuators"],
+        )
+
         app.add_api_route(
             path=f"{url_prefix}/ready",
             endpoint=self.check_readiness,
@@ -166,9 +333,8 @@ class ActuatorController(BaseController):
             tags=["actuators"],
         )
 
-        # Add prometheus metrics endpoint
-        metrics_app = make_asgi_app()
-        app.mount("/metrics", metrics_app)
+        # Add prometheus metrics endpoint, aggregated across workers in multiprocess mode
+        app.mount("/metrics", metrics_app())
 
         # FastAPI has built-in OpenAPI/Swagger support
         app.title = self.settings.get_config(ConfigParameter.APP_NAME)
@@ -1,13 +1,19 @@
 from abc import ABC, abstractmethod
+from typing import Optional, Type
 
 from fastapi import FastAPI
+from starlette.responses import JSONResponse
 
-from src.config import ConfigurationManager
+from src.config import ConfigParameter, ConfigurationManager
+from src.controller.blueprint.responses import json_response_class
 
 
 class BaseController(ABC):
     """Base controller class that all controllers should inherit from"""
 
+    # JSON encoder of this controller's routes (json, orjson or msgspec), None for the app_response_encoder setting
+    response_encoder: Optional[str] = None
+
     def __init__(self, settings: ConfigurationManager):
         """
         Initialize the base controller with required settings.
@@ -17,6 +23,12 @@ class BaseController(ABC):
         """
         self.settings = settings
 
+    @property
+    def response_class(self) -> Type[JSONResponse]:
+        """Response class for this controller's JSON routes, pass it as ``response_class`` when adding a route"""
+        encoder = self.response_encoder or self.settings.get_config(ConfigParameter.APP_RESPONSE_ENCODER, "json")
+        return json_response_class(encoder)
+
     @abstractmethod
     def register_routes(self, app: FastAPI, url_prefix: str = "") -> None:
         """
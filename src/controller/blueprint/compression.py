@@ -0,0 +1,540 @@
+"""Compression of response bodies and decompression of request bodies.
+
+Responses are compressed with the best encoding both sides support (``gzip``, and ``br``/``zstd``
+with the optional ``brotli``/``zstandard`` packages), if their content type is compressible and
+they are at least ``compression_minimum_size`` bytes. Streamed responses are compressed chunk by
+chunk, every chunk is flushed, so lines still reach the client as soon as they are produced.
+Endpoints can opt out with the ``uncompressed`` decorator.
+
+Request bodies sent with ``Content-Encoding`` are decompressed while they are read, and reading
+fails with 413 once the decompressed body exceeds ``compression_max_request_bytes``, so a small
+compressed body cannot expand into an unbounded one.
+"""
+
+import logging
+import struct
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.controller.blueprint.endpoint_options import endpoint_option, mark_endpoint
+from src.models import BadRequestError, PayloadTooLargeError, UnsupportedMediaTypeError
+
+try:
+    import brotli  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
+ENCODINGS = ("zstd", "br", "gzip")
+
+DEFAULT_MINIMUM_SIZE = 1024
+DEFAULT_MAX_REQUEST_BYTES = 10485760
+
+# Levels for responses compressed per request, favoring speed
+DYNAMIC_LEVELS = {"gzip": 6, "br": 4, "zstd": 3}
+# Levels for responses compressed once and served many times (cached responses); beyond
+# STATIC_MAX_SIZE these get too slow (br 11 takes over a second per MB), so the dynamic ones are used
+STATIC_LEVELS = {"gzip": 9, "br": 11, "zstd": 19}
+STATIC_MAX_SIZE = 262144
+
+# Larger bodies are compressed in a worker thread instead of blocking the event loop
+_THREADPOOL_SIZE = 65536
+
+# Largest piece a request body is decompressed into at once
+_DECOMPRESS_CHUNK = 65536
+
+_COMPRESSIBLE_TYPES = frozenset(
+    {
+        "application/json",
+        "application/x-ndjson",
+        "application/javascript",
+        "application/xml",
+        "image/svg+xml",
+    }
+)
+
+
+def _available(encoding: str) -> bool:
+    if encoding == "br":
+        return brotli is not None
+    if encoding == "zstd":
+        return zstandard is not None
+    return encoding == "gzip"
+
+
+class StreamCompressor:
+    """Incremental compressor of one response body."""
+
+    def __init__(self, encoding: str, level: int) -> None:
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._compressor: Any = zlib.compressobj(level, zlib.DEFLATED, 31)
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+        elif encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            raise ValueError(f"Unknown content encoding: {encoding}")
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """Compress a chunk; with ``flush`` the output decompresses to everything written so far"""
+        out: bytes
+        if self.encoding == "br":
+            out = self._compressor.process(data)
+            if flush:
+                out += self._compressor.flush()
+            return out
+        out = self._compressor.compress(data)
+        if flush and self.encoding == "gzip":
+            out += self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        elif flush:
+            out += self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return out
+
+    def finish(self) -> bytes:
+        """End the compressed stream"""
+        out: bytes = self._compressor.finish() if self.encoding == "br" else self._compressor.flush()
+        return out
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    """Compress a complete body"""
+    compressor = StreamCompressor(encoding, level)
+    return compressor.compress(body) + compressor.finish()
+
+
+async def compress_async(body: bytes, encoding: str, level: int) -> bytes:
+    """Compress a complete body, large ones in a worker thread (all codecs release the GIL)"""
+    if len(body) > _THREADPOOL_SIZE:
+        return await run_in_threadpool(compress, body, encoding, level)
+    return compress(body, encoding, level)
+
+
+class _ZstdFrames:
+    """Follows the frame and block headers of a zstd stream, to tell whether it ends with a complete frame.
+
+    Block contents are skipped without being looked at; only the header bytes (at most 18) are buffered.
+    """
+
+    def __init__(self) -> None:
+        self._pending = b""  # Incomplete header
+        self._skip = 0  # Bytes of block content or checksum still to skip
+        self._in_frame = False
+        self._checksum = False  # Whether the current frame ends with a checksum
+        self._last_block = False
+        self._frames = 0
+
+    @property
+    def finished(self) -> bool:
+        """Whether the data so far ends with the end of a frame"""
+        return self._frames > 0 and not self._in_frame and not self._skip and not self._pending
+
+    def feed(self, data: bytes) -> None:
+        """Follow the next chunk of the stream.
+
+        Raises:
+            ValueError: If the data is not a zstd stream
+        """
+        if self._pending:
+            data, self._pending = self._pending + data, b""
+        position = 0
+        while position < len(data) or (self._in_frame and self._last_block and not self._skip):
+            if self._skip:
+                skipped = min(self._skip, len(data) - position)
+                position += skipped
+                self._skip -= skipped
+            elif self._in_frame and self._last_block:
+                # The frame ends after the content of its last block and the checksum, if any
+                self._in_frame = self._last_block = False
+                self._frames += 1
+                self._skip = 4 if self._checksum else 0
+            elif self._in_frame:
+                if len(data) - position < 3:
+                    break
+                header = data[position] | data[position + 1] << 8 | data[position + 2] << 16
+                position += 3
+                block_type = (header >> 1) & 3
+                if block_type == 3:
+                    raise ValueError("Reserved zstd block type")
+                self._last_block = bool(header & 1)
+                # RLE blocks hold a single byte, the size is their decompressed size
+                self._skip = 1 if block_type == 1 else header >> 3
+            else:
+                if len(data) - position < 5:
+                    break
+                (magic,) = struct.unpack_from("<I", data, position)
+                if magic & 0xFFFFFFF0 == 0x184D2A50:
+                    # Skippable frame: magic number, 4-byte size and content
+                    if len(data) - position < 8:
+                        break
+                    (self._skip,) = struct.unpack_from("<I", data, position + 4)
+                    position += 8
+                    continue
+                if magic != 0xFD2FB528:
+                    raise ValueError("Not a zstd frame")
+                descriptor = data[position + 4]
+                single_segment = bool(descriptor & 0x20)
+                content_size_bytes = (1 if single_segment else 0, 2, 4, 8)[descriptor >> 6]
+                dictionary_id_bytes = (0, 1, 2, 4)[descriptor & 3]
+                header_size = 5 + (0 if single_segment else 1) + dictionary_id_bytes + content_size_bytes
+                if len(data) - position < header_size:
+                    break
+                position += header_size
+                self._in_frame = True
+                self._checksum = bool(descriptor & 0x04)
+        self._pending = data[position:]
+
+
+class _StreamDecompressor:
+    """Incremental decompressor of one request body that fails once the output exceeds ``max_size``.
+
+    Output is produced in pieces of at most ``_DECOMPRESS_CHUNK`` bytes and counted piece by piece,
+    so no more than one piece beyond the limit is ever decompressed.
+    """
+
+    def __init__(self, encoding: str, max_size: int) -> None:
+        self.encoding = encoding
+        self.max_size = max_size
+        self.size = 0
+        if encoding == "gzip":
+            self._decompressor: Any = zlib.decompressobj(31)
+        elif encoding == "br":
+            self._decompressor = brotli.Decompressor()
+        else:
+            self._pieces: List[bytes] = []
+            self._frames = _ZstdFrames()
+            # The stream writer bounds the output per piece, unlike decompressobj(), but does not report the
+            # end of a frame, which _ZstdFrames follows instead
+            self._decompressor = zstandard.ZstdDecompressor().stream_writer(
+                self, write_size=_DECOMPRESS_CHUNK  # type: ignore[arg-type]
+            )
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress a chunk of the body.
+
+        Raises:
+            PayloadTooLargeError: If the decompressed body exceeds ``max_size``
+        """
+        pieces = []
+        if self.encoding == "gzip":
+            while data:
+                pieces.append(self._count(self._decompressor.decompress(data, _DECOMPRESS_CHUNK)))
+                data = self._decompressor.unconsumed_tail
+        elif self.encoding == "br":
+            pieces.append(self._count(self._decompressor.process(data, output_buffer_limit=_DECOMPRESS_CHUNK)))
+            while not self._decompressor.can_accept_more_data():
+                pieces.append(self._count(self._decompressor.process(b"", output_buffer_limit=_DECOMPRESS_CHUNK)))
+        else:
+            self._frames.feed(data)
+            # The stream writer passes every piece to write() below
+            self._decompressor.write(data)
+            pieces, self._pieces = self._pieces, []
+        return b"".join(pieces)
+
+    def write(self, data: bytes) -> int:
+        """Sink of the zstandard stream writer"""
+        self._pieces.append(self._count(bytes(data)))
+        return len(data)
+
+    def _count(self, piece: bytes) -> bytes:
+        self.size += len(piece)
+        if self.size > self.max_size:
+            raise PayloadTooLargeError(message=f"The decompressed request body exceeds {self.max_size} bytes")
+        return piece
+
+    @property
+    def finished(self) -> bool:
+        """Whether the end of the compressed stream was seen"""
+        if self.encoding == "gzip":
+            return bool(self._decompressor.eof)
+        if self.encoding == "br":
+            return bool(self._decompressor.is_finished())
+        return self._frames.finished
+
+
+def negotiate(accept_encoding: Optional[str], encodings: Sequence[str]) -> Optional[str]:
+    """Choose the response encoding from an ``Accept-Encoding`` header.
+
+    Args:
+        accept_encoding: The request header
+        encodings: Encodings the server offers, most preferred first
+
+    Returns:
+        The encoding with the highest quality for the client, ties broken by the server's
+        preference; None to send the body unencoded
+    """
+    if not accept_encoding:
+        return None
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """Entity tag of an encoded representation; a strong tag must differ from the unencoded one"""
+    if etag.endswith('"'):
+        return etag[:-1] + "-" + encoding + '"'
+    return etag
+
+
+def add_vary_accept_encoding(headers: MutableHeaders) -> None:
+    """Add ``Accept-Encoding`` to the ``Vary`` header, unless it is listed already"""
+    vary = headers.get("vary", "")
+    if "accept-encoding" not in (token.strip().lower() for token in vary.split(",")):
+        headers.add_vary_header("Accept-Encoding")
+
+
+def uncompressed(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """Never compress the responses of an endpoint, e.g. if they are already compressed"""
+    return mark_endpoint(endpoint, "__compress__", False)
+
+
+def compression_allowed(endpoint: Optional[Callable[..., Any]]) -> bool:
+    """Whether an endpoint's responses may be compressed, False if it is marked ``uncompressed``"""
+    return bool(endpoint_option(endpoint, "__compress__", True))
+
+
+class ResponseCompressor:
+    """Compression settings shared by the middleware and the response cache."""
+
+    def __init__(self) -> None:
+        self.enabled = True
+        self.minimum_size = DEFAULT_MINIMUM_SIZE
+        self.max_request_bytes = DEFAULT_MAX_REQUEST_BYTES
+        self.encodings: Sequence[str] = [encoding for encoding in ENCODINGS if _available(encoding)]
+
+    def configure(
+        self,
+        encodings: Sequence[str] = ENCODINGS,
+        minimum_size: int = DEFAULT_MINIMUM_SIZE,
+        max_request_bytes: int = DEFAULT_MAX_REQUEST_BYTES,
+        enabled: bool = True,
+    ) -> None:
+        """Apply new settings.
+
+        Args:
+            encodings: Offered response encodings, most preferred first; those whose package is not
+                installed are left out
+            minimum_size: Smaller responses are sent unencoded
+            max_request_bytes: Maximum decompressed size of request bodies
+            enabled: Compress responses at all
+        """
+        missing = [encoding for encoding in encodings if not _available(encoding)]
+        if missing:
+            logging.getLogger("api").warning(
+                "Response encodings %s are configured, but their packages are not installed", ", ".join(missing)
+            )
+        self.encodings = [encoding for encoding in encodings if _available(encoding)]
+        self.minimum_size = minimum_size
+        self.max_request_bytes = max_request_bytes
+        self.enabled = enabled
+
+    @staticmethod
+    def compressible(content_type: Optional[str]) -> bool:
+        """Whether a content type benefits from compression; event streams are never buffered or encoded"""
+        if not content_type:
+            return False
+        media_type = content_type.partition(";")[0].strip().lower()
+        if media_type == "text/event-stream":
+            return False
+        return media_type.startswith("text/") or media_type in _COMPRESSIBLE_TYPES or media_type.endswith("+json")
+
+    def select(self, accept_encoding: Optional[str], content_type: Optional[str], size: Optional[int]) -> Optional[str]:
+        """The encoding of a response, None to send it unencoded.
+
+        Args:
+            accept_encoding: The request's ``Accept-Encoding`` header
+            content_type: The response's content type
+            size: The body size, None for a streamed body of unknown size
+        """
+        if not self.eligible(content_type, size):
+            return None
+        return negotiate(accept_encoding, self.encodings)
+
+    def eligible(self, content_type: Optional[str], size: Optional[int]) -> bool:
+        """Whether a response would be encoded for a client accepting it, i.e. needs ``Vary: Accept-Encoding``"""
+        return (
+            self.enabled
+            and bool(self.encodings)
+            and (size is None or size >= self.minimum_size)
+            and self.compressible(content_type)
+        )
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses and decompressing request bodies."""
+
+    def __init__(self, app: ASGIApp, compressor: Optional[ResponseCompressor] = None) -> None:
+        """Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application
+            compressor: The compression settings, by default the shared ``response_compressor``
+        """
+        self.app = app
+        self.compressor = compressor or response_compressor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_encoding = headers.get("content-encoding", "identity").strip().lower()
+        if content_encoding != "identity":
+            scope, receive = self._decompressing(scope, receive, content_encoding)
+
+        if scope["method"] == "HEAD" or not self.compressor.enabled:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(self.compressor, scope, headers.get("accept-encoding"), send))
+
+    def _decompressing(self, scope: Scope, receive: Receive, encoding: str) -> Tuple[Scope, Receive]:
+        """Scope and receive function presenting the decompressed request body to the application"""
+        # Errors are raised when the application reads the body, so they are rendered like its own errors
+        supported = encoding in ENCODINGS and _available(encoding)
+        decompressor = _StreamDecompressor(encoding, self.compressor.max_request_bytes) if supported else None
+
+        async def decompressing_receive() -> Message:
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            if decompressor is None:
+                raise UnsupportedMediaTypeError(message=f"Unsupported request content encoding: {encoding}")
+            try:
+                body = decompressor.decompress(message.get("body", b""))
+            except PayloadTooLargeError:
+                raise
+            except Exception as e:
+                raise BadRequestError(message=f"The request body is not valid {encoding} data: {e}")
+            more_body = message.get("more_body", False)
+            if not more_body and not decompressor.finished:
+                raise BadRequestError(message=f"The {encoding} request body is truncated")
+            return {"type": "http.request", "body": body, "more_body": more_body}
+
+        # The body length changes and the application only sees the decoded body
+        scope = dict(scope)
+        scope["headers"] = [
+            (name, value) for name, value in scope["headers"] if name not in (b"content-encoding", b"content-length")
+        ]
+        return scope, decompressing_receive
+
+
+class _CompressingSend:
+    """Send function compressing the response of one request"""
+
+    def __init__(self, compressor: ResponseCompressor, scope: Scope, accept_encoding: Optional[str], send: Send):
+        self.compressor = compressor
+        self.scope = scope
+        self.accept_encoding = accept_encoding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.stream: Optional[StreamCompressor] = None
+        self.flush = True
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+        elif message["type"] == "http.response.start":
+            await self._start(message)
+        elif message["type"] != "http.response.body":
+            await self.send(message)
+        elif self.stream is not None:
+            await self._send_chunk(self.stream, message.get("body", b""), message.get("more_body", False))
+        elif self.start is not None:
+            await self._first_body(self.start, message)
+        else:
+            await self.send(message)
+
+    async def _start(self, message: Message) -> None:
+        headers = Headers(raw=message["headers"])
+        status = message["status"]
+        if (
+            "content-encoding" in headers
+            or status < 200
+            or status in (204, 304)
+            or not compression_allowed(self.scope.get("endpoint"))
+            or not self.compressor.compressible(headers.get("content-type"))
+        ):
+            self.passthrough = True
+            await self.send(message)
+        else:
+            # Held back until the first body chunk tells whether the body is complete
+            self.start = message
+
+    async def _first_body(self, start: Message, message: Message) -> None:
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = MutableHeaders(raw=start["headers"])
+        content_type = headers.get("content-type")
+        if not more_body:
+            size: Optional[int] = len(body)
+        else:
+            # A body sent in parts may still declare its size; None for a stream of unknown size
+            length = headers.get("content-length")
+            size = int(length) if length is not None and length.isdigit() else None
+
+        if self.compressor.eligible(content_type, size):
+            add_vary_accept_encoding(headers)
+        encoding = self.compressor.select(self.accept_encoding, content_type, size)
+        if encoding is None:
+            self.passthrough = True
+            await self.send(start)
+            await self.send(message)
+            return
+
+        self._encoded_headers(headers, encoding)
+        if more_body:
+            self.stream = stream = StreamCompressor(encoding, DYNAMIC_LEVELS[encoding])
+            # Streams of unknown length are flushed per chunk, so each chunk reaches the client right away
+            self.flush = size is None
+            del headers["content-length"]
+            await self.send(start)
+            await self._send_chunk(stream, body, more_body)
+        else:
+            body = await compress_async(body, encoding, DYNAMIC_LEVELS[encoding])
+            headers["content-length"] = str(len(body))
+            self.passthrough = True
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": body, "more_body": False})
+
+    async def _send_chunk(self, stream: StreamCompressor, body: bytes, more_body: bool) -> None:
+        data = stream.compress(body, flush=self.flush and more_body)
+        if not more_body:
+            data += stream.finish()
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    @staticmethod
+    def _encoded_headers(headers: MutableHeaders, encoding: str) -> None:
+        headers["content-encoding"] = encoding
+        etag = headers.get("etag")
+        if etag is not None:
+            headers["etag"] = variant_etag(etag, encoding)
+
+
+# Shared by the middleware and the response cache, configured from the settings in configure_routes
+response_compressor = ResponseCompressor()
@@ -0,0 +1,43 @@
+"""Per-endpoint options set by decorators such as ``cached`` and read by ``BlueprintRoute``.
+
+Options are stored as attributes of a thin wrapper around the endpoint, so bound methods can be
+marked when a route is added, and decorators can be stacked (``functools.wraps`` copies the
+attributes of the wrapped endpoint).
+"""
+
+import functools
+import inspect
+from typing import Any, Callable, Optional
+
+
+def mark_endpoint(endpoint: Callable[..., Any], option: str, value: Any) -> Callable[..., Any]:
+    """Wrap an endpoint and set an option on the wrapper.
+
+    Args:
+        endpoint: The endpoint function or bound method
+        option: Attribute name of the option, e.g. ``__response_cache__``
+        value: Value of the option
+
+    Returns:
+        The wrapper, a function with the same signature as the endpoint
+    """
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            return await endpoint(*args, **kwargs)
+
+        wrapper: Callable[..., Any] = async_wrapper
+    else:
+
+        @functools.wraps(endpoint)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return endpoint(*args, **kwargs)
+
+    setattr(wrapper, option, value)
+    return wrapper
+
+
+def endpoint_option(endpoint: Optional[Callable[..., Any]], option: str, default: Any = None) -> Any:
+    """The value of an option of an endpoint, ``default`` if it is not set"""
+    return getattr(endpoint, option, default)
@@ -0,0 +1,466 @@
+"""Idempotency-Key support for endpoints with side effects.
+
+Endpoints opt in with the ``idempotent`` decorator, where the method is defined or around the
+endpoint when adding the route::
+
+    app.add_api_route(path="/orders", endpoint=idempotent()(self.create_order), methods=["POST"], ...)
+
+The first completed response to a request with an ``Idempotency-Key`` header is stored, and
+requests repeating the key get that response replayed (marked with ``Idempotent-Replayed: true``)
+without calling the endpoint again. A duplicate arriving while the first request is still running
+waits for it. Reusing a key with a different request body is rejected with 422.
+
+Responses are stored in an in-memory LRU per worker, or in a SQLite file shared by the workers on
+one host, which also makes duplicates wait for a first request running in another worker.
+Server errors (5xx), streamed responses and bodies over the size limit are not stored, so
+repeating such a request runs the endpoint again.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.controller.blueprint.endpoint_options import endpoint_option, mark_endpoint
+from src.controller.dto.raw import SplicedJSONResponse
+from src.models import BadRequestError, ConflictError, ValidationError
+
+Handler = Callable[[Request], Coroutine[Any, Any, Response]]
+
+HEADER = "idempotency-key"
+REPLAYED_HEADER = "idempotent-replayed"
+MAX_KEY_LENGTH = 255
+
+DEFAULT_TTL = 86400.0
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_BODY_BYTES = 1048576
+DEFAULT_WAIT_TIMEOUT = 30.0
+
+STORES = ("memory", "sqlite")
+
+# Seconds between checks for a first request running in another worker
+_POLL_INTERVAL = 0.05
+
+
+@dataclass(frozen=True)
+class IdempotencyPolicy:
+    """Idempotency options of an endpoint, set by ``idempotent``"""
+
+    ttl: Optional[float] = None
+
+
+@dataclass
+class StoredResponse:
+    """A completed response and the fingerprint of the request it answered"""
+
+    fingerprint: str
+    status_code: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+    def to_response(self) -> Response:
+        response = Response(self.body, status_code=self.status_code)
+        response.raw_headers = list(self.headers) + [(REPLAYED_HEADER.encode(), b"true")]
+        return response
+
+
+def idempotent(ttl: Optional[float] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Mark an endpoint for Idempotency-Key handling.
+
+    Args:
+        ttl: Seconds a response is replayed, None for the ``idempotency_ttl`` setting
+
+    Returns:
+        A decorator returning the endpoint unchanged, apart from the idempotency policy
+    """
+
+    def decorator(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+        return mark_endpoint(endpoint, "__idempotency__", IdempotencyPolicy(ttl))
+
+    return decorator
+
+
+def idempotency_policy(endpoint: Optional[Callable[..., Any]]) -> Optional[IdempotencyPolicy]:
+    """The idempotency policy of an endpoint, None if it does not handle Idempotency-Key"""
+    policy: Optional[IdempotencyPolicy] = endpoint_option(endpoint, "__idempotency__")
+    return policy
+
+
+def _rendered_body(response: Response) -> Optional[bytes]:
+    """The complete body of a response, None if it is only produced while the response is sent"""
+    if isinstance(response, SplicedJSONResponse):
+        return b"".join(response.parts)
+    if type(response).__call__ is Response.__call__:
+        return bytes(response.body)
+    return None
+
+
+class IdempotencyStore(ABC):
+    """Storage of completed responses by idempotency key."""
+
+    # Number of responses kept, the least recently stored are dropped first
+    max_entries: int = DEFAULT_MAX_ENTRIES
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        """The unexpired response stored for a key"""
+
+    @abstractmethod
+    async def claim(self, key: str, timeout: float) -> bool:
+        """Reserve a key for a request about to run.
+
+        Args:
+            key: The idempotency key
+            timeout: Seconds after which the reservation lapses, should its request never complete
+
+        Returns:
+            False if the key is reserved by or stored for another request, which the caller waits for
+        """
+
+    @abstractmethod
+    async def renew(self, key: str, timeout: float) -> None:
+        """Extend the reservation of a key whose request is still running by another ``timeout`` seconds"""
+
+    @abstractmethod
+    async def put(self, key: str, response: StoredResponse, ttl: float) -> None:
+        """Store the response of a key, replacing its reservation"""
+
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        """Drop the reservation of a key whose request produced no storable response"""
+
+    async def close(self) -> None:
+        """Release the resources of the store"""
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """LRU of responses in this worker's memory; duplicates are coordinated in-process."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[StoredResponse, float]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        response, expires = item
+        if expires <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    async def claim(self, key: str, timeout: float) -> bool:
+        return True
+
+    async def renew(self, key: str, timeout: float) -> None:
+        pass
+
+    async def put(self, key: str, response: StoredResponse, ttl: float) -> None:
+        self._entries[key] = (response, time.time() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def release(self, key: str) -> None:
+        pass
+
+
+class SqliteIdempotencyStore(IdempotencyStore):
+    """Responses in a SQLite file, shared by all workers on a host.
+
+    A reservation is a row without a status; other workers see it and wait for the response. The
+    least recently stored entries beyond ``max_entries`` are dropped.
+    """
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        """Initialize the store, creating the database file if needed.
+
+        Args:
+            path: Path of the database file
+            max_entries: Number of responses kept
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            # Losing the last stored responses on power loss is acceptable, fsync on every request is not
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS idempotency ("
+                "key TEXT PRIMARY KEY, fingerprint TEXT, status INTEGER, headers TEXT, body BLOB, "
+                "expires REAL NOT NULL, stored REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS idempotency_stored ON idempotency (stored)")
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        return await run_in_threadpool(self._get, key)
+
+    async def claim(self, key: str, timeout: float) -> bool:
+        return await run_in_threadpool(self._claim, key, timeout)
+
+    async def renew(self, key: str, timeout: float) -> None:
+        await run_in_threadpool(
+            self._execute,
+            "UPDATE idempotency SET expires = ? WHERE key = ? AND status IS NULL",
+            (time.time() + timeout, key),
+        )
+
+    async def put(self, key: str, response: StoredResponse, ttl: float) -> None:
+        await run_in_threadpool(self._put, key, response, ttl)
+
+    async def release(self, key: str) -> None:
+        await run_in_threadpool(self._execute, "DELETE FROM idempotency WHERE key = ? AND status IS NULL", (key,))
+
+    async def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _get(self, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT fingerprint, status, headers, body FROM idempotency "
+                "WHERE key = ? AND status IS NOT NULL AND expires > ?",
+                (key, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        fingerprint, status, headers, body = row
+        return StoredResponse(
+            fingerprint, status, [(n.encode("latin-1"), v.encode("latin-1")) for n, v in json.loads(headers)], body
+        )
+
+    def _claim(self, key: str, timeout: float) -> bool:
+        now = time.time()
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.execute("DELETE FROM idempotency WHERE key = ? AND expires <= ?", (key, now))
+                cursor = self._connection.execute(
+                    "INSERT OR IGNORE INTO idempotency (key, expires, stored) VALUES (?, ?, ?)",
+                    (key, now + timeout, now),
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        return cursor.rowcount == 1
+
+    def _put(self, key: str, response: StoredResponse, ttl: float) -> None:
+        now = time.time()
+        headers = json.dumps([(n.decode("latin-1"), v.decode("latin-1")) for n, v in response.headers])
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO idempotency (key, fingerprint, status, headers, body, expires, stored) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, response.fingerprint, response.status_code, headers, response.body, now + ttl, now),
+                )
+                self._connection.execute("DELETE FROM idempotency WHERE expires <= ?", (now,))
+                self._connection.execute(
+                    "DELETE FROM idempotency WHERE key IN "
+                    "(SELECT key FROM idempotency ORDER BY stored DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def _execute(self, sql: str, parameters: Tuple[Any, ...]) -> None:
+        with self._lock:
+            self._connection.execute(sql, parameters)
+
+
+class IdempotencyManager:
+    """Replays stored responses for repeated idempotency keys, shared by all idempotent routes of a worker."""
+
+    def __init__(self, store: Optional[IdempotencyStore] = None) -> None:
+        self.store: IdempotencyStore = store or MemoryIdempotencyStore()
+        self.enabled = True
+        self.ttl = DEFAULT_TTL
+        self.max_body_bytes = DEFAULT_MAX_BODY_BYTES
+        self.wait_timeout = DEFAULT_WAIT_TIMEOUT
+        # Futures of the requests running in this worker, completed when their response is stored
+        self._running: Dict[str, "asyncio.Future[None]"] = {}
+
+    def configure(
+        self,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+        wait_timeout: float = DEFAULT_WAIT_TIMEOUT,
+        enabled: bool = True,
+    ) -> None:
+        """Apply new settings.
+
+        Args:
+            ttl: Default seconds a response is replayed
+            max_entries: Number of responses kept by the store
+            max_body_bytes: Larger responses are not stored
+            wait_timeout: Seconds a duplicate waits for the first request before failing with 409
+            enabled: Handle Idempotency-Key headers at all
+        """
+        self.ttl = ttl
+        self.store.max_entries = max_entries
+        self.max_body_bytes = max_body_bytes
+        self.wait_timeout = wait_timeout
+        self.enabled = enabled
+
+    def use_store(self, store: IdempotencyStore) -> None:
+        """Replace the store"""
+        self.store = store
+
+    def wrap(self, handler: Handler, route: str, ttl: Optional[float] = None) -> Handler:
+        """Handle the Idempotency-Key header of a route's requests.
+
+        Args:
+            handler: The route's request handler
+            route: Route template, part of the key and the metrics label
+            ttl: Seconds a response is replayed, None for the manager's default
+
+        Returns:
+            The idempotent request handler
+        """
+        executed = _requests.labels(route, "executed")
+        replayed = _requests.labels(route, "replayed")
+        rejected = _requests.labels(route, "rejected")
+
+        async def idempotent_handler(request: Request) -> Response:
+            idempotency_key = request.headers.get(HEADER)
+            if idempotency_key is None or not self.enabled:
+                return await handler(request)
+            if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+                rejected.inc()
+                raise BadRequestError(message=f"The Idempotency-Key header must have 1 to {MAX_KEY_LENGTH} characters")
+
+            # Keys are scoped per route and method; the fingerprint detects a key reused for another request
+            key = f"{request.method} {route} {idempotency_key}"
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(request.url.query.encode())
+            digest.update(b"?")
+            digest.update(await request.body())
+            fingerprint = digest.hexdigest()
+
+            stored = await self._wait_for_first(key)
+            if stored is not None:
+                if stored.fingerprint != fingerprint:
+                    rejected.inc()
+                    raise ValidationError(
+                        message="The Idempotency-Key was already used for a different request",
+                        code="idempotency_key_reused",
+                    )
+                replayed.inc()
+                return stored.to_response()
+
+            executed.inc()
+            running = asyncio.get_running_loop().create_future()
+            self._running[key] = running
+            stored_response = False
+            # The claim lapses after wait_timeout, so a crashed worker does not block the key; it is renewed
+            # while the request runs, so a slow first request is not run a second time by another worker
+            renewal = asyncio.create_task(self._keep_claimed(key))
+            try:
+                response = await handler(request)
+                body = _rendered_body(response)
+                if (
+                    response.status_code < 500
+                    and body is not None
+                    and len(body) <= self.max_body_bytes
+                    and response.background is None
+                ):
+                    stored = StoredResponse(fingerprint, response.status_code, list(response.raw_headers), body)
+                    await self.store.put(key, stored, self.ttl if ttl is None else ttl)
+                    stored_response = True
+                return response
+            finally:
+                renewal.cancel()
+                if not stored_response:
+                    await self.store.release(key)
+                del self._running[key]
+                running.set_result(None)
+
+        return idempotent_handler
+
+    async def _wait_for_first(self, key: str) -> Optional[StoredResponse]:
+        """The stored response of a key, waiting for a running first request; None if the caller runs first
+
+        Raises:
+            ConflictError: If the first request does not complete within ``wait_timeout``
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            stored = await self.store.get(key)
+            if stored is not None:
+                return stored
+
+            remaining = deadline - time.monotonic()
+            running = self._running.get(key)
+            if running is not None:
+                # First request runs in this worker; if it stores no response, the next one runs
+                try:
+                    await asyncio.wait_for(asyncio.shield(running), max(remaining, 0))
+                except asyncio.TimeoutError:
+                    raise self._still_running() from None
+                continue
+
+            if await self.store.claim(key, self.wait_timeout):
+                if key in self._running:
+                    # Another request of this worker claimed the key while the claim was made
+                    await self.store.release(key)
+                    continue
+                return None
+            if remaining <= 0:
+                raise self._still_running()
+            await asyncio.sleep(_POLL_INTERVAL)
+
+    async def _keep_claimed(self, key: str) -> None:
+        """Renew the claim of a running request before it lapses, until cancelled"""
+        while True:
+            await asyncio.sleep(self.wait_timeout / 3)
+            try:
+                await self.store.renew(key, self.wait_timeout)
+            except Exception:
+                logging.getLogger("api").exception("Cannot renew the idempotency claim of %s", key)
+
+    @staticmethod
+    def _still_running() -> ConflictError:
+        return ConflictError(
+            message="A request with this Idempotency-Key is still being processed", code="idempotency_key_in_use"
+        )
+
+
+def create_store(kind: str, path: str, max_entries: int) -> IdempotencyStore:
+    """Create the configured store, the in-memory store if the SQLite file cannot be opened"""
+    if kind == "sqlite":
+        try:
+            return SqliteIdempotencyStore(path, max_entries)
+        except sqlite3.Error:
+            logging.getLogger("api").exception("Cannot open the idempotency store %s, keeping keys in memory", path)
+    return MemoryIdempotencyStore(max_entries)
+
+
+_requests = Counter(
+    "http_idempotency_requests_total",
+    "Requests with an Idempotency-Key by outcome (executed, replayed or rejected)",
+    ["route", "result"],
+)
+
+# Shared by all idempotent routes, configured from the settings in configure_routes
+idempotency_manager = IdempotencyManager()
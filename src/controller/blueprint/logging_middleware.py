@@ -0,0 +1,40 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config.log_format import bind_request, flush_held_records, unbind_request
+
+
+class LoggingContextMiddleware:
+    """ASGI middleware that binds each HTTP request to the logging context.
+
+    Log records emitted while handling the request carry its path, and log sampling decides once
+    per request whether its records are kept. The records sampling dropped are written after all if
+    the request fails with a 5xx status or an exception.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 0
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        tokens = bind_request(scope["path"])
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            flush_held_records()
+            raise
+        else:
+            if status >= 500:
+                flush_held_records()
+        finally:
+            unbind_request(tokens)
@@ -0,0 +1,141 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+from prometheus_client import Counter, Histogram
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config.metrics import gauge
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Label for requests that match no route, so unknown paths cannot create new label values
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Raw paths whose route template is remembered for the in-flight gauge
+TEMPLATE_CACHE_SIZE = 1024
+
+
+class RequestMetrics:
+    """Prometheus metrics recorded per request (rate, errors, duration, sizes)."""
+
+    def __init__(self, latency_buckets: Sequence[float], size_buckets: Sequence[float]) -> None:
+        labels = ["method", "route"]
+        self.requests = Counter("http_requests_total", "HTTP requests by status class", labels + ["status_class"])
+        self.duration = Histogram(
+            "http_request_duration_seconds", "HTTP request duration", labels, buckets=latency_buckets
+        )
+        self.in_progress = gauge("http_requests_in_progress", "HTTP requests currently being handled", labels)
+        self.request_size = Histogram("http_request_size_bytes", "HTTP request body size", labels, buckets=size_buckets)
+        self.response_size = Histogram(
+            "http_response_size_bytes", "HTTP response body size", labels, buckets=size_buckets
+        )
+
+
+# Metrics can only be registered once per process, even if the application is created repeatedly
+_metrics: Optional[RequestMetrics] = None
+
+
+def _route_template(routes: Sequence[BaseRoute], scope: Scope) -> str:
+    """Find the template (e.g. ``/items/{item_id}``) of the route handling the request by matching all routes"""
+    partial: Optional[BaseRoute] = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+        if match == Match.PARTIAL and partial is None:
+            partial = route
+    if partial is not None:
+        # Route exists, but not for this method
+        return getattr(partial, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording RED metrics for every HTTP request.
+
+    Requests are labeled with the route template instead of the raw URL, which keeps the number
+    of label values bounded by the number of registered routes. The template is the one of the route
+    the router matched (``scope["route"]``). The in-flight gauge needs it before the router runs, so
+    the templates of recently seen paths are remembered; only unknown paths are matched against all
+    routes up front.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        size_buckets: Sequence[float] = DEFAULT_SIZE_BUCKETS,
+    ) -> None:
+        """Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application
+            latency_buckets: Histogram buckets for the request duration in seconds
+            size_buckets: Histogram buckets for request and response body sizes in bytes
+        """
+        global _metrics
+        self.app = app
+        if _metrics is None:
+            _metrics = RequestMetrics(latency_buckets, size_buckets)
+        self.metrics = _metrics
+        self._templates: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        key = (method, scope["path"])
+        route = self._templates.get(key)
+        if route is None:
+            route = _route_template(scope["app"].router.routes, scope)
+        root_path = scope.get("root_path", "")
+        request_size = 0
+        response_size = 0
+        status_code = 500
+
+        async def counting_receive() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Message) -> None:
+            nonlocal response_size, status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = self.metrics.in_progress.labels(method, route)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            duration = time.perf_counter() - start
+            in_progress.dec()
+            # Set by the router for full and partial (other method) matches, unless a middleware copied the scope;
+            # within a mounted app (whose root path is added to the scope) it is a route of that app
+            matched = scope.get("route")
+            if matched is not None and scope.get("root_path", "") == root_path:
+                route = getattr(matched, "path", UNMATCHED_ROUTE)
+            if route != UNMATCHED_ROUTE:
+                # Unknown paths are not remembered, so a scan of random URLs cannot evict the known ones
+                self._remember(key, route)
+            self.metrics.requests.labels(method, route, f"{status_code // 100}xx").inc()
+            self.metrics.duration.labels(method, route).observe(duration)
+            self.metrics.request_size.labels(method, route).observe(request_size)
+            self.metrics.response_size.labels(method, route).observe(response_size)
+
+    def _remember(self, key: Tuple[str, str], route: str) -> None:
+        self._templates[key] = route
+        self._templates.move_to_end(key)
+        if len(self._templates) > TEMPLATE_CACHE_SIZE:
+            self._templates.popitem(last=False)
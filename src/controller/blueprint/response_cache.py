@@ -0,0 +1,270 @@
+"""Response cache for endpoints whose output rarely changes.
+
+Endpoints opt in with the ``cached`` decorator, either where the method is defined or around the
+endpoint when adding the route::
+
+    @cached(ttl=300)
+    async def show_welcome(self) -> HTMLResponse:
+        ...
+
+    app.add_api_route(path="/info", endpoint=cached()(self.get_info), ...)
+
+Successful responses of GET requests are kept in a bounded LRU per worker, keyed by path and query
+string, and carry a strong ``ETag``. A request with a matching ``If-None-Match`` header is answered
+with 304, and a cached response is served without calling the endpoint, until it expires or the
+configuration is reloaded. Compressed variants are produced once per entry and encoding.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route, request_response
+
+from src.config.tracing import span
+from src.controller.blueprint.compression import (
+    DYNAMIC_LEVELS,
+    STATIC_LEVELS,
+    STATIC_MAX_SIZE,
+    add_vary_accept_encoding,
+    compress,
+    response_compressor,
+    variant_etag,
+)
+from src.controller.blueprint.endpoint_options import endpoint_option, mark_endpoint
+
+Handler = Callable[[Request], Coroutine[Any, Any, Response]]
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 60.0
+
+# Set per served variant
+_REPLACED_HEADERS = frozenset({b"content-length", b"etag", b"content-encoding"})
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Caching options of an endpoint, set by ``cached``"""
+
+    ttl: Optional[float] = None
+
+
+@dataclass
+class CachedResponse:
+    """A rendered response and its compressed variants, compressed once when first requested"""
+
+    body: bytes
+    status_code: int
+    headers: List[Tuple[bytes, bytes]]
+    etag: str
+    expires: float
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    async def variant(self, encoding: str) -> bytes:
+        """The body compressed with an encoding, at a high level since it is served many times"""
+        body = self.variants.get(encoding)
+        if body is None:
+            levels = STATIC_LEVELS if len(self.body) <= STATIC_MAX_SIZE else DYNAMIC_LEVELS
+            # Always in a worker thread: at these levels even bodies of a few KB take tens of milliseconds
+            body = await run_in_threadpool(compress, self.body, encoding, levels[encoding])
+            self.variants[encoding] = body
+        return body
+
+    def to_response(self, body: bytes, etag: str, encoding: Optional[str], vary: bool) -> Response:
+        response = Response(body, status_code=self.status_code)
+        response.raw_headers = [(name, value) for name, value in self.headers if name not in _REPLACED_HEADERS]
+        response.headers["content-length"] = str(len(body))
+        response.headers["etag"] = etag
+        if encoding is not None:
+            response.headers["content-encoding"] = encoding
+        if vary:
+            add_vary_accept_encoding(response.headers)
+        return response
+
+
+def cached(ttl: Optional[float] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Mark an endpoint for the response cache.
+
+    Args:
+        ttl: Seconds a response is served from the cache, None for the ``response_cache_ttl`` setting
+
+    Returns:
+        A decorator returning the endpoint unchanged, apart from the cache policy
+    """
+
+    def decorator(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+        return mark_endpoint(endpoint, "__response_cache__", CachePolicy(ttl))
+
+    return decorator
+
+
+def cache_policy(endpoint: Optional[Callable[..., Any]]) -> Optional[CachePolicy]:
+    """The cache policy of an endpoint, None if it is not cached"""
+    policy: Optional[CachePolicy] = endpoint_option(endpoint, "__response_cache__")
+    return policy
+
+
+def _strong_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of ``If-None-Match`` against an entity tag, as required for GET (RFC 9110)"""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def _not_modified(etag: str, vary: bool) -> Response:
+    response = Response(status_code=304, headers={"etag": etag})
+    if vary:
+        add_vary_accept_encoding(response.headers)
+    return response
+
+
+class ResponseCache:
+    """LRU of rendered responses with a time to live, shared by all cached routes of a worker."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Number of responses kept, the least recently used are evicted first
+            ttl: Default seconds a response is served
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = True
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        # Incremented when the cache is cleared, so responses computed before are not stored afterwards
+        self._generation = 0
+        # Cleared from the config watcher thread while requests read on the event loop
+        self._lock = threading.Lock()
+
+    def configure(self, max_entries: int, ttl: float, enabled: bool = True) -> None:
+        """Apply new settings, dropping all entries"""
+        with self._lock:
+            self.max_entries = max_entries
+            self.ttl = ttl
+            self.enabled = enabled
+            self._entries.clear()
+            self._generation += 1
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """The unexpired entry of a key, marked as most recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    @property
+    def generation(self) -> int:
+        """Number of times the cache has been cleared"""
+        return self._generation
+
+    def put(self, key: str, entry: CachedResponse, generation: Optional[int] = None) -> None:
+        """Store an entry, evicting the least recently used ones beyond ``max_entries``.
+
+        Args:
+            key: Cache key
+            entry: The rendered response
+            generation: ``generation`` when the response was computed; if the cache has been cleared
+                since, the entry is discarded
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def wrap(self, handler: Handler, route: str, ttl: Optional[float] = None, compress: bool = True) -> Handler:
+        """Serve a request handler's GET responses from the cache.
+
+        Args:
+            handler: The route's request handler
+            route: Route template, the metrics label
+            ttl: Seconds a response is served, None for the cache's default
+            compress: Serve compressed variants to clients accepting them
+
+        Returns:
+            The caching request handler
+        """
+        hits = _requests.labels(route, "hit")
+        misses = _requests.labels(route, "miss")
+
+        async def cached_handler(request: Request) -> Response:
+            if not self.enabled or request.method != "GET":
+                return await handler(request)
+
+            key = request.url.path + "?" + request.url.query
+            with span("cache"):
+                entry = self.get(key)
+            if entry is not None:
+                hits.inc()
+                return await respond(request, entry)
+
+            misses.inc()
+            generation = self._generation
+            response = await handler(request)
+            body = getattr(response, "body", None)
+            cacheable = (
+                response.status_code == 200 and response.background is None and "set-cookie" not in response.headers
+            )
+            if not cacheable or not isinstance(body, bytes):
+                return response
+
+            expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+            entry = CachedResponse(body, response.status_code, list(response.raw_headers), _strong_etag(body), expires)
+            self.put(key, entry, generation)
+            return await respond(request, entry)
+
+        async def respond(request: Request, entry: CachedResponse) -> Response:
+            content_type = Headers(raw=entry.headers).get("content-type")
+            vary = compress and response_compressor.eligible(content_type, len(entry.body))
+            accept_encoding = request.headers.get("accept-encoding")
+            encoding = response_compressor.select(accept_encoding, content_type, len(entry.body)) if vary else None
+            etag = entry.etag if encoding is None else variant_etag(entry.etag, encoding)
+
+            if_none_match = request.headers.get("if-none-match")
+            if if_none_match is not None and _etag_matches(if_none_match, etag):
+                return _not_modified(etag, vary)
+            body = entry.body if encoding is None else await entry.variant(encoding)
+            return entry.to_response(body, etag, encoding, vary)
+
+        return cached_handler
+
+    def cache_route(self, route: Route, ttl: Optional[float] = None) -> None:
+        """Serve a plain Starlette route (e.g. FastAPI's ``/openapi.json``) from the cache"""
+        route.app = request_response(self.wrap(route.endpoint, route.path, ttl))
+
+
+_requests = Counter(
+    "http_response_cache_requests_total", "Requests to cached routes by cache result (hit or miss)", ["route", "result"]
+)
+
+# Shared by all cached routes, configured from the settings in configure_routes
+response_cache = ResponseCache()
@@ -0,0 +1,110 @@
+"""JSON response classes with faster encoders.
+
+``json_response_class`` resolves the encoder name from the ``app_response_encoder`` setting (or a
+controller's ``response_encoder``) to a response class. orjson and msgspec are optional; if the
+configured package is missing, the standard library encoder is used.
+
+``render_model`` renders a pydantic model with a response class without FastAPI's ``jsonable_encoder``.
+
+``NDJSONStreamingResponse`` streams newline-delimited JSON while the request body is still being read.
+"""
+
+import logging
+from typing import Any, Type
+
+from pydantic import BaseModel
+from pydantic_core import to_json
+from starlette.requests import ClientDisconnect
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+try:
+    import orjson  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgspec  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None  # type: ignore[assignment]
+
+RESPONSE_ENCODERS = ("json", "orjson", "msgspec")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class MsgspecJSONResponse(JSONResponse):
+    """JSON response rendered with msgspec"""
+
+    _encoder = msgspec.json.Encoder() if msgspec is not None else None
+
+    def render(self, content: Any) -> bytes:
+        return self._encoder.encode(content)
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """Streams newline-delimited JSON, one chunk per line.
+
+    Unlike ``StreamingResponse`` it does not listen for a client disconnect on ``receive`` while
+    streaming, because the body iterator may still be consuming the request body from there. A
+    disconnect surfaces as a failing ``send`` instead. Each line is sent before the next item is
+    produced, so a slow client slows down the producer (backpressure).
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+def json_response_class(encoder: str) -> Type[JSONResponse]:
+    """Response class for a JSON encoder.
+
+    Args:
+        encoder: ``json``, ``orjson`` or ``msgspec``
+
+    Returns:
+        The response class, ``JSONResponse`` if the encoder's package is not installed
+    """
+    if encoder == "orjson":
+        if orjson is not None:
+            return ORJSONResponse
+        logging.getLogger("api").warning("orjson is not installed, falling back to the standard JSON encoder")
+    elif encoder == "msgspec":
+        if msgspec is not None:
+            return MsgspecJSONResponse
+        logging.getLogger("api").warning("msgspec is not installed, falling back to the standard JSON encoder")
+    elif encoder != "json":
+        raise ValueError(f"Unknown response encoder: {encoder}")
+    return JSONResponse
+
+
+def render_model(response_class: Type[Response], model: BaseModel, status_code: int, by_alias: bool = True) -> Response:
+    """Render a pydantic model with a response class.
+
+    The model is dumped to JSON compatible data by pydantic's serializer and rendered by the response class.
+    For ``JSONResponse`` itself, pydantic encodes the JSON directly, which gives the same compact UTF-8 output
+    several times faster than the standard library encoder.
+
+    Args:
+        response_class: Response class of the route
+        model: The model to render
+        status_code: Status code of the response
+        by_alias: Use the field aliases as keys
+
+    Returns:
+        The response
+    """
+    if response_class is JSONResponse:
+        return Response(to_json(model, by_alias=by_alias), status_code=status_code, media_type=JSONResponse.media_type)
+    return response_class(model.model_dump(mode="json", by_alias=by_alias), status_code=status_code)
@@ -0,0 +1,147 @@
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Coroutine, List, Optional
+
+from fastapi import Request, Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.routing import APIRoute
+
+from src.config.tracing import current_trace, span
+from src.controller.blueprint.compression import compression_allowed
+from src.controller.blueprint.idempotency import idempotency_manager, idempotency_policy
+from src.controller.blueprint.response_cache import cache_policy, response_cache
+from src.controller.blueprint.responses import render_model
+from src.controller.dto.base import BaseResponseDTO
+
+# Start and end of the endpoint call of the current request, written by the wrapped endpoint
+_endpoint_times: ContextVar[Optional[List[float]]] = ContextVar("endpoint_times", default=None)
+
+
+def _timed_call(call: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap an endpoint, so its execution is recorded as the ``handler`` span"""
+    if inspect.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def timed_async_call(*args: Any, **kwargs: Any) -> Any:
+            times = _endpoint_times.get()
+            if times is None:
+                return await call(*args, **kwargs)
+            times.append(time.perf_counter())
+            try:
+                with span("handler"):
+                    return await call(*args, **kwargs)
+            finally:
+                times.append(time.perf_counter())
+
+        return timed_async_call
+
+    @functools.wraps(call)
+    def timed_call(*args: Any, **kwargs: Any) -> Any:
+        # Sync endpoints run in a thread pool with a copy of the context, the list itself is shared
+        times = _endpoint_times.get()
+        if times is None:
+            return call(*args, **kwargs)
+        times.append(time.perf_counter())
+        try:
+            with span("handler"):
+                return call(*args, **kwargs)
+        finally:
+            times.append(time.perf_counter())
+
+    return timed_call
+
+
+def _trusted_call(call: Callable[..., Any], route: APIRoute) -> Callable[..., Any]:
+    """Wrap an endpoint, so trusted response DTOs are rendered directly instead of validated again by FastAPI"""
+    model = route.response_model
+    filtered = (
+        route.response_model_include is not None
+        or route.response_model_exclude is not None
+        or route.response_model_exclude_unset
+        or route.response_model_exclude_defaults
+        or route.response_model_exclude_none
+    )
+    if not (inspect.isclass(model) and issubclass(model, BaseResponseDTO) and model.trusted) or filtered:
+        return call
+
+    status_code = route.status_code or 200
+    by_alias = route.response_model_by_alias
+    # The class selected for the route (e.g. by app_response_encoder), so the DTO is rendered by its encoder
+    response_class = route.response_class
+    if isinstance(response_class, DefaultPlaceholder):
+        response_class = response_class.value
+
+    def render(result: Any) -> Any:
+        # Subclasses may have more fields than the response model, FastAPI has to filter those
+        if type(result) is model:
+            return render_model(response_class, result, status_code, by_alias)
+        return result
+
+    if inspect.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def trusted_async_call(*args: Any, **kwargs: Any) -> Any:
+            return render(await call(*args, **kwargs))
+
+        return trusted_async_call
+
+    @functools.wraps(call)
+    def trusted_call(*args: Any, **kwargs: Any) -> Any:
+        return render(call(*args, **kwargs))
+
+    return trusted_call
+
+
+class BlueprintRoute(APIRoute):
+    """Route class of all controller routes.
+
+    Splits the time FastAPI spends on a request into spans of the current trace: ``dto`` (reading,
+    parsing and validating the request), ``handler`` (the endpoint) and ``serialize`` (validating
+    and rendering the response).
+
+    Endpoints whose response model is a trusted ``BaseResponseDTO`` return the DTO rendered by the route's
+    response class with ``render_model``, which skips FastAPI's response validation and ``jsonable_encoder``.
+
+    Endpoints marked with ``cached`` are served from the response cache, and endpoints marked with
+    ``idempotent`` replay their responses to requests repeating an ``Idempotency-Key``.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        call = self.dependant.call
+        generator = inspect.isgeneratorfunction(call) or inspect.isasyncgenfunction(call)
+        if call is not None and not generator and not getattr(call, "__blueprint_route__", False):
+            # Rendering a trusted DTO happens after the handler span, it is part of "serialize"
+            wrapped = _trusted_call(_timed_call(call), self)
+            wrapped.__blueprint_route__ = True  # type: ignore[attr-defined]
+            self.dependant.call = wrapped
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            trace = current_trace()
+            if trace is None:
+                return await handler(request)
+
+            times: List[float] = []
+            token = _endpoint_times.set(times)
+            start = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                end = time.perf_counter()
+                _endpoint_times.reset(token)
+                trace.add("dto", start, times[0] if times else end)
+                if len(times) == 2:
+                    trace.add("serialize", times[1], end)
+
+        route_handler: Callable[[Request], Coroutine[Any, Any, Response]] = timed_handler
+        policy = cache_policy(self.endpoint)
+        if policy is not None:
+            route_handler = response_cache.wrap(
+                route_handler, self.path, policy.ttl, compression_allowed(self.endpoint)
+            )
+        idempotency = idempotency_policy(self.endpoint)
+        if idempotency is not None:
+            route_handler = idempotency_manager.wrap(route_handler, self.path, idempotency.ttl)
+        return route_handler
@@ -5,7 +5,9 @@ from fastapi.routing import APIRoute, Mount
 from starlette.responses import HTMLResponse
 
 from src.config.config import ConfigurationManager
-from src.controller.base_controller import BaseController
+from src.config.params import ConfigParameter
+from src.controller.blueprint.base_controller import BaseController
+from src.controller.blueprint.response_cache import cached
 
 
 class StartController(BaseController):
@@ -14,6 +16,7 @@ class StartController(BaseController):
         super().__init__(settings)
         self.logger = logging.getLogger("api.start")
 
+    @cached()
     async def show_welcome(self) -> HTMLResponse:
         """
         Shows a simple welcome screen explaining what this service does
@@ -39,9 +42,10 @@ class StartController(BaseController):
         routes.sort()
 
         # Get app info from settings
-        app_name = self.settings.get_config("app_name", "FastAPI Application")
-        app_description = self.settings.get_config("app_description", "")
-        app_version = self.settings.get_config("app_version", "0.1.0")
+        snapshot = self.settings.snapshot
+        app_name = snapshot.get(ConfigParameter.APP_NAME, "FastAPI Application")
+        app_description = snapshot.get(ConfigParameter.APP_DESCRIPTION, "")
+        app_version = snapshot.get(ConfigParameter.APP_VERSION, "0.1.0")
 
         html_content = f"""
             <html>
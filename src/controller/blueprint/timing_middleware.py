@@ -0,0 +1,60 @@
+import time
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config.tracing import OTLPTraceExporter, end_trace, start_trace
+
+
+class TimingMiddleware:
+    """ASGI middleware that traces every HTTP request.
+
+    The spans recorded while handling a request are returned in the ``Server-Timing`` header and,
+    if an exporter is given, exported once the response has been sent.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True, exporter: Optional[OTLPTraceExporter] = None) -> None:
+        """Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application
+            server_timing: Add the ``Server-Timing`` header to responses
+            exporter: Exporter for finished traces, None to disable export
+        """
+        self.app = app
+        self.server_timing = server_timing
+        self.exporter = exporter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace, token = start_trace()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_trace(token)
+            if self.exporter is not None:
+                # The router stores the matched route in the scope; the template keeps span names bounded
+                route = getattr(scope.get("route"), "path", None)
+                attributes = {
+                    "http.request.method": scope["method"],
+                    "url.path": scope["path"],
+                    "http.response.status_code": status_code,
+                }
+                if route is not None:
+                    attributes["http.route"] = route
+                name = f"{scope['method']} {route}" if route else scope["method"]
+                self.exporter.export(trace, name, attributes, time.perf_counter())
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -18,3 +18,16 @@ class InfoResponse(BaseModel):
 
 class LogsResponse(BaseModel):
     logs: List[str] = Field(description="Recent log entries", default_factory=list)
+    cursor: Optional[int] = Field(
+        description="Byte offset to pass as cursor to read older entries, null if the start of the log was reached",
+        default=None,
+    )
+    segment: Optional[int] = Field(
+        description="Log segment to pass along with the cursor, 0 is the current file and 1.. are rotated files",
+        default=None,
+    )
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool = Field(description="Indicates if the service is ready to receive traffic")
+    reason: str = Field(description="Reason why the service is not ready", default="")
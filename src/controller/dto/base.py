@@ -2,16 +2,37 @@
 
 This module provides base classes for DTOs with common functionality
 for converting between DTOs and domain models.
+
+Besides whole objects, DTOs can be converted as streams of newline-delimited JSON (NDJSON):
+``BaseRequestDTO.from_ndjson_stream`` parses a request body item by item, and
+``BaseResponseDTO.from_domain_stream`` together with ``ndjson_lines`` renders the response item by
+item, so memory use does not depend on the length of the stream.
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Generic, Optional, Type, TypeVar
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    ClassVar,
+    Dict,
+    Generic,
+    Optional,
+    Self,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from pydantic import BaseModel
+from pydantic import ValidationError as PydanticValidationError
+
+from src.models.blueprint.errors import ErrorDetail
 
 # Type variables for domain model types
 D = TypeVar("D")  # Domain type
-R = TypeVar("R")  # Request DTO type
+R = TypeVar("R", bound="BaseRequestDTO[Any]")  # Request DTO type
 S = TypeVar("S")  # Response DTO type
 
 
@@ -31,16 +52,83 @@ class BaseRequestDTO(BaseModel, ABC, Generic[D]):
         """
         raise NotImplementedError("Subclasses must implement to_domain")
 
+    @classmethod
+    async def from_ndjson_stream(
+        cls: Type[R], chunks: AsyncIterable[bytes], max_line_bytes: int = 1048576
+    ) -> AsyncIterator[Union[R, ErrorDetail]]:
+        """Parse a stream of NDJSON chunks into request DTOs, one line at a time.
+
+        Only the current line is buffered. Invalid lines and lines longer than ``max_line_bytes``
+        are returned as errors, so one bad line does not end the stream. Empty lines are skipped.
+
+        Args:
+            chunks: The raw body chunks, e.g. ``request.stream()``
+            max_line_bytes: Maximum size of a single line
+
+        Yields:
+            A request DTO per valid line, an ErrorDetail per invalid line
+        """
+        buffer = bytearray()
+        line_number = 0  # Number of the line being read, 1-based
+        skipping = False  # The current line exceeded the limit and is dropped up to its end
+
+        def parse(line: bytes) -> Union[R, ErrorDetail]:
+            try:
+                return cls.model_validate_json(line)
+            except PydanticValidationError as e:
+                errors = e.errors(include_url=False, include_context=False, include_input=False)
+                return ErrorDetail(
+                    code="validation_error", message="Invalid line", details={"line": line_number, "errors": errors}
+                )
+
+        def too_long() -> ErrorDetail:
+            return ErrorDetail(
+                code="payload_too_large", message=f"Line exceeds {max_line_bytes} bytes", details={"line": line_number}
+            )
+
+        async for chunk in chunks:
+            buffer += chunk
+            start = 0
+            while (end := buffer.find(b"\n", start)) >= 0:
+                line_number += 1
+                if skipping:
+                    skipping = False
+                elif end - start > max_line_bytes:
+                    yield too_long()
+                elif buffer[start:end].strip():
+                    yield parse(bytes(buffer[start:end]))
+                start = end + 1
+            del buffer[:start]
+
+            if not skipping and len(buffer) > max_line_bytes:
+                # Report the line now; its end has not arrived yet and is skipped without buffering
+                line_number += 1
+                yield too_long()
+                line_number -= 1
+                skipping = True
+            if skipping:
+                buffer.clear()
+
+        if buffer.strip() and not skipping:
+            line_number += 1
+            yield parse(bytes(buffer))
+
 
 class BaseResponseDTO(BaseModel, ABC, Generic[D]):
     """Base class for all response DTOs.
 
     Response DTOs are used to convert domain models to API responses.
+
+    Set ``trusted = True`` on subclasses whose instances are always built through validation (e.g. by
+    ``from_domain``). Endpoints returning a trusted DTO as their response model serialize it directly,
+    without FastAPI validating the response again.
     """
 
+    trusted: ClassVar[bool] = False
+
     @classmethod
     @abstractmethod
-    def from_domain(cls: Type["BaseResponseDTO"], domain_obj: D) -> "BaseResponseDTO":
+    def from_domain(cls, domain_obj: D) -> Self:
         """Create a response DTO from a domain model object.
 
         This is a factory method that creates a new response DTO instance
@@ -56,7 +144,7 @@ class BaseResponseDTO(BaseModel, ABC, Generic[D]):
         raise NotImplementedError("Subclasses must implement from_domain")
 
     @classmethod
-    def from_domain_optional(cls: Type["BaseResponseDTO"], domain_obj: Optional[D]) -> Optional["BaseResponseDTO"]:
+    def from_domain_optional(cls, domain_obj: Optional[D]) -> Optional[Self]:
         """Safely create a response DTO from an optional domain object.
 
         This is a convenience method that handles the case where the domain object
@@ -73,7 +161,7 @@ class BaseResponseDTO(BaseModel, ABC, Generic[D]):
         return cls.from_domain(domain_obj)
 
     @classmethod
-    def from_domain_list(cls: Type["BaseResponseDTO"], domain_objs: list[D]) -> list["BaseResponseDTO"]:
+    def from_domain_list(cls, domain_objs: Sequence[D]) -> list[Self]:
         """Convert a list of domain objects to a list of response DTOs.
 
         This is a convenience method that converts a list of domain objects
@@ -88,7 +176,7 @@ class BaseResponseDTO(BaseModel, ABC, Generic[D]):
         return [cls.from_domain(obj) for obj in domain_objs]
 
     @classmethod
-    def from_domain_dict(cls: Type["BaseResponseDTO"], domain_objs: Dict[Any, D]) -> Dict[Any, "BaseResponseDTO"]:
+    def from_domain_dict(cls, domain_objs: Dict[Any, D]) -> Dict[Any, Self]:
         """Convert a dictionary of domain objects to a dictionary of response DTOs.
 
         This is a convenience method that converts a dictionary of domain objects
@@ -101,3 +189,40 @@ class BaseResponseDTO(BaseModel, ABC, Generic[D]):
             Dictionary mapping the same keys to new response DTO instances
         """
         return {k: cls.from_domain(v) for k, v in domain_objs.items()}
+
+    @classmethod
+    async def from_domain_stream(
+        cls, domain_objs: AsyncIterable[Union[D, ErrorDetail]]
+    ) -> AsyncIterator[Union[Self, ErrorDetail]]:
+        """Convert a stream of domain objects to a stream of response DTOs.
+
+        This is the streaming counterpart of ``from_domain_list``. Objects are converted one at a
+        time as they are consumed, so the stream is never held in memory. Error details (e.g. of
+        invalid request lines) are passed through unchanged.
+
+        Args:
+            domain_objs: Async iterable of domain model objects
+
+        Yields:
+            A response DTO per domain object
+        """
+        async for obj in domain_objs:
+            yield obj if isinstance(obj, ErrorDetail) else cls.from_domain(obj)
+
+
+async def ndjson_lines(items: AsyncIterable[Union[BaseModel, ErrorDetail]]) -> AsyncIterator[bytes]:
+    """Render a stream of DTOs as NDJSON lines.
+
+    Error details are rendered as ``{"error": {...}}`` lines.
+
+    Args:
+        items: Async iterable of DTOs
+
+    Yields:
+        One encoded JSON line per item
+    """
+    async for item in items:
+        if isinstance(item, ErrorDetail):
+            yield b'{"error":' + item.model_dump_json(exclude_none=True).encode("utf-8") + b"}\n"
+        else:
+            yield item.model_dump_json().encode("utf-8") + b"\n"
@@ -3,12 +3,14 @@
 This module contains the request and response DTOs for the echo endpoint.
 """
 
+import json
 from datetime import datetime
-from typing import Any, Dict, Optional, Union
+from typing import Any, ClassVar, Dict, List, Optional, Union
 
-from pydantic import Field
+from pydantic import BaseModel, Field
 
-from src.models.domain import EchoMessage
+from src.models.blueprint.errors import ErrorDetail
+from src.models.domain import EchoMessage, RawEchoMessage
 
 from .base import BaseRequestDTO, BaseResponseDTO
 
@@ -35,13 +37,16 @@ class EchoRequest(BaseRequestDTO[Dict[str, Any]]):
         return {"data": self.data, "metadata": self.metadata or {}}
 
 
-class EchoResponse(BaseResponseDTO[Dict[str, Any]]):
+class EchoResponse(BaseResponseDTO[Union[Dict[str, Any], EchoMessage]]):
     """
     Response DTO for the echo endpoint.
 
     Returns the input data along with processing information.
     """
 
+    # Always constructed (and validated) by from_domain
+    trusted: ClassVar[bool] = True
+
     # Echo back the input data
     input_data: Dict[str, Any] = Field(description="The original input data that was received")
 
@@ -77,3 +82,70 @@ class EchoResponse(BaseResponseDTO[Dict[str, Any]]):
                 processed_timestamp=domain_obj.get("processed_timestamp", datetime.utcnow().isoformat()),
                 up_timestamp=domain_obj.get("service_start_time", datetime.utcnow().isoformat()),
             )
+
+    @classmethod
+    def render_raw(cls, domain_obj: RawEchoMessage) -> List[bytes]:
+        """Render a raw echo message as the parts of an EchoResponse JSON document.
+
+        The payload bytes are one of the parts, so they are sent without being copied.
+
+        Args:
+            domain_obj: The raw echo message
+
+        Returns:
+            List of byte strings that together form the JSON document
+        """
+        envelope = json.dumps(
+            {
+                "processed": domain_obj.is_processed,
+                "processed_timestamp": domain_obj.processed_timestamp.isoformat(),
+                "up_timestamp": domain_obj.service_start_time.isoformat(),
+            },
+            separators=(",", ":"),
+        )
+        return [b'{"input_data":', domain_obj.data, b"," + envelope[1:].encode("utf-8")]
+
+
+class EchoBatchItem(BaseModel):
+    """Outcome of one item of a batch echo request: either its response or its error."""
+
+    index: int = Field(description="Position of the item in the request")
+    result: Optional[EchoResponse] = Field(default=None, description="The echo response, if the item succeeded")
+    error: Optional[ErrorDetail] = Field(default=None, description="The error, if the item failed")
+
+
+class EchoBatchResponse(BaseResponseDTO[List[Union[EchoMessage, ErrorDetail]]]):
+    """
+    Response DTO for the batch echo endpoint.
+
+    Contains one entry per request item, in request order.
+    """
+
+    # Always constructed (and validated) by from_domain
+    trusted: ClassVar[bool] = True
+
+    items: List[EchoBatchItem] = Field(description="Outcome of every item, in request order")
+    succeeded: int = Field(description="Number of items processed successfully")
+    failed: int = Field(description="Number of items that failed")
+
+    @classmethod
+    def from_domain(cls, domain_obj: List[Union[EchoMessage, ErrorDetail]]) -> "EchoBatchResponse":
+        """Create an EchoBatchResponse from the outcomes of the batch items.
+
+        Args:
+            domain_obj: Echo message or error of every item, in request order
+
+        Returns:
+            EchoBatchResponse: A new EchoBatchResponse instance
+        """
+        messages = [outcome for outcome in domain_obj if isinstance(outcome, EchoMessage)]
+        responses = iter(EchoResponse.from_domain_list(messages))
+        items = [
+            (
+                EchoBatchItem(index=index, error=outcome)
+                if isinstance(outcome, ErrorDetail)
+                else EchoBatchItem(index=index, result=next(responses))
+            )
+            for index, outcome in enumerate(domain_obj)
+        ]
+        return cls(items=items, succeeded=len(messages), failed=len(domain_obj) - len(messages))
@@ -0,0 +1,219 @@
+"""Raw JSON passthrough helpers.
+
+For endpoints that return (parts of) the request body unchanged, parsing the body into DTOs
+copies the whole JSON tree several times. These helpers only check that the body is a well-formed
+JSON object, optionally with members that are objects themselves, and splice the original bytes into
+the response, so a request needs memory for roughly one copy of its payload. Nested values are not
+validated. ``project_json_object`` gives the body the shape a DTO would, e.g. default members and no
+extra ones, copying only the members when the body does not have that shape already.
+"""
+
+import json
+from typing import Any, Dict, Optional, Sequence
+
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from src.models import PayloadTooLargeError
+
+try:
+    import msgspec  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None  # type: ignore[assignment]
+
+try:
+    import orjson  # type: ignore[import]
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+_WHITESPACE = b" \t\r\n"
+
+
+def _json_error(message: str) -> RequestValidationError:
+    """Validation error in the format FastAPI uses for malformed JSON bodies"""
+    return RequestValidationError(
+        [{"type": "json_invalid", "loc": ("body",), "msg": "JSON decode error", "input": {}, "ctx": {"error": message}}]
+    )
+
+
+def _member_error(error_type: str, member: str, message: str) -> RequestValidationError:
+    """Validation error for a member of the body, in the format of FastAPI's body validation"""
+    return RequestValidationError([{"type": error_type, "loc": ("body", member), "msg": message, "input": None}])
+
+
+def _is_object(value: Any) -> bool:
+    if msgspec is not None and isinstance(value, msgspec.Raw):
+        return bytes(memoryview(value)[:1]) == b"{"
+    return isinstance(value, dict)
+
+
+def _is_null(value: Any) -> bool:
+    if msgspec is not None and isinstance(value, msgspec.Raw):
+        return bytes(memoryview(value)[:5]) == b"null"
+    return value is None
+
+
+def _raw_json(value: Any) -> bytes:
+    """JSON text of a member returned by ``validate_json_object``"""
+    if msgspec is not None and isinstance(value, msgspec.Raw):
+        return bytes(value)
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def validate_json_object(
+    body: bytes, required: Sequence[str] = (), optional: Sequence[str] = (), nullable: Sequence[str] = ()
+) -> Dict[str, Any]:
+    """Check that a body is a well-formed JSON object without keeping a parsed copy.
+
+    msgspec validates without building any objects below the top level; without it, the body is
+    parsed with orjson or the standard library.
+
+    Args:
+        body: The raw request body
+        required: Members that must be present and JSON objects
+        optional: Members that must be JSON objects if present
+        nullable: Members that must be JSON objects or null if present
+
+    Returns:
+        The top-level members, for ``project_json_object``; unparsed slices of the body with msgspec
+
+    Raises:
+        RequestValidationError: If the body is not a well-formed JSON object or a member has the wrong type
+    """
+    members: Dict[str, Any]
+    try:
+        if msgspec is not None:
+            # Raw keeps the members as slices of the body instead of decoding them
+            members = msgspec.json.decode(body, type=Dict[str, msgspec.Raw])
+        elif orjson is not None:
+            members = orjson.loads(body)
+        else:
+            members = json.loads(body)
+    except ValueError as e:
+        raise _json_error(str(e))
+    if not body.lstrip(_WHITESPACE).startswith(b"{"):
+        raise _json_error("Expected a JSON object")
+
+    for member in (*required, *optional, *nullable):
+        if member not in members:
+            if member in required:
+                raise _member_error("missing", member, "Field required")
+        elif not (_is_object(members[member]) or (member in nullable and _is_null(members[member]))):
+            raise _member_error("dict_type", member, "Input should be a valid dictionary")
+    return members
+
+
+def project_json_object(body: bytes, members: Dict[str, Any], defaults: Dict[str, bytes]) -> bytes:
+    """A JSON object with exactly the members in ``defaults``, taken from a body checked by ``validate_json_object``.
+
+    Absent and null members get their default JSON text, other members of the body are left out. If the
+    body already has exactly these members and none of them is null, it is returned as is, without a copy.
+
+    Args:
+        body: The checked body
+        members: The members ``validate_json_object`` returned for it
+        defaults: JSON text of every member of the result, used when it is absent or null
+
+    Returns:
+        The JSON object
+    """
+    if members.keys() == defaults.keys() and not any(_is_null(value) for value in members.values()):
+        return body
+    parts = []
+    for name, default in defaults.items():
+        value = members.get(name)
+        text = default if value is None or _is_null(value) else _raw_json(value)
+        parts.append(json.dumps(name).encode("utf-8") + b":" + text)
+    return b"{" + b",".join(parts) + b"}"
+
+
+async def read_body(request: Request, max_bytes: int) -> bytes:
+    """Read a request body, rejecting it as soon as it exceeds a size limit.
+
+    Args:
+        request: The incoming request
+        max_bytes: Maximum body size in bytes
+
+    Returns:
+        The body
+
+    Raises:
+        PayloadTooLargeError: If the body is larger than ``max_bytes``
+    """
+    too_large = PayloadTooLargeError(details={"max_bytes": max_bytes})
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > max_bytes:
+        raise too_large
+
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def parse_json(body: bytes) -> Any:
+    """Parse a JSON body with the fastest available parser.
+
+    Raises:
+        RequestValidationError: If the body is not well-formed JSON
+    """
+    try:
+        if orjson is not None:
+            return orjson.loads(body)
+        return json.loads(body)
+    except ValueError as e:
+        raise _json_error(str(e))
+
+
+async def read_json_object(
+    request: Request, required: Sequence[str] = (), optional: Sequence[str] = (), nullable: Sequence[str] = ()
+) -> bytes:
+    """Read a request body and check that it is a well-formed JSON object.
+
+    Args:
+        request: The incoming request
+        required: Members that must be present and JSON objects
+        optional: Members that must be JSON objects if present
+        nullable: Members that must be JSON objects or null if present
+
+    Returns:
+        The unchanged body
+    """
+    body = await request.body()
+    validate_json_object(body, required, optional, nullable)
+    return body
+
+
+class SplicedJSONResponse(Response):
+    """JSON response sent as a sequence of byte strings, without joining them into one buffer."""
+
+    media_type = "application/json"
+
+    def __init__(self, parts: Sequence[bytes], status_code: int = 200, headers: Optional[dict] = None) -> None:
+        """Initialize the response.
+
+        Args:
+            parts: Byte strings that together form the JSON document
+            status_code: HTTP status code
+            headers: Additional response headers
+        """
+        self.parts = parts
+        super().__init__(content=None, status_code=status_code, headers=headers, media_type=self.media_type)
+        self.headers["content-length"] = str(sum(len(part) for part in parts))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        for index, part in enumerate(self.parts):
+            await send({"type": "http.response.body", "body": part, "more_body": index < len(self.parts) - 1})
+        if not self.parts:
+            await send({"type": "http.response.body", "body": b""})
+        if self.background is not None:
+            await self.background()
@@ -1,11 +1,29 @@
+import asyncio
 import logging
+import math
+from typing import Any, AsyncIterator, List, Union
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import ValidationError as PydanticValidationError
+from starlette.concurrency import run_in_threadpool
 
-from src.config import ConfigurationManager
+from src.config import ConfigParameter, ConfigurationManager
+from src.config.tracing import span
 from src.controller.blueprint import BaseController
-from src.controller.dto.echo import EchoRequest, EchoResponse
-from src.models import BaseAPIError
+from src.controller.blueprint.idempotency import idempotent
+from src.controller.blueprint.responses import NDJSONStreamingResponse
+from src.controller.dto.base import ndjson_lines
+from src.controller.dto.echo import EchoBatchResponse, EchoRequest, EchoResponse
+from src.controller.dto.raw import (
+    SplicedJSONResponse,
+    parse_json,
+    project_json_object,
+    read_body,
+    validate_json_object,
+)
+from src.models import BaseAPIError, PayloadTooLargeError, ValidationError
+from src.models.blueprint.errors import ErrorDetail
+from src.models.domain import EchoMessage
 from src.services.echo_service import EchoService
 
 
@@ -39,10 +57,13 @@ class EchoController(BaseController):
             self.logger.info("Processing echo request")
 
             # Process using domain model
-            result = self.service.process_input(echo_input.to_domain())
+            with span("to_domain"):
+                domain_input = echo_input.to_domain()
+            result = await self.service.process_input_batched(domain_input)
 
             self.logger.info("Successfully processed echo request")
-            return EchoResponse.from_domain(result)
+            with span("from_domain"):
+                return EchoResponse.from_domain(result)
 
         except BaseAPIError as e:
             self.logger.exception("API error processing echo request")
@@ -55,6 +76,143 @@ class EchoController(BaseController):
                 detail="An unexpected error occurred while processing your request",
             )
 
+    async def echo_passthrough(self, request: Request) -> SplicedJSONResponse:
+        """Handle an echo request in passthrough mode.
+
+        The body is only checked to be a well-formed JSON object with an optional object ``data`` and an
+        optional object (or null) ``metadata``, and is returned as ``input_data`` without being parsed into
+        DTOs or domain objects. Nested values are not checked. The result has the shape of the parsed mode:
+        absent members and a null ``metadata`` become ``{}`` and other members are dropped; a body that
+        already has this shape is returned byte for byte.
+
+        Args:
+            request: The incoming request
+
+        Returns:
+            SplicedJSONResponse: The echo response
+
+        Raises:
+            HTTPException: If there's an error processing the request
+        """
+        with span("read_body"):
+            body = await request.body()
+            members = validate_json_object(body, optional=("data",), nullable=("metadata",))
+            body = project_json_object(body, members, {"data": b"{}", "metadata": b"{}"})
+
+        try:
+            self.logger.info("Processing echo request in passthrough mode")
+            result = self.service.process_raw(body)
+            self.logger.info("Successfully processed echo request")
+            return SplicedJSONResponse(EchoResponse.render_raw(result))
+
+        except BaseAPIError as e:
+            self.logger.exception("API error processing echo request")
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+
+        except Exception:
+            self.logger.exception("Unexpected error processing echo request")
+            raise HTTPException(
+                status_code=500,
+                detail="An unexpected error occurred while processing your request",
+            )
+
+    async def echo_batch(self, request: Request) -> EchoBatchResponse:
+        """Handle a batch of echo requests.
+
+        Every item is validated and processed on its own, so invalid items are reported as errors
+        without failing the rest of the batch. Items are processed in up to ``echo_batch_concurrency``
+        chunks in parallel.
+
+        Args:
+            request: The incoming request with a JSON array of echo requests
+
+        Returns:
+            EchoBatchResponse: One entry per item, in request order
+
+        Raises:
+            PayloadTooLargeError: If the batch exceeds the configured size limits
+            ValidationError: If the body is not a JSON array
+        """
+        snapshot = self.settings.snapshot
+        max_items = int(snapshot.get(ConfigParameter.ECHO_BATCH_MAX_ITEMS, 1000))
+        max_bytes = int(snapshot.get(ConfigParameter.ECHO_BATCH_MAX_BYTES, 10485760))
+        concurrency = max(int(snapshot.get(ConfigParameter.ECHO_BATCH_CONCURRENCY, 4)), 1)
+
+        with span("read_body"):
+            items = parse_json(await read_body(request, max_bytes))
+        if not isinstance(items, list):
+            raise ValidationError(message="The request body must be a JSON array of echo requests")
+        if len(items) > max_items:
+            raise PayloadTooLargeError(message=f"A batch may contain at most {max_items} items")
+
+        self.logger.info("Processing echo batch of %d items", len(items))
+        chunk_size = max(math.ceil(len(items) / concurrency), 1)
+        bounds = range(0, len(items) + chunk_size, chunk_size)
+        chunks = [items[start:end] for start, end in zip(bounds, bounds[1:])]
+        processed = await asyncio.gather(*(run_in_threadpool(self._process_batch_chunk, chunk) for chunk in chunks))
+
+        outcomes = [outcome for chunk in processed for outcome in chunk]
+        with span("from_domain"):
+            return EchoBatchResponse.from_domain(outcomes)
+
+    async def echo_stream(self, request: Request) -> NDJSONStreamingResponse:
+        """Handle a stream of echo requests.
+
+        The body is read as NDJSON, one echo request per line, and every line is answered with one
+        response line as soon as it has been read. Invalid lines are answered with an error line
+        without ending the stream. Only the current line is held in memory.
+
+        Args:
+            request: The incoming request with an ``application/x-ndjson`` body
+
+        Returns:
+            NDJSONStreamingResponse: One echo response or error per line, in request order
+        """
+        max_line_bytes = int(self.settings.get_config(ConfigParameter.ECHO_STREAM_MAX_LINE_BYTES, 1048576))
+        self.logger.info("Processing echo stream")
+        requests = EchoRequest.from_ndjson_stream(request.stream(), max_line_bytes)
+        return NDJSONStreamingResponse(ndjson_lines(EchoResponse.from_domain_stream(self._process_stream(requests))))
+
+    async def _process_stream(
+        self, requests: AsyncIterator[Union[EchoRequest, ErrorDetail]]
+    ) -> AsyncIterator[Union[EchoMessage, ErrorDetail]]:
+        """Process streamed echo requests one at a time, turning failures into error entries"""
+        count = 0
+        async for echo_input in requests:
+            count += 1
+            if isinstance(echo_input, ErrorDetail):
+                yield echo_input
+                continue
+            try:
+                yield self.service.process_input(echo_input.to_domain())
+            except BaseAPIError as e:
+                yield ErrorDetail(code=e.code, message=e.message, details=e.details)
+            except Exception:
+                self.logger.exception("Unexpected error processing echo stream item")
+                yield ErrorDetail(code="internal_server_error", message="An unexpected error occurred for this item")
+        self.logger.info("Processed echo stream of %d items", count)
+
+    def _process_batch_chunk(self, items: List[Any]) -> List[Union[EchoMessage, ErrorDetail]]:
+        """Validate and process consecutive batch items, turning failures into error entries"""
+        outcomes: List[Union[EchoMessage, ErrorDetail]] = []
+        for item in items:
+            try:
+                echo_input = EchoRequest.model_validate(item)
+                outcomes.append(self.service.process_input(echo_input.to_domain()))
+            except PydanticValidationError as e:
+                errors = e.errors(include_url=False, include_context=False, include_input=False)
+                outcomes.append(
+                    ErrorDetail(code="validation_error", message="Invalid echo request", details={"errors": errors})
+                )
+            except BaseAPIError as e:
+                outcomes.append(ErrorDetail(code=e.code, message=e.message, details=e.details))
+            except Exception:
+                self.logger.exception("Unexpected error processing echo batch item")
+                outcomes.append(
+                    ErrorDetail(code="internal_server_error", message="An unexpected error occurred for this item")
+                )
+        return outcomes
+
     def register_routes(self, app: FastAPI, url_prefix: str = "") -> None:
         """Register echo endpoints with the FastAPI application.
 
@@ -62,12 +220,16 @@ class EchoController(BaseController):
             app: The FastAPI application instance
             url_prefix: Optional URL prefix for all routes
         """
+        passthrough = bool(self.settings.get_config(ConfigParameter.ECHO_PASSTHROUGH, False))
         app.add_api_route(
             path=f"{url_prefix}/echo",
-            endpoint=self.echo,
+            endpoint=idempotent()(self.echo_passthrough if passthrough else self.echo),
+            # The passthrough endpoint reads the body itself, document it like the parsed one
+            openapi_extra=self._request_body_schema() if passthrough else None,
             operation_id="echo_request_message",
             methods=["POST"],
             response_model=EchoResponse,
+            response_class=self.response_class,
             summary="Echo Endpoint",
             description=(
                 "Accepts any valid JSON and returns it with additional "
@@ -75,3 +237,48 @@ class EchoController(BaseController):
             ),
             tags=["echo"],
         )
+
+        app.add_api_route(
+            path=f"{url_prefix}/echo/batch",
+            endpoint=idempotent()(self.echo_batch),
+            openapi_extra=self._request_body_schema(batch=True),
+            operation_id="echo_request_batch",
+            methods=["POST"],
+            response_model=EchoBatchResponse,
+            response_class=self.response_class,
+            summary="Batch Echo Endpoint",
+            description=(
+                "Accepts a JSON array of echo requests and returns one result or error per item, in order. "
+                "Invalid items do not fail the batch."
+            ),
+            tags=["echo"],
+        )
+
+        app.add_api_route(
+            path=f"{url_prefix}/echo/stream",
+            endpoint=self.echo_stream,
+            openapi_extra=self._request_body_schema(media_type=NDJSONStreamingResponse.media_type),
+            operation_id="echo_request_stream",
+            methods=["POST"],
+            response_class=NDJSONStreamingResponse,
+            responses={
+                200: {"content": {NDJSONStreamingResponse.media_type: {"schema": EchoResponse.model_json_schema()}}}
+            },
+            summary="Streaming Echo Endpoint",
+            description=(
+                "Accepts newline-delimited JSON with one echo request per line and streams back one response "
+                "line per request line, in order. Invalid lines are answered with an error line."
+            ),
+            tags=["echo"],
+        )
+
+    @staticmethod
+    def _request_body_schema(batch: bool = False, media_type: str = "application/json") -> dict:
+        """OpenAPI request body of the echo endpoints that read the body themselves"""
+        schema = EchoRequest.model_json_schema()
+        return {
+            "requestBody": {
+                "required": True,
+                "content": {media_type: {"schema": {"type": "array", "items": schema} if batch else schema}},
+            }
+        }
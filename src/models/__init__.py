@@ -10,30 +10,36 @@ throughout the application.
 from src.models.blueprint.errors import (
     BadRequestError,
     BaseAPIError,
+    CircuitOpenError,
     ClientError,
     ConflictError,
     ForbiddenError,
     InternalServerError,
     NotFoundError,
     NotImplementedError,
+    PayloadTooLargeError,
     ServerError,
     ServiceUnavailableError,
     UnauthorizedError,
+    UnsupportedMediaTypeError,
     ValidationError,
 )
 
 __all__: list[str] = [
     "BadRequestError",
     "BaseAPIError",
+    "CircuitOpenError",
     "ClientError",
     "ConflictError",
     "ForbiddenError",
     "InternalServerError",
     "NotFoundError",
     "NotImplementedError",
+    "PayloadTooLargeError",
     "ServerError",
     "ServiceUnavailableError",
     "UnauthorizedError",
+    "UnsupportedMediaTypeError",
     "ValidationError",
     # Add model names here as they are added
 ]
@@ -16,7 +16,7 @@ class ErrorDetail(BaseModel):
 
     code: str = Field(..., description="A machine-readable error code")
     message: str = Field(..., description="A human-readable error message")
-    details: Optional[Dict[str, Any]] = Field(None, description="Additional error details")
+    details: Optional[Dict[str, Any]] = Field(default=None, description="Additional error details")
 
 
 class BaseAPIError(HTTPException):
@@ -101,6 +101,22 @@ class ConflictError(ClientError):
     message = "A conflict occurred while processing the request"
 
 
+class PayloadTooLargeError(ClientError):
+    """413 Payload Too Large - The request body exceeds the allowed size."""
+
+    status_code = status.HTTP_413_CONTENT_TOO_LARGE
+    code = "payload_too_large"
+    message = "The request body exceeds the allowed size"
+
+
+class UnsupportedMediaTypeError(ClientError):
+    """415 Unsupported Media Type - The request body is in a format or encoding the server does not support."""
+
+    status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    code = "unsupported_media_type"
+    message = "The request body format is not supported"
+
+
 class ValidationError(ClientError):
     """422 Unprocessable Entity - The request was well-formed but contained semantic errors."""
 
@@ -139,3 +155,10 @@ class ServiceUnavailableError(ServerError):
     status_code = status.HTTP_503_SERVICE_UNAVAILABLE
     code = "service_unavailable"
     message = "The service is currently unavailable"
+
+
+class CircuitOpenError(ServiceUnavailableError):
+    """503 Service Unavailable - Calls to an upstream service are suspended after repeated failures."""
+
+    code = "circuit_open"
+    message = "The upstream service is failing, calls are suspended"
@@ -27,3 +27,16 @@ class EchoMessage:
             "service_start_time": self.service_start_time.isoformat(),
             "processing_info": ({"message": "Echo successful"} if self.is_processed else {}),
         }
+
+
+@dataclass
+class RawEchoMessage:
+    """Domain model of an echo message whose payload is kept as the original JSON bytes.
+
+    Used by the passthrough mode, where the payload is never parsed.
+    """
+
+    data: bytes
+    processed_timestamp: datetime
+    service_start_time: datetime
+    is_processed: bool = True
@@ -7,7 +7,23 @@ interactions.
 # Import repositories here as they are created
 # Example:
 # from .user_repository import UserRepository
+from .base_repository import (
+    BaseRepository,
+    ConnectionPool,
+    Database,
+    DatabaseConnection,
+    DatabaseSettings,
+    Row,
+    shared_database,
+)
 
 __all__ = [
+    "BaseRepository",
+    "ConnectionPool",
+    "Database",
+    "DatabaseConnection",
+    "DatabaseSettings",
+    "Row",
+    "shared_database",
     # Add repository names here as they are added
 ]
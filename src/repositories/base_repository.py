@@ -0,0 +1,476 @@
+"""Base class for repositories of relational databases.
+
+Repositories share one pool of database connections per worker, ``shared_database``, which is opened in
+the application lifespan when ``database_url`` is set and closed at shutdown. A repository for a
+table subclasses ``BaseRepository``::
+
+    class UserRepository(BaseRepository):
+        table = "users"
+
+        async def get_by_id(self, user_id: int) -> Optional[Row]:
+            return await self.fetch_one("SELECT * FROM users WHERE id = ?", (user_id,))
+
+        def all_users(self) -> AsyncIterator[Row]:
+            return self.stream("SELECT * FROM users ORDER BY id")
+
+Large result sets are read with ``stream``, which fetches rows in batches from a server-side
+cursor instead of building a list. ``insert_many`` and ``upsert_many`` write rows in chunks,
+reusing one prepared statement, in a single transaction.
+
+Backends implement ``DatabaseConnection``; the SQLite backend (``sqlite:///path``, requires the
+``sqlite`` extra) is the reference implementation.
+"""
+
+import asyncio
+import functools
+import logging
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    ClassVar,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from prometheus_client import Histogram
+
+from src.config import ConfigParameter, ConfigSnapshot
+from src.config.metrics import gauge
+from src.models import ServiceUnavailableError
+
+Row = Dict[str, Any]
+Params = Sequence[Any]
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class DatabaseConnection(ABC):
+    """A connection of a database backend, used by one task at a time."""
+
+    @abstractmethod
+    async def execute(self, sql: str, params: Params = ()) -> int:
+        """Execute a statement and return the number of affected rows"""
+
+    @abstractmethod
+    async def execute_many(self, sql: str, rows: Iterable[Params]) -> int:
+        """Execute a statement once per parameter row and return the number of affected rows"""
+
+    @abstractmethod
+    def fetch(self, sql: str, params: Params = (), batch_size: int = 500) -> AsyncGenerator[List[Row], None]:
+        """Run a query and yield its rows in batches of up to ``batch_size``"""
+
+    @abstractmethod
+    async def begin(self) -> None:
+        """Start a transaction"""
+
+    @abstractmethod
+    async def commit(self) -> None:
+        """Commit the current transaction"""
+
+    @abstractmethod
+    async def rollback(self) -> None:
+        """Roll back the current transaction"""
+
+    @property
+    @abstractmethod
+    def in_transaction(self) -> bool:
+        """Whether a transaction is open"""
+
+    @abstractmethod
+    def placeholders(self, count: int) -> str:
+        """Comma-separated parameter placeholders of the backend, e.g. ``?, ?, ?``"""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Close the connection"""
+
+
+Connect = Callable[[], Awaitable[DatabaseConnection]]
+
+
+class ConnectionPool:
+    """Pool of up to ``max_size`` connections, opened as they are needed and reused afterwards."""
+
+    def __init__(self, connect: Connect, max_size: int = 10, acquire_timeout: float = 5.0, name: str = "default"):
+        """Initialize the pool.
+
+        Args:
+            connect: Opens a new connection
+            max_size: Maximum number of open connections
+            acquire_timeout: Seconds to wait for a free connection before failing with 503
+            name: Pool name, the metrics label
+        """
+        self.connect = connect
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.name = name
+        self._idle: Deque[DatabaseConnection] = deque()
+        self._slots = asyncio.Semaphore(max_size)
+        self._size = 0
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        """Number of open connections"""
+        return self._size
+
+    @property
+    def in_use(self) -> int:
+        """Number of connections currently acquired"""
+        return self._size - len(self._idle)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[DatabaseConnection]:
+        """Acquire a connection for the duration of the ``async with`` block.
+
+        An open transaction is rolled back when the connection is returned.
+
+        Raises:
+            ServiceUnavailableError: If no connection becomes free within ``acquire_timeout``
+        """
+        if self._closed:
+            raise RuntimeError(f"The connection pool {self.name} is closed")
+        start = time.perf_counter()
+        waiting = _pool_waiting.labels(self.name)
+        waiting.inc()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise ServiceUnavailableError(
+                message="No database connection is available", code="database_pool_exhausted"
+            ) from None
+        finally:
+            waiting.dec()
+
+        try:
+            connection = self._idle.pop() if self._idle else await self._open()
+            _pool_acquire.labels(self.name).observe(time.perf_counter() - start)
+            self._record_usage()
+
+            broken = False
+            try:
+                yield connection
+            except asyncio.CancelledError:
+                # Possibly cancelled in the middle of a statement
+                broken = True
+                raise
+            finally:
+                try:
+                    if not broken and connection.in_transaction:
+                        await connection.rollback()
+                except Exception:
+                    broken = True
+                except BaseException:
+                    # The rollback was cancelled, e.g. by a timeout of the request
+                    broken = True
+                    raise
+                finally:
+                    if broken or self._closed:
+                        # The connection may be left in an unknown state; replace it
+                        await self._discard(connection)
+                    else:
+                        self._idle.append(connection)
+        finally:
+            self._slots.release()
+            self._record_usage()
+
+    async def close(self) -> None:
+        """Close the idle connections; connections in use are closed when they are returned"""
+        self._closed = True
+        while self._idle:
+            await self._discard(self._idle.pop())
+        self._record_usage()
+
+    async def _open(self) -> DatabaseConnection:
+        connection = await self.connect()
+        self._size += 1
+        return connection
+
+    async def _discard(self, connection: DatabaseConnection) -> None:
+        self._size -= 1
+        try:
+            await connection.close()
+        except Exception:
+            logging.getLogger("api").warning("Error closing a connection of pool %s", self.name, exc_info=True)
+
+    def _record_usage(self) -> None:
+        _pool_connections.labels(self.name, "in_use").set(self.in_use)
+        _pool_connections.labels(self.name, "idle").set(len(self._idle))
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """Settings of the shared connection pool.
+
+    Attributes:
+        url: Database URL, e.g. ``sqlite:///data/app.db``; empty for no database
+        pool_size: Maximum number of open connections per worker; 1 for an in-memory SQLite database
+        pool_timeout: Seconds to wait for a free connection
+        statement_cache_size: Prepared statements kept per connection
+    """
+
+    url: str = ""
+    pool_size: int = 10
+    pool_timeout: float = 5.0
+    statement_cache_size: int = 128
+
+    @classmethod
+    def from_snapshot(cls, snapshot: ConfigSnapshot) -> "DatabaseSettings":
+        """Resolve the database settings from the configuration"""
+        return cls(
+            url=str(snapshot.get(ConfigParameter.DATABASE_URL, cls.url)),
+            pool_size=int(snapshot.get(ConfigParameter.DATABASE_POOL_SIZE, cls.pool_size)),
+            pool_timeout=float(snapshot.get(ConfigParameter.DATABASE_POOL_TIMEOUT, cls.pool_timeout)),
+            statement_cache_size=int(
+                snapshot.get(ConfigParameter.DATABASE_STATEMENT_CACHE_SIZE, cls.statement_cache_size)
+            ),
+        )
+
+    @property
+    def in_memory(self) -> bool:
+        """Whether the URL is an in-memory SQLite database (``sqlite://`` or ``sqlite:///:memory:``)"""
+        path = _sqlite_path(self.url)
+        return path is not None and path in ("", ":memory:")
+
+
+def _sqlite_path(url: str) -> Optional[str]:
+    """Database path of a ``sqlite://`` URL, None for URLs of other backends"""
+    scheme, _, location = url.partition("://")
+    if scheme != "sqlite":
+        return None
+    # sqlite:///relative/path and sqlite:////absolute/path, as in SQLAlchemy
+    return location[1:] if location.startswith("/") else location
+
+
+def connector(settings: DatabaseSettings) -> Connect:
+    """The function opening connections of the backend of a database URL
+
+    Raises:
+        ValueError: If no backend supports the URL
+    """
+    path = _sqlite_path(settings.url)
+    if path is not None:
+        from .sqlite_backend import connect_sqlite
+
+        return functools.partial(connect_sqlite, path or ":memory:", settings.statement_cache_size)
+    scheme = settings.url.partition("://")[0]
+    raise ValueError(f"No database backend for {scheme or settings.url!r} URLs")
+
+
+class Database:
+    """The connection pool shared by all repositories of a worker."""
+
+    def __init__(self) -> None:
+        self._pool: Optional[ConnectionPool] = None
+
+    async def start(self, settings: DatabaseSettings, connect: Optional[Connect] = None) -> None:
+        """Open the pool, closing a previously opened one.
+
+        Args:
+            settings: Database URL and pool settings
+            connect: Opens a connection, instead of the backend of ``settings.url`` (e.g. in tests)
+        """
+        await self.close()
+        # Every connection of an in-memory database would see a database of its own
+        pool_size = 1 if settings.in_memory else settings.pool_size
+        self._pool = ConnectionPool(connect or connector(settings), pool_size, settings.pool_timeout)
+
+    async def close(self) -> None:
+        """Close all connections"""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await pool.close()
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """The open pool
+
+        Raises:
+            RuntimeError: If the pool is not open (it is opened in the application lifespan if ``database_url`` is set)
+        """
+        if self._pool is None:
+            raise RuntimeError("The database is not started, set database_url to open it in the application lifespan")
+        return self._pool
+
+
+def _quote(identifier: str) -> str:
+    """Quote a table or column name, which cannot be passed as a parameter"""
+    if not _IDENTIFIER.match(identifier):
+        raise ValueError(f"Invalid identifier: {identifier!r}")
+    return f'"{identifier}"'
+
+
+@functools.lru_cache(maxsize=256)
+def _insert_sql(
+    table: str, columns: Tuple[str, ...], placeholders: str, conflict: Tuple[str, ...], upsert: bool
+) -> str:
+    """INSERT statement, with ON CONFLICT clause for upserts; cached, as bulk writes repeat the same shapes"""
+    sql = f"INSERT INTO {_quote(table)} ({', '.join(map(_quote, columns))}) VALUES ({placeholders})"
+    if not upsert:
+        return sql
+    updates = [f"{_quote(column)} = excluded.{_quote(column)}" for column in columns if column not in conflict]
+    action = f"DO UPDATE SET {', '.join(updates)}" if updates else "DO NOTHING"
+    return f"{sql} ON CONFLICT ({', '.join(map(_quote, conflict))}) {action}"
+
+
+class BaseRepository:
+    """Base class of the repositories of a database.
+
+    Subclasses set ``table`` (used by the bulk write helpers) and implement the entity's queries
+    with the helpers below. Query durations are recorded per repository and operation.
+    """
+
+    table: ClassVar[str] = ""
+
+    def __init__(self, database: Optional[Database] = None) -> None:
+        """Initialize the repository.
+
+        Args:
+            database: The database to use, ``shared_database`` by default
+        """
+        self.database = database or shared_database
+        self._name = type(self).__name__
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[DatabaseConnection]:
+        """A connection with an open transaction, committed if the block succeeds and rolled back otherwise"""
+        async with self.database.pool.acquire() as connection:
+            await connection.begin()
+            yield connection
+            await connection.commit()
+
+    async def fetch_one(self, sql: str, params: Params = ()) -> Optional[Row]:
+        """The first row of a query, None if it returns no rows"""
+        with self._timed("fetch"):
+            async with self.database.pool.acquire() as connection:
+                async with aclosing(connection.fetch(sql, params, batch_size=1)) as batches:
+                    async for batch in batches:
+                        return batch[0] if batch else None
+        return None
+
+    async def fetch_all(self, sql: str, params: Params = ()) -> List[Row]:
+        """All rows of a query; use ``stream`` for large results"""
+        rows: List[Row] = []
+        with self._timed("fetch"):
+            async with self.database.pool.acquire() as connection:
+                async for batch in connection.fetch(sql, params):
+                    rows.extend(batch)
+        return rows
+
+    async def stream(self, sql: str, params: Params = (), batch_size: int = 500) -> AsyncIterator[Row]:
+        """Iterate over the rows of a query, fetching ``batch_size`` rows at a time.
+
+        The connection is held until the iteration ends; close iterations that stop early, e.g. with
+        ``contextlib.aclosing``, so the connection returns to the pool right away.
+        """
+        # Only the time spent fetching is recorded, not the time the caller spends on the rows
+        elapsed = 0.0
+        try:
+            async with self.database.pool.acquire() as connection:
+                async with aclosing(connection.fetch(sql, params, batch_size)) as batches:
+                    while True:
+                        start = time.perf_counter()
+                        try:
+                            batch = await anext(batches)
+                        except StopAsyncIteration:
+                            break
+                        finally:
+                            elapsed += time.perf_counter() - start
+                        for row in batch:
+                            yield row
+        finally:
+            _query_duration.labels(self._name, "stream").observe(elapsed)
+
+    async def execute(self, sql: str, params: Params = ()) -> int:
+        """Execute a statement and return the number of affected rows"""
+        with self._timed("execute"):
+            async with self.database.pool.acquire() as connection:
+                return await connection.execute(sql, params)
+
+    async def insert_many(self, rows: Iterable[Mapping[str, Any]], chunk_size: int = 1000) -> int:
+        """Insert rows into ``table`` in one transaction.
+
+        Args:
+            rows: Rows as column-value mappings, all with the same columns
+            chunk_size: Rows sent to the database per batch
+
+        Returns:
+            Number of inserted rows
+        """
+        return await self._write_many("insert_many", rows, chunk_size, (), upsert=False)
+
+    async def upsert_many(
+        self, rows: Iterable[Mapping[str, Any]], conflict_columns: Sequence[str], chunk_size: int = 1000
+    ) -> int:
+        """Insert rows into ``table``, updating the existing rows with the same key, in one transaction.
+
+        Args:
+            rows: Rows as column-value mappings, all with the same columns
+            conflict_columns: Columns of the unique key identifying existing rows
+            chunk_size: Rows sent to the database per batch
+
+        Returns:
+            Number of inserted or updated rows
+        """
+        return await self._write_many("upsert_many", rows, chunk_size, tuple(conflict_columns), upsert=True)
+
+    async def _write_many(
+        self,
+        operation: str,
+        rows: Iterable[Mapping[str, Any]],
+        chunk_size: int,
+        conflict: Tuple[str, ...],
+        upsert: bool,
+    ) -> int:
+        if not self.table:
+            raise TypeError(f"{self._name} does not set table")
+        columns: Optional[Tuple[str, ...]] = None
+        sql = ""
+        count = 0
+        chunk: List[Tuple[Any, ...]] = []
+        with self._timed(operation):
+            async with self.transaction() as connection:
+                for row in rows:
+                    if columns is None:
+                        columns = tuple(row)
+                        placeholders = connection.placeholders(len(columns))
+                        sql = _insert_sql(self.table, columns, placeholders, conflict, upsert)
+                    chunk.append(tuple(row[column] for column in columns))
+                    if len(chunk) >= chunk_size:
+                        count += await connection.execute_many(sql, chunk)
+                        chunk = []
+                if chunk:
+                    count += await connection.execute_many(sql, chunk)
+        return count
+
+    def _timed(self, operation: str) -> Any:
+        return _query_duration.labels(self._name, operation).time()
+
+
+_pool_connections = gauge("db_pool_connections", "Connections of a database pool by state", ["pool", "state"])
+_pool_waiting = gauge("db_pool_waiting", "Tasks waiting for a database connection", ["pool"])
+_pool_acquire = Histogram(
+    "db_pool_acquire_seconds",
+    "Time to acquire a database connection",
+    ["pool"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+_query_duration = Histogram("db_query_duration_seconds", "Database query duration", ["repository", "operation"])
+
+# Opened and closed in the application lifespan if database_url is set
+shared_database = Database()
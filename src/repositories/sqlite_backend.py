@@ -0,0 +1,89 @@
+"""SQLite backend of ``BaseRepository``, based on aiosqlite (``sqlite`` extra).
+
+Every connection runs its statements in its own thread. Databases in files are opened in WAL mode,
+so readers of other connections are not blocked by a writer.
+"""
+
+import sqlite3
+from typing import Any, AsyncGenerator, Iterable, List, Tuple, cast
+
+from .base_repository import DatabaseConnection, Params, Row
+
+try:
+    import aiosqlite
+except ImportError:  # pragma: no cover - optional dependency
+    aiosqlite = None  # type: ignore[assignment]
+
+
+def _dict_row(cursor: sqlite3.Cursor, row: Tuple[Any, ...]) -> Row:
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SqliteConnection(DatabaseConnection):
+    """A connection of an SQLite database"""
+
+    def __init__(self, connection: "aiosqlite.Connection") -> None:
+        self._connection = connection
+
+    async def execute(self, sql: str, params: Params = ()) -> int:
+        cursor = await self._connection.execute(sql, params)
+        try:
+            return cursor.rowcount
+        finally:
+            await cursor.close()
+
+    async def execute_many(self, sql: str, rows: Iterable[Params]) -> int:
+        cursor = await self._connection.executemany(sql, rows)
+        try:
+            return cursor.rowcount
+        finally:
+            await cursor.close()
+
+    async def fetch(self, sql: str, params: Params = (), batch_size: int = 500) -> AsyncGenerator[List[Row], None]:
+        cursor = await self._connection.execute(sql, params)
+        try:
+            while batch := await cursor.fetchmany(batch_size):
+                # Rows are dicts, made by _dict_row
+                yield list(cast(Iterable[Row], batch))
+        finally:
+            await cursor.close()
+
+    async def begin(self) -> None:
+        await self._connection.execute("BEGIN")
+
+    async def commit(self) -> None:
+        await self._connection.commit()
+
+    async def rollback(self) -> None:
+        await self._connection.rollback()
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._connection.in_transaction
+
+    def placeholders(self, count: int) -> str:
+        return ", ".join("?" * count)
+
+    async def close(self) -> None:
+        await self._connection.close()
+
+
+async def connect_sqlite(path: str, statement_cache_size: int = 128) -> SqliteConnection:
+    """Open a connection of an SQLite database.
+
+    Args:
+        path: Path of the database file, ``:memory:`` for an in-memory database private to the connection
+        statement_cache_size: Prepared statements kept by the connection
+
+    Raises:
+        RuntimeError: If aiosqlite is not installed
+    """
+    if aiosqlite is None:
+        raise RuntimeError("The SQLite database backend requires aiosqlite, install the sqlite extra")
+    # Autocommit outside of explicit transactions, which begin() opens
+    connection = await aiosqlite.connect(path, cached_statements=statement_cache_size, isolation_level=None)
+    connection.row_factory = _dict_row  # type: ignore[assignment]
+    if path != ":memory:":
+        await connection.execute("PRAGMA journal_mode=WAL")
+        await connection.execute("PRAGMA synchronous=NORMAL")
+    return SqliteConnection(connection)
@@ -3,8 +3,16 @@
 This package contains all business logic and use case implementations.
 """
 
+from .batching import MicroBatcher, configure_batchers
+from .cache import ReadThroughCache, configure_caches, invalidate_cache, read_through
 from .echo_service import EchoService
 
 __all__ = [
     "EchoService",
+    "MicroBatcher",
+    "ReadThroughCache",
+    "configure_batchers",
+    "configure_caches",
+    "invalidate_cache",
+    "read_through",
 ]
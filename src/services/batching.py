@@ -0,0 +1,188 @@
+"""Micro-batching of service calls, in the style of DataLoader.
+
+A ``MicroBatcher`` wraps a batch function, which takes a list of items and returns one result per
+item in the same order. Calls of ``MicroBatcher.load`` issued within a short window are collected
+and passed to the batch function together, and every caller gets the result of its own item::
+
+    class UserService:
+        def __init__(self, repository: UserRepository) -> None:
+            self.repository = repository
+            self.user_batcher = MicroBatcher(self.get_users, name="users")
+
+        async def get_users(self, user_ids: List[int]) -> List[Optional[User]]:
+            ...  # one query for all ids
+
+        async def get_user(self, user_id: int) -> Optional[User]:
+            return await self.user_batcher.load(user_id)
+
+A batch is dispatched when the window has passed since its first call, or as soon as it holds
+``max_batch_size`` items. With a window of 0, the calls made during the same event loop iteration
+are batched, which adds no delay. Sync batch functions run in the thread pool.
+
+If the batch function raises, every caller of the batch gets the exception; if it returns an
+exception instance for an item, only that item's caller does.
+"""
+
+import asyncio
+import contextvars
+import inspect
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Sequence, Set, Tuple, TypeVar, Union
+
+from prometheus_client import Histogram
+from starlette.concurrency import run_in_threadpool
+
+K = TypeVar("K")  # Item type
+V = TypeVar("V")  # Result type
+
+BatchFunction = Callable[[List[K]], Union[Sequence[V], Awaitable[Sequence[V]]]]
+
+DEFAULT_WINDOW = 0.0
+DEFAULT_MAX_BATCH_SIZE = 64
+
+
+class MicroBatcher(Generic[K, V]):
+    """Collects concurrent calls for single items into calls of a batch function.
+
+    Settings not passed to the constructor follow the ``micro_batch_*`` configuration.
+    """
+
+    def __init__(
+        self,
+        batch_function: BatchFunction,
+        name: str,
+        window: Optional[float] = None,
+        max_batch_size: Optional[int] = None,
+    ) -> None:
+        """Initialize the batcher.
+
+        Args:
+            batch_function: Takes a list of items and returns one result per item, in the same order
+            name: Name of the batcher, the metrics label
+            window: Seconds calls are collected after the first call of a batch
+            max_batch_size: Number of items that dispatch a batch right away
+        """
+        self.batch_function = batch_function
+        self.name = name
+        settings = dict(window=window, max_batch_size=max_batch_size)
+        self._overrides = {setting: value for setting, value in settings.items() if value is not None}
+        # Also covers callable objects with an async __call__
+        self._is_async = inspect.iscoroutinefunction(batch_function) or inspect.iscoroutinefunction(
+            getattr(batch_function, "__call__", None)
+        )
+
+        self._pending: List[Tuple[K, "asyncio.Future[V]", float]] = []
+        self._timer: Optional[asyncio.Handle] = None
+        # Running batches, referenced until they complete
+        self._running: Set["asyncio.Task[None]"] = set()
+
+        self._batch_size = _batch_size.labels(name)
+        self._wait = _wait.labels(name)
+        self.configure(**_defaults)
+        _batchers.add(self)
+
+    def configure(self, window: float = DEFAULT_WINDOW, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE) -> None:
+        """Apply the configured defaults to the settings not set by the constructor"""
+        self.window = window
+        self.max_batch_size = max_batch_size
+        for setting, value in self._overrides.items():
+            setattr(self, setting, value)
+
+    async def load(self, item: K) -> V:
+        """The result of one item, computed in a batch with the items of concurrent calls.
+
+        Args:
+            item: The item
+
+        Returns:
+            The batch function's result for the item
+
+        Raises:
+            Exception: What the batch function raised, or returned for this item
+        """
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[V]" = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            # The batch does not belong to the request that happened to start it, so it runs without its context
+            context = contextvars.Context()
+            if self.window > 0:
+                self._timer = loop.call_later(self.window, self._dispatch, context=context)
+            else:
+                self._timer = loop.call_soon(self._dispatch, context=context)
+        return await future
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        now = time.perf_counter()
+        self._batch_size.observe(len(pending))
+        for _, _, queued in pending:
+            self._wait.observe(now - queued)
+        task = asyncio.get_running_loop().create_task(self._run(pending), context=contextvars.Context())
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, pending: List[Tuple[K, "asyncio.Future[V]", float]]) -> None:
+        items = [item for item, _, _ in pending]
+        try:
+            if self._is_async:
+                results = await self.batch_function(items)  # type: ignore[misc]
+            else:
+                results = await run_in_threadpool(self.batch_function, items)
+            if len(results) != len(items):
+                raise ValueError(
+                    f"The batch function of {self.name} returned {len(results)} results for {len(items)} items"
+                )
+        except asyncio.CancelledError:
+            for _, future, _ in pending:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(pending, results):
+            # Callers that were cancelled no longer wait for their result
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+def configure_batchers(window: float = DEFAULT_WINDOW, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE) -> None:
+    """Apply the configured defaults to all batchers; see ``MicroBatcher.configure``"""
+    _defaults.update(window=window, max_batch_size=max_batch_size)
+    for batcher in list(_batchers):
+        batcher.configure(**_defaults)
+
+
+_batch_size = Histogram(
+    "micro_batch_size",
+    "Items per dispatched micro-batch",
+    ["batcher"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+_wait = Histogram(
+    "micro_batch_wait_seconds",
+    "Time items wait for their micro-batch to be dispatched",
+    ["batcher"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05),
+)
+
+# Not kept alive by the registry, so batchers of discarded services are released
+_batchers: "weakref.WeakSet[MicroBatcher]" = weakref.WeakSet()
+# Configured defaults, also applied to batchers created later
+_defaults: Dict[str, Any] = {}
@@ -0,0 +1,317 @@
+"""Read-through cache for service, repository and client methods.
+
+A ``ReadThroughCache`` keeps loaded values in a bounded LRU per worker. Methods use it with the
+``read_through`` decorator::
+
+    class UserRepository(BaseRepository):
+        users = ReadThroughCache("users", ttl=30)
+
+        @read_through(users)
+        async def get_by_id(self, user_id: int) -> Optional[Row]:
+            return await self.fetch_one("SELECT * FROM users WHERE id = ?", (user_id,))
+
+Values are cached for ``ttl`` seconds, and ``None`` results (e.g. a missing row) for
+``negative_ttl`` seconds. Concurrent misses of a key share one load. With ``stale_ttl``, an expired
+value is still returned for that many seconds while it is reloaded in the background.
+
+Entries are invalidated with ``UserRepository.get_by_id.invalidate(user_id)``, or by name with
+``invalidate_cache("users")``, e.g. by a controller after a write. Caches are per worker, and so are
+invalidations: other workers keep serving their cached values until these expire, so ``ttl`` bounds how
+long a write may go unnoticed by the other workers.
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+from prometheus_client import Counter, Histogram
+
+from src.config.metrics import gauge
+
+Loader = Callable[[], Awaitable[Any]]
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL = 60.0
+DEFAULT_NEGATIVE_TTL = 5.0
+DEFAULT_STALE_TTL = 0.0
+
+
+@dataclass
+class _Entry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+class ReadThroughCache:
+    """LRU of loaded values with a time to live, single-flight loads and stale-while-revalidate.
+
+    Settings not passed to the constructor follow the ``read_cache_*`` configuration.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        negative_ttl: Optional[float] = None,
+        stale_ttl: Optional[float] = None,
+    ) -> None:
+        """Initialize the cache and register it under its name.
+
+        Args:
+            name: Unique name, used by ``invalidate_cache`` and as the metrics label
+            max_entries: Number of values kept, the least recently used are evicted first
+            ttl: Seconds a value is served
+            negative_ttl: Seconds a ``None`` result is served, 0 to not cache them
+            stale_ttl: Seconds an expired value is still served while it is reloaded, 0 to always wait for the reload
+
+        Raises:
+            ValueError: If a cache with the same name exists
+        """
+        if name in _caches:
+            raise ValueError(f"A cache named {name!r} already exists")
+        self.name = name
+        settings = dict(max_entries=max_entries, ttl=ttl, negative_ttl=negative_ttl, stale_ttl=stale_ttl)
+        self._overrides = {setting: value for setting, value in settings.items() if value is not None}
+
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        # Running loads; a load only stores its value if it is still registered here when it completes
+        self._loading: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        # Background refreshes, referenced until they complete
+        self._refreshes: Set["asyncio.Task[Any]"] = set()
+        # Reconfigured from the config watcher thread and possibly invalidated from other threads, while
+        # requests read on the event loop
+        self._lock = threading.Lock()
+
+        self._hits = _requests.labels(name, "hit")
+        self._misses = _requests.labels(name, "miss")
+        self._stale = _requests.labels(name, "stale")
+        self._coalesced = _requests.labels(name, "coalesced")
+        self._load_duration = _load_duration.labels(name)
+        self._size = _entries.labels(name)
+        self.configure(**_defaults)
+        _caches[name] = self
+
+    def configure(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float = DEFAULT_TTL,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+        stale_ttl: float = DEFAULT_STALE_TTL,
+        enabled: bool = True,
+    ) -> None:
+        """Apply the configured defaults to the settings not set by the constructor"""
+        with self._lock:
+            self.max_entries = max_entries
+            self.ttl = ttl
+            self.negative_ttl = negative_ttl
+            self.stale_ttl = stale_ttl
+            for setting, value in self._overrides.items():
+                setattr(self, setting, value)
+            self.enabled = enabled
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._size.set(len(self._entries))
+
+    async def get(self, key: Hashable, loader: Loader) -> Any:
+        """The value of a key, loaded with ``loader`` if it is not cached.
+
+        Args:
+            key: Cache key
+            loader: Loads the value; concurrent misses of the key call it once
+
+        Returns:
+            The cached or loaded value
+
+        Raises:
+            Exception: Whatever the loader raises; failed loads are not cached
+        """
+        if not self.enabled:
+            return await loader()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            fresh = stale = False
+            if entry is not None:
+                now = time.monotonic()
+                fresh = now < entry.fresh_until
+                stale = not fresh and now < entry.stale_until
+                if fresh or stale:
+                    self._entries.move_to_end(key)
+            task = self._loading.get(key)
+
+        if fresh and entry is not None:
+            self._hits.inc()
+            return entry.value
+        if stale and entry is not None:
+            self._stale.inc()
+            if task is None:
+                refresh = self._start_load(key, loader)
+                self._refreshes.add(refresh)
+                refresh.add_done_callback(self._refreshes.discard)
+            return entry.value
+
+        if task is not None:
+            self._coalesced.inc()
+        else:
+            self._misses.inc()
+            task = self._start_load(key, loader)
+        # A cancelled caller does not cancel the load the other callers wait for
+        return await asyncio.shield(task)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop the value of a key; a load in progress is not stored"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._loading.pop(key, None)
+            self._size.set(len(self._entries))
+
+    def clear(self) -> None:
+        """Drop all values; loads in progress are not stored"""
+        with self._lock:
+            self._entries.clear()
+            self._loading.clear()
+            self._size.set(0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _start_load(self, key: Hashable, loader: Loader) -> "asyncio.Task[Any]":
+        task = asyncio.get_running_loop().create_task(self._load(key, loader))
+        task.add_done_callback(self._log_failure)
+        with self._lock:
+            self._loading[key] = task
+        return task
+
+    async def _load(self, key: Hashable, loader: Loader) -> Any:
+        start = time.perf_counter()
+        try:
+            value = await loader()
+        finally:
+            self._load_duration.observe(time.perf_counter() - start)
+            with self._lock:
+                # Not current if the key was invalidated while loading
+                current = self._loading.get(key) is asyncio.current_task()
+                if current:
+                    del self._loading[key]
+
+        if not current:
+            return value
+        with self._lock:
+            ttl = self.ttl if value is not None else self.negative_ttl
+            if ttl > 0:
+                now = time.monotonic()
+                stale = self.stale_ttl if value is not None else 0.0
+                self._entries[key] = _Entry(value, now + ttl, now + ttl + stale)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                self._size.set(len(self._entries))
+        return value
+
+    def _log_failure(self, task: "asyncio.Task[Any]") -> None:
+        # Retrieves the exception, which the callers may all have stopped waiting for; only background
+        # refreshes have no caller to raise it to, and are logged
+        if task.cancelled() or task.exception() is None:
+            return
+        if task in self._refreshes:
+            logging.getLogger("api").warning("Refreshing a value of cache %s failed: %r", self.name, task.exception())
+
+
+def read_through(
+    cache: ReadThroughCache, key: Optional[Callable[..., Hashable]] = None
+) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """Cache the results of an async function or method.
+
+    The decorated function gets an ``invalidate`` function, taking the same arguments (without
+    ``self``), that drops the cached result of these arguments.
+
+    Args:
+        cache: The cache to use
+        key: Builds the cache key from the arguments (without ``self``); by default the function name
+            and all arguments, which then have to be hashable
+
+    Returns:
+        The decorator
+    """
+
+    def decorator(function: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        signature = inspect.signature(function)
+        method = next(iter(signature.parameters), None) == "self"
+        name = function.__qualname__
+
+        def cache_key(*args: Any, **kwargs: Any) -> Hashable:
+            if key is not None:
+                return key(*args, **kwargs)
+            # Bound with the signature, so f(1) and f(user_id=1) share an entry
+            bound = signature.bind(None, *args, **kwargs) if method else signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            values = list(bound.arguments.values())
+            return (name, *(values[1:] if method else values))
+
+        @functools.wraps(function)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            call_key = cache_key(*args[1:], **kwargs) if method else cache_key(*args, **kwargs)
+            return await cache.get(call_key, lambda: function(*args, **kwargs))
+
+        def invalidate(*args: Any, **kwargs: Any) -> None:
+            cache.invalidate(cache_key(*args, **kwargs))
+
+        wrapper.invalidate = invalidate  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
+
+
+def invalidate_cache(name: str, *keys: Hashable) -> None:
+    """Drop cached values by cache name, for callers without access to the cached method (e.g. controllers).
+
+    Only the caches of this worker are invalidated; other workers serve their values until they expire.
+
+    Args:
+        name: Name of the cache
+        *keys: Keys to drop, all values if none are given
+
+    Raises:
+        KeyError: If there is no cache with this name
+    """
+    cache = _caches[name]
+    if not keys:
+        cache.clear()
+    for key in keys:
+        cache.invalidate(key)
+
+
+def configure_caches(
+    max_entries: int = DEFAULT_MAX_ENTRIES,
+    ttl: float = DEFAULT_TTL,
+    negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+    stale_ttl: float = DEFAULT_STALE_TTL,
+    enabled: bool = True,
+) -> None:
+    """Apply the configured defaults to all caches; see ``ReadThroughCache.configure``"""
+    _defaults.update(max_entries=max_entries, ttl=ttl, negative_ttl=negative_ttl, stale_ttl=stale_ttl, enabled=enabled)
+    for cache in list(_caches.values()):
+        cache.configure(**_defaults)
+
+
+_requests = Counter(
+    "cache_requests_total",
+    "Read-through cache lookups by result (hit, miss, stale or coalesced into a running load)",
+    ["cache", "result"],
+)
+_load_duration = Histogram("cache_load_duration_seconds", "Duration of loading a value on a cache miss", ["cache"])
+_entries = gauge("cache_entries", "Values held by a read-through cache", ["cache"])
+
+# Not kept alive by the registry, so the name of a discarded cache can be used again
+_caches: "weakref.WeakValueDictionary[str, ReadThroughCache]" = weakref.WeakValueDictionary()
+# Configured defaults, also applied to caches created later
+_defaults: Dict[str, Any] = {}
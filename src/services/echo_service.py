@@ -4,9 +4,12 @@ This service handles the business logic for echoing messages.
 """
 
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Dict, List
 
-from src.models.domain import EchoMessage
+from src.config.tracing import span
+from src.models.domain import EchoMessage, RawEchoMessage
+
+from .batching import MicroBatcher
 
 
 class EchoService:
@@ -19,7 +22,9 @@ class EchoService:
     def __init__(self):
         """Initialize the echo service with a creation timestamp."""
         self.creation_time = datetime.now(timezone.utc)
+        self.batcher: MicroBatcher[Dict[str, Any], EchoMessage] = MicroBatcher(self.process_inputs, "echo_service")
 
+    @span("echo_service")
     def process_input(self, input_data: Dict[str, Any]) -> EchoMessage:
         """Process the input data and return an echo message.
 
@@ -37,3 +42,45 @@ class EchoService:
             metadata={"source": "echo_service"},
             is_processed=True,
         )
+
+    async def process_inputs(self, inputs: List[Dict[str, Any]]) -> List[EchoMessage]:
+        """Process several inputs in one call, the batch function of ``process_input_batched``.
+
+        Args:
+            inputs: The input data to echo back
+
+        Returns:
+            List[EchoMessage]: One processed echo message per input, in order
+        """
+        # A real backend would answer all inputs with one request or query
+        return [self.process_input(input_data) for input_data in inputs]
+
+    # The batch runs outside of the request's context, so this span is the time spent waiting for it
+    @span("echo_service_batch_wait")
+    async def process_input_batched(self, input_data: Dict[str, Any]) -> EchoMessage:
+        """Process the input data in a micro-batch with the inputs of concurrent requests.
+
+        Args:
+            input_data: The input data to echo back
+
+        Returns:
+            EchoMessage: The processed echo message
+        """
+        return await self.batcher.load(input_data)
+
+    @span("echo_service")
+    def process_raw(self, raw_input: bytes) -> RawEchoMessage:
+        """Process a raw JSON payload without parsing it.
+
+        Args:
+            raw_input: The input data as JSON bytes
+
+        Returns:
+            RawEchoMessage: The processed echo message, carrying the unchanged bytes
+        """
+        return RawEchoMessage(
+            data=raw_input,
+            processed_timestamp=datetime.now(timezone.utc),
+            service_start_time=self.creation_time,
+            is_processed=True,
+        )
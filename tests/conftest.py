@@ -0,0 +1,10 @@
+"""Shared test setup.
+
+The environment is set before the application modules are imported, as they load the configuration on import.
+"""
+
+import os
+
+# MCP mounts a server that needs its own dependencies; tests do not write the log file
+os.environ["DYNACONF_APP_MCP"] = "false"
+os.environ["DYNACONF_LOG_FILE_ENABLED"] = "false"
@@ -0,0 +1,13 @@
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import app
+
+
+@pytest.fixture
+def client() -> Iterator[TestClient]:
+    """A client of the application, with its lifespan run"""
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,88 @@
+import gzip
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src.controller.blueprint import compression
+
+zstandard = compression.zstandard
+needs_zstd = pytest.mark.skipif(zstandard is None, reason="zstandard is not installed")
+
+# Large enough to be compressed (compression_minimum_size)
+PAYLOAD = {"data": {"items": [{"id": index, "name": f"item {index}"} for index in range(200)]}, "metadata": {}}
+BODY = json.dumps(PAYLOAD).encode()
+
+
+def post_echo(client: TestClient, body: bytes, encoding: str) -> httpx.Response:
+    return client.post(
+        "/echo", content=body, headers={"content-type": "application/json", "content-encoding": encoding}
+    )
+
+
+def test_echo_response_is_compressed_for_accepting_client(client: TestClient) -> None:
+    response = client.post(
+        "/echo", content=BODY, headers={"content-type": "application/json", "accept-encoding": "gzip"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert response.json()["input_data"] == PAYLOAD
+
+
+def test_echo_response_is_not_compressed_without_accept_encoding(client: TestClient) -> None:
+    response = client.post("/echo", content=BODY, headers={"content-type": "application/json", "accept-encoding": ""})
+
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+
+def test_echo_accepts_gzip_request_body(client: TestClient) -> None:
+    response = post_echo(client, gzip.compress(BODY), "gzip")
+
+    assert response.status_code == 200
+    assert response.json()["input_data"] == PAYLOAD
+
+
+@needs_zstd
+def test_echo_accepts_zstd_request_body(client: TestClient) -> None:
+    response = post_echo(client, zstandard.ZstdCompressor().compress(BODY), "zstd")
+
+    assert response.status_code == 200
+    assert response.json()["input_data"] == PAYLOAD
+
+
+@needs_zstd
+def test_echo_rejects_truncated_zstd_request_body(client: TestClient) -> None:
+    response = post_echo(client, zstandard.ZstdCompressor().compress(BODY)[:-4], "zstd")
+
+    assert response.status_code == 400
+
+
+def test_echo_rejects_truncated_gzip_request_body(client: TestClient) -> None:
+    response = post_echo(client, gzip.compress(BODY)[:-8], "gzip")
+
+    assert response.status_code == 400
+
+
+def test_echo_rejects_invalid_gzip_request_body(client: TestClient) -> None:
+    response = post_echo(client, b"not gzip", "gzip")
+
+    assert response.status_code == 400
+
+
+def test_echo_rejects_request_body_expanding_beyond_limit(client: TestClient) -> None:
+    limit = compression.response_compressor.max_request_bytes
+    bomb = gzip.compress(b'{"data": {"padding": "' + b" " * limit + b'"}}')
+
+    response = post_echo(client, bomb, "gzip")
+
+    assert response.status_code == 413
+
+
+def test_echo_rejects_unsupported_request_encoding(client: TestClient) -> None:
+    response = post_echo(client, BODY, "compress")
+
+    assert response.status_code == 415
@@ -0,0 +1,75 @@
+import json
+from typing import Any, Dict, Iterator
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.app import settings
+from src.config import ConfigParameter
+from src.controller.blueprint.routing import BlueprintRoute
+from src.controller.dto.echo import EchoRequest
+from src.controller.echo_controller import EchoController
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> Iterator[TestClient]:
+    """A client of an application with the echo endpoint in passthrough mode"""
+    # Reuses the manager of the application, another one would replace the handlers that /logs reads from
+    get_config = settings.get_config
+
+    def passthrough_config(key: Any, default_value: Any = None) -> Any:
+        return True if key == ConfigParameter.ECHO_PASSTHROUGH else get_config(key, default_value)
+
+    monkeypatch.setattr(settings, "get_config", passthrough_config)
+    app = FastAPI()
+    app.router.route_class = BlueprintRoute
+    EchoController(settings).register_routes(app)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_echo_returns_body_unchanged(client: TestClient) -> None:
+    body = b'{"data": {"text": "h\\u00e9llo", "n": [1.50, 2]}, "metadata": {"source": "test"}}'
+
+    response = client.post("/echo", content=body, headers={"content-type": "application/json"})
+
+    assert response.status_code == 200
+    assert response.content.startswith(b'{"input_data":' + body + b",")
+    result = response.json()
+    assert result["processed"] is True
+    assert result["input_data"] == json.loads(body)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [{}, {"metadata": {"source": "test"}}, {"data": {"a": 1}, "metadata": None}, {"data": {"a": 1}, "other": 2}],
+)
+def test_echo_returns_same_input_data_as_parsed_mode(client: TestClient, payload: Dict[str, Any]) -> None:
+    expected = EchoRequest.model_validate(payload).to_domain()
+
+    response = client.post("/echo", json=payload)
+
+    assert response.status_code == 200
+    assert response.json()["input_data"] == expected
+
+
+def test_echo_rejects_null_data(client: TestClient) -> None:
+    response = client.post("/echo", json={"data": None})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "data"]
+
+
+def test_echo_rejects_data_of_other_type(client: TestClient) -> None:
+    response = client.post("/echo", json={"data": [1, 2]})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "dict_type"
+
+
+def test_echo_rejects_malformed_json(client: TestClient) -> None:
+    response = client.post("/echo", content=b'{"data": ', headers={"content-type": "application/json"})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "json_invalid"
@@ -0,0 +1,76 @@
+import json
+from typing import Any, Dict, Iterator, List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import settings
+from src.config import ConfigParameter
+
+HEADERS = {"content-type": "application/x-ndjson"}
+
+
+def post_stream(client: TestClient, chunks: List[bytes]) -> List[Dict[str, Any]]:
+    def body() -> Iterator[bytes]:
+        yield from chunks
+
+    response = client.post("/echo/stream", content=body(), headers=HEADERS)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.content.endswith(b"\n")
+    return [json.loads(line) for line in response.content.splitlines()]
+
+
+def test_answers_every_line_in_order(client: TestClient) -> None:
+    lines = [json.dumps({"data": {"n": index}}).encode() + b"\n" for index in range(20)]
+
+    results = post_stream(client, lines)
+
+    assert [result["input_data"]["data"] for result in results] == [{"n": index} for index in range(20)]
+    assert all(result["processed"] for result in results)
+
+
+def test_invalid_lines_answered_with_errors_mid_stream(client: TestClient) -> None:
+    body = b'{"data": {"n": 1}}\n{"data": \n\n{"data": [1, 2]}\n{"data": {"n": 4}}\n'
+
+    results = post_stream(client, [body])
+
+    assert len(results) == 4
+    assert results[0]["input_data"]["data"] == {"n": 1}
+    assert results[1]["error"]["code"] == "validation_error"
+    assert results[1]["error"]["details"]["line"] == 2
+    # Empty lines are skipped but counted
+    assert results[2]["error"]["details"]["line"] == 4
+    assert results[3]["input_data"]["data"] == {"n": 4}
+
+
+def test_lines_split_across_chunks(client: TestClient) -> None:
+    body = b'{"data": {"text": "first"}}\n{"data": {"text": "second"}}\n{"data": {"text": "last"}}'
+
+    results = post_stream(client, [bytes([byte]) for byte in body])
+
+    assert [result["input_data"]["data"]["text"] for result in results] == ["first", "second", "last"]
+
+
+def test_overlong_line_answered_with_error(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    get_config = settings.get_config
+
+    def small_lines(key: Any, default_value: Any = None) -> Any:
+        return 64 if key == ConfigParameter.ECHO_STREAM_MAX_LINE_BYTES else get_config(key, default_value)
+
+    monkeypatch.setattr(settings, "get_config", small_lines)
+    long_line = json.dumps({"data": {"text": "x" * 200}}).encode()
+
+    results = post_stream(
+        client, [b'{"data": {"n": 1}}\n', long_line[:100], long_line[100:] + b"\n", b'{"data": {"n": 3}}\n']
+    )
+
+    assert results[0]["input_data"]["data"] == {"n": 1}
+    assert results[1]["error"] == {
+        "code": "payload_too_large",
+        "message": "Line exceeds 64 bytes",
+        "details": {"line": 2},
+    }
+    assert results[2]["input_data"]["data"] == {"n": 3}
+    assert len(results) == 3
@@ -0,0 +1,41 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+PAYLOAD = {"data": {"order": 1}}
+
+
+def test_echo_with_repeated_key_replays_response(client: TestClient) -> None:
+    headers = {"idempotency-key": uuid.uuid4().hex}
+
+    first = client.post("/echo", json=PAYLOAD, headers=headers)
+    second = client.post("/echo", json=PAYLOAD, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.headers["idempotent-replayed"] == "true"
+    # The processing timestamp shows that the endpoint did not run again
+    assert second.json() == first.json()
+
+
+def test_echo_with_key_reused_for_other_body_is_rejected(client: TestClient) -> None:
+    headers = {"idempotency-key": uuid.uuid4().hex}
+    client.post("/echo", json=PAYLOAD, headers=headers)
+
+    response = client.post("/echo", json={"data": {"order": 2}}, headers=headers)
+
+    assert response.status_code == 422
+    assert response.json()["detail"]["code"] == "idempotency_key_reused"
+
+
+def test_echo_with_overlong_key_is_rejected(client: TestClient) -> None:
+    response = client.post("/echo", json=PAYLOAD, headers={"idempotency-key": "k" * 256})
+
+    assert response.status_code == 400
+
+
+def test_echo_without_key_runs_every_time(client: TestClient) -> None:
+    first = client.post("/echo", json=PAYLOAD)
+    second = client.post("/echo", json=PAYLOAD)
+
+    assert "idempotent-replayed" not in second.headers
+    assert first.json()["processed_timestamp"] != second.json()["processed_timestamp"]
@@ -0,0 +1,33 @@
+import logging
+import uuid
+
+from fastapi.testclient import TestClient
+
+
+def test_logs_filtered_by_level_returns_matching_entries(client: TestClient) -> None:
+    marker = uuid.uuid4().hex
+    logging.getLogger("api.tests").error("error %s", marker)
+    logging.getLogger("api.tests").info("info %s", marker)
+
+    response = client.get("/logs", params={"level": "ERROR", "log_length": 1000})
+
+    assert response.status_code == 200
+    entries = [entry for entry in response.json()["logs"] if marker in entry]
+    assert len(entries) == 1
+    assert f"error {marker}" in entries[0]
+
+
+def test_logs_returns_at_most_log_length_entries(client: TestClient) -> None:
+    for index in range(5):
+        logging.getLogger("api.tests").warning("entry %d", index)
+
+    response = client.get("/logs", params={"log_length": 3})
+
+    assert response.status_code == 200
+    assert len(response.json()["logs"]) == 3
+
+
+def test_logs_rejects_negative_length(client: TestClient) -> None:
+    response = client.get("/logs", params={"log_length": -1})
+
+    assert response.status_code == 422
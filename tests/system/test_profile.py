@@ -0,0 +1,51 @@
+import dataclasses
+import threading
+from types import MappingProxyType
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import settings
+from src.config import profiler
+
+
+@pytest.fixture
+def enabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Enable the profiler for the test, by replacing the application's configuration snapshot"""
+    snapshot = settings.snapshot
+    values = MappingProxyType({**snapshot.values, "profiler_enabled": True, "profiler_max_seconds": 1})
+    monkeypatch.setattr(settings, "_snapshot", dataclasses.replace(snapshot, values=values))
+
+
+def test_profile_is_not_found_when_disabled(client: TestClient) -> None:
+    assert client.post("/profile", params={"seconds": 0.1}).status_code == 404
+
+
+def test_profile_returns_collapsed_stacks(client: TestClient, enabled: None) -> None:
+    response = client.post("/profile", params={"seconds": 0.2, "hz": 200, "include_idle": True})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert int(response.headers["x-profile-samples"]) > 10
+    assert float(response.headers["x-profile-overhead"]) < 1
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
+
+
+def test_profile_returns_speedscope_json(client: TestClient, enabled: None) -> None:
+    response = client.post("/profile", params={"seconds": 0.1, "format": "speedscope", "include_idle": True})
+
+    assert response.status_code == 200
+    assert "speedscope.json" in response.headers["content-disposition"]
+    assert response.json()["profiles"]
+
+
+def test_profile_rejects_longer_than_max_seconds(client: TestClient, enabled: None) -> None:
+    assert client.post("/profile", params={"seconds": 5}).status_code == 400
+
+
+def test_profile_conflicts_with_running_profile(client: TestClient, enabled: None) -> None:
+    lock: threading.Lock = profiler._profile_lock
+    with lock:
+        response = client.post("/profile", params={"seconds": 0.1})
+
+    assert response.status_code == 409
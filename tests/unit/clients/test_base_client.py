@@ -0,0 +1,247 @@
+from typing import AsyncIterator, List
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.clients import BaseClient, CircuitBreaker, ClientSettings, SharedClient
+from src.clients import base_client
+from src.models import CircuitOpenError, ServiceUnavailableError
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(base_client.time, "monotonic", fake)
+    return fake
+
+
+class Service:
+    """A stand-in service answering with queued responses and recording the requests"""
+
+    def __init__(self, *responses: httpx.Response) -> None:
+        self.responses = list(responses)
+        self.requests: List[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+
+async def start_shared(transport: httpx.AsyncBaseTransport, **settings: float) -> SharedClient:
+    shared = SharedClient()
+    # Retries without delays, unless a test asks for them
+    values = {"retries": 2, "retry_backoff": 0.0, **settings}
+    await shared.start(ClientSettings(**values), transport)  # type: ignore[arg-type]
+    return shared
+
+
+@pytest.fixture
+async def shared() -> AsyncIterator[SharedClient]:
+    client = SharedClient()
+    yield client
+    await client.close()
+
+
+def test_circuit_breaker_opens_after_consecutive_failures(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError) as info:
+        breaker.allow()
+    assert info.value.headers == {"Retry-After": "30"}
+
+
+def test_circuit_breaker_success_resets_failure_count(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert not breaker.is_open
+    breaker.allow()
+
+
+def test_circuit_breaker_lets_one_trial_call_through_after_reset_timeout(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record_success()
+
+    assert not breaker.is_open
+    breaker.allow()
+
+
+def test_circuit_breaker_reopens_after_failed_trial_call(clock: FakeClock) -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    breaker.allow()
+
+    breaker.record_failure()
+
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+async def test_request_retries_retryable_statuses() -> None:
+    service = Service(httpx.Response(503), httpx.Response(502), httpx.Response(200, json={"ok": True}))
+    shared = await start_shared(httpx.MockTransport(service))
+    client = BaseClient("http://service", shared=shared)
+
+    response = await client.get("/items")
+
+    assert response.json() == {"ok": True}
+    assert len(service.requests) == 3
+    await shared.close()
+
+
+async def test_request_returns_last_response_when_retries_are_exhausted() -> None:
+    service = Service(httpx.Response(503))
+    shared = await start_shared(httpx.MockTransport(service), retries=1)
+    client = BaseClient("http://service", shared=shared)
+
+    response = await client.get("/items")
+
+    assert response.status_code == 503
+    assert len(service.requests) == 2
+    await shared.close()
+
+
+async def test_request_does_not_retry_other_errors() -> None:
+    service = Service(httpx.Response(500), httpx.Response(200))
+    shared = await start_shared(httpx.MockTransport(service))
+
+    response = await BaseClient("http://service", shared=shared).get("/items")
+
+    assert response.status_code == 500
+    assert len(service.requests) == 1
+    await shared.close()
+
+
+async def test_request_retries_post_only_when_asked() -> None:
+    service = Service(httpx.Response(503), httpx.Response(503), httpx.Response(201))
+    shared = await start_shared(httpx.MockTransport(service))
+    client = BaseClient("http://service", shared=shared)
+
+    assert (await client.post("/items", json={})).status_code == 503
+    assert (await client.post("/items", json={}, retry=True)).status_code == 201
+    assert len(service.requests) == 3
+    await shared.close()
+
+
+async def test_request_fails_with_503_when_service_cannot_be_reached() -> None:
+    def refuse(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    shared = await start_shared(httpx.MockTransport(refuse), retries=1)
+
+    with pytest.raises(ServiceUnavailableError) as info:
+        await BaseClient("http://service", shared=shared).get("/items")
+    assert info.value.code == "upstream_unavailable"
+    await shared.close()
+
+
+async def test_request_is_rejected_while_circuit_is_open() -> None:
+    service = Service(httpx.Response(500))
+    shared = await start_shared(httpx.MockTransport(service))
+    client = BaseClient("http://service", shared=shared, circuit_breaker=CircuitBreaker(2, 30))
+    await client.get("/items")
+    await client.get("/items")
+
+    with pytest.raises(CircuitOpenError):
+        await client.get("/items")
+    assert len(service.requests) == 2
+    await shared.close()
+
+
+async def test_request_waits_for_retry_after(monkeypatch: pytest.MonkeyPatch) -> None:
+    delays: List[float] = []
+
+    async def record_sleep(delay: float) -> None:
+        delays.append(delay)
+
+    monkeypatch.setattr(base_client.asyncio, "sleep", record_sleep)
+    service = Service(httpx.Response(429, headers={"Retry-After": "1.5"}), httpx.Response(200))
+    shared = await start_shared(httpx.MockTransport(service), retry_max_backoff=2.0)
+
+    response = await BaseClient("http://service", shared=shared).get("/items")
+
+    assert response.status_code == 200
+    assert delays == [1.5]
+    await shared.close()
+
+
+async def test_request_gives_up_when_retry_after_exceeds_max_backoff() -> None:
+    service = Service(httpx.Response(503, headers={"Retry-After": "60"}), httpx.Response(200))
+    shared = await start_shared(httpx.MockTransport(service), retry_max_backoff=2.0)
+
+    response = await BaseClient("http://service", shared=shared).get("/items")
+
+    assert response.status_code == 503
+    assert len(service.requests) == 1
+    await shared.close()
+
+
+async def test_backoff_is_jittered_below_exponential_bound() -> None:
+    shared = await start_shared(httpx.MockTransport(Service(httpx.Response(200))), retry_backoff=0.1)
+    client = BaseClient("http://service", shared=shared)
+
+    for attempt in range(6):
+        assert 0 <= client._backoff(attempt, None) <= min(2.0, 0.1 * 2**attempt)
+    assert client._backoff(0, "Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert client._backoff(0, "not a date") is not None
+    await shared.close()
+
+
+async def test_request_sends_default_headers_to_base_url() -> None:
+    service = Service(httpx.Response(200))
+    shared = await start_shared(httpx.MockTransport(service))
+    client = BaseClient("http://service/api/", headers={"authorization": "Bearer token"}, shared=shared)
+
+    await client.get("/items", params={"page": 2}, headers={"x-request-id": "1"})
+
+    request = service.requests[0]
+    assert str(request.url) == "http://service/api/items?page=2"
+    assert request.headers["authorization"] == "Bearer token"
+    assert request.headers["x-request-id"] == "1"
+    await shared.close()
+
+
+async def test_request_round_trips_through_asgi_app() -> None:
+    stand_in = FastAPI()
+
+    @stand_in.post("/echo")
+    async def echo(payload: dict) -> dict:
+        return {"received": payload}
+
+    shared = await start_shared(httpx.ASGITransport(stand_in))
+
+    response = await BaseClient("http://stand-in", shared=shared).post("/echo", json={"a": 1})
+
+    assert response.status_code == 200
+    assert response.json() == {"received": {"a": 1}}
+    await shared.close()
+
+
+async def test_request_without_started_shared_client_fails(shared: SharedClient) -> None:
+    with pytest.raises(RuntimeError):
+        await BaseClient("http://service", shared=shared).get("/items")
@@ -0,0 +1,118 @@
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+from src.config import ConfigParameter, ConfigurationManager
+from src.config.watcher import ConfigWatcher
+
+BASE_CONFIG = Path(__file__).parents[3] / "config" / "config.json"
+
+
+def write_config(path: Path, **values: Any) -> None:
+    config: Dict[str, Any] = json.loads(BASE_CONFIG.read_text())
+    config.update(values)
+    path.write_text(json.dumps(config))
+
+
+@pytest.fixture
+def config_file(tmp_path: Path) -> Path:
+    path = tmp_path / "config.json"
+    write_config(path, app_name="first")
+    return path
+
+
+@pytest.fixture
+def manager(config_file: Path) -> ConfigurationManager:
+    return ConfigurationManager(str(config_file))
+
+
+def test_try_reload_config_applies_valid_file(manager: ConfigurationManager, config_file: Path) -> None:
+    generation = manager.snapshot.generation
+    write_config(config_file, app_name="second")
+
+    assert manager.try_reload_config()
+
+    assert manager.get_config(ConfigParameter.APP_NAME) == "second"
+    assert manager.snapshot.generation == generation + 1
+    assert manager.is_valid()
+
+
+def test_try_reload_config_keeps_snapshot_of_invalid_file(manager: ConfigurationManager, config_file: Path) -> None:
+    snapshot = manager.snapshot
+    write_config(config_file, app_name="second", app_port=70000)
+
+    assert not manager.try_reload_config()
+
+    assert manager.snapshot is snapshot
+    assert manager.get_config(ConfigParameter.APP_NAME) == "first"
+    assert not manager.is_valid()
+    assert "app_port" in manager.get_reason()
+
+
+def test_try_reload_config_rejects_unparsable_file(manager: ConfigurationManager, config_file: Path) -> None:
+    config_file.write_text("{")
+
+    assert not manager.try_reload_config()
+
+    assert manager.get_config(ConfigParameter.APP_NAME) == "first"
+    assert not manager.is_valid()
+
+
+def test_try_reload_config_restores_validity_after_fixed_file(manager: ConfigurationManager, config_file: Path) -> None:
+    write_config(config_file, client_retries=-1)
+    assert not manager.try_reload_config()
+    write_config(config_file, app_name="fixed")
+
+    assert manager.try_reload_config()
+
+    assert manager.is_valid()
+    assert manager.get_config(ConfigParameter.APP_NAME) == "fixed"
+
+
+def test_try_reload_config_notifies_reload_listeners(manager: ConfigurationManager, config_file: Path) -> None:
+    generations = []
+    manager.add_reload_listener(lambda snapshot: generations.append(snapshot.generation))
+    write_config(config_file, app_name="second")
+
+    manager.try_reload_config()
+
+    assert generations == [manager.snapshot.generation]
+
+
+def test_try_reload_config_restores_validity_before_notifying_listeners(
+    manager: ConfigurationManager, config_file: Path
+) -> None:
+    write_config(config_file, client_retries=-1)
+    manager.try_reload_config()
+    validity = []
+    manager.add_reload_listener(lambda snapshot: validity.append(manager.is_valid()))
+    write_config(config_file, app_name="fixed")
+
+    manager.try_reload_config()
+
+    assert validity == [True]
+
+
+def test_watcher_check_calls_on_change_only_after_change(config_file: Path) -> None:
+    changes = []
+    watcher = ConfigWatcher(str(config_file), lambda: changes.append(1))
+
+    watcher._check()
+    assert changes == []
+
+    write_config(config_file, app_name="a name of another length")
+    watcher._check()
+    watcher._check()
+    assert changes == [1]
+
+
+def test_watcher_check_ignores_missing_file(config_file: Path) -> None:
+    changes = []
+    watcher = ConfigWatcher(str(config_file), lambda: changes.append(1))
+    config_file.unlink()
+
+    watcher._check()
+
+    assert changes == []
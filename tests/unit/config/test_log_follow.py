@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+from src.config.log_follow import LogFollower, LogSubscription
+
+POLL_INTERVAL = 0.01
+
+
+def append(path: Path, *lines: str) -> None:
+    with open(path, "a") as f:
+        f.write("".join(f"{line}\n" for line in lines))
+
+
+async def receive(subscription: LogSubscription, count: int) -> List[Optional[str]]:
+    return [await asyncio.wait_for(subscription.queue.get(), 2) for _ in range(count)]
+
+
+async def follow(path: Path, **options: object) -> "tuple[LogFollower, LogSubscription]":
+    follower = LogFollower(str(path), poll_interval=POLL_INTERVAL)
+    subscription = follower.subscribe(**options)  # type: ignore[arg-type]
+    # Let the first poll open the file, lines from then on are delivered
+    await asyncio.sleep(POLL_INTERVAL * 5)
+    return follower, subscription
+
+
+@pytest.fixture
+def log_file(tmp_path: Path) -> Path:
+    path = tmp_path / "app.log"
+    append(path, "written before subscribing")
+    return path
+
+
+async def test_delivers_appended_lines_only(log_file: Path) -> None:
+    follower, subscription = await follow(log_file)
+    try:
+        append(log_file, "first", "second")
+        with open(log_file, "a") as f:
+            f.write("unfin")
+            f.flush()
+            await asyncio.sleep(POLL_INTERVAL * 5)
+            f.write("ished\n")
+
+        assert await receive(subscription, 3) == ["first", "second", "unfinished"]
+    finally:
+        follower.unsubscribe(subscription)
+
+
+async def test_continues_after_rotation(log_file: Path) -> None:
+    follower, subscription = await follow(log_file)
+    try:
+        append(log_file, "before rotation")
+        assert await receive(subscription, 1) == ["before rotation"]
+
+        # Lines written right before the rename are read from the rotated file
+        append(log_file, "last in rotated file")
+        os.rename(log_file, str(log_file) + ".1")
+        append(log_file, "first in new file", "second in new file")
+
+        assert await receive(subscription, 3) == [
+            "last in rotated file",
+            "first in new file",
+            "second in new file",
+        ]
+    finally:
+        follower.unsubscribe(subscription)
+
+
+async def test_continues_after_truncation(log_file: Path) -> None:
+    follower, subscription = await follow(log_file)
+    try:
+        log_file.write_text("")
+        await asyncio.sleep(POLL_INTERVAL * 5)
+        append(log_file, "after truncation")
+
+        assert await receive(subscription, 1) == ["after truncation"]
+    finally:
+        follower.unsubscribe(subscription)
+
+
+async def test_filters_by_level_including_continuation_lines(log_file: Path) -> None:
+    follower, subscription = await follow(log_file, min_level=logging.WARNING)
+    try:
+        append(
+            log_file,
+            "2024-01-01 - api - INFO - request done",
+            "2024-01-01 - api - ERROR - request failed",
+            "Traceback (most recent call last):",
+            '{"level": "DEBUG", "message": "details"}',
+            '{"level": "WARNING", "message": "slow"}',
+        )
+
+        assert await receive(subscription, 3) == [
+            "2024-01-01 - api - ERROR - request failed",
+            "Traceback (most recent call last):",
+            '{"level": "WARNING", "message": "slow"}',
+        ]
+    finally:
+        follower.unsubscribe(subscription)
+
+
+async def test_drops_subscriber_that_falls_behind(log_file: Path) -> None:
+    follower, slow = await follow(log_file, max_pending=2)
+    fast = follower.subscribe()
+    try:
+        append(log_file, "one", "two", "three")
+
+        assert await receive(fast, 3) == ["one", "two", "three"]
+        assert await receive(slow, 1) == [None]
+        assert slow.dropped
+    finally:
+        follower.unsubscribe(fast)
+
+
+async def test_stops_polling_with_last_subscriber(log_file: Path) -> None:
+    follower, subscription = await follow(log_file)
+    task = follower._task
+    assert task is not None
+
+    follower.unsubscribe(subscription)
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert follower._task is None
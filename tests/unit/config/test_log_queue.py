@@ -0,0 +1,102 @@
+import logging
+import threading
+from typing import List
+
+import pytest
+
+from src.config.log_queue import BoundedQueueHandler, LogWriter, OverflowPolicy
+
+
+class CollectingHandler(logging.Handler):
+    """Blocking handler that records the messages, optionally until released"""
+
+    def __init__(self, blocked: bool = False) -> None:
+        super().__init__()
+        self.messages: List[str] = []
+        self.released = threading.Event()
+        if not blocked:
+            self.released.set()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.released.wait(10)
+        self.messages.append(record.getMessage())
+
+
+def make_record(message: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord("tests", level, __file__, 0, message, None, None)
+
+
+def test_stop_writes_all_queued_records() -> None:
+    target = CollectingHandler(blocked=True)
+    queue_handler = BoundedQueueHandler(queue_size=1000)
+    writer = LogWriter(queue_handler, target)
+    writer.start()
+
+    for index in range(500):
+        queue_handler.handle(make_record(f"record {index}"))
+    # The writer is still stuck on the first record when stopping starts
+    threading.Timer(0.05, target.released.set).start()
+    writer.stop()
+
+    assert target.messages == [f"record {index}" for index in range(500)]
+    writer.stop()
+
+
+def test_stop_with_full_queue_still_stops_writer() -> None:
+    target = CollectingHandler()
+    queue_handler = BoundedQueueHandler(queue_size=10)
+    writer = LogWriter(queue_handler, target)
+    for index in range(10):
+        queue_handler.handle(make_record(f"record {index}"))
+    writer.start()
+
+    writer.stop()
+
+    assert target.messages == [f"record {index}" for index in range(10)]
+    assert writer._thread is None  # type: ignore[attr-defined]
+
+
+def test_renders_arguments_when_queued() -> None:
+    target = CollectingHandler()
+    queue_handler = BoundedQueueHandler()
+    writer = LogWriter(queue_handler, target)
+    values = [1]
+    queue_handler.handle(logging.LogRecord("tests", logging.INFO, __file__, 0, "values %s", (values,), None))
+    values.append(2)
+
+    writer.start()
+    writer.stop()
+
+    assert target.messages == ["values [1]"]
+
+
+def test_drop_oldest_keeps_newest_records() -> None:
+    queue_handler = BoundedQueueHandler(queue_size=3, overflow="drop_oldest")
+
+    for index in range(5):
+        queue_handler.handle(make_record(f"record {index}"))
+
+    assert [record.msg for record in list(queue_handler.records.queue)] == ["record 2", "record 3", "record 4"]
+
+
+def test_drop_debug_drops_only_debug_records_when_full() -> None:
+    target = CollectingHandler()
+    queue_handler = BoundedQueueHandler(queue_size=2, overflow=OverflowPolicy.DROP_DEBUG)
+    writer = LogWriter(queue_handler, target)
+    queue_handler.handle(make_record("first"))
+    queue_handler.handle(make_record("second"))
+
+    queue_handler.handle(make_record("dropped", logging.DEBUG))
+    # Blocks until the writer made room
+    starter = threading.Timer(0.05, writer.start)
+    starter.start()
+    queue_handler.handle(make_record("kept", logging.WARNING))
+    starter.join()
+    writer.stop()
+
+    assert target.messages == ["first", "second", "kept"]
+
+
+def test_rejects_unknown_policy() -> None:
+    with pytest.raises(ValueError):
+        BoundedQueueHandler(overflow="drop_newest")
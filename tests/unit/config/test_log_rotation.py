@@ -0,0 +1,102 @@
+import gzip
+import logging
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from src.config.log_rotation import CompressingRotatingFileHandler, open_log_segment
+
+
+def make_record(message: str) -> logging.LogRecord:
+    return logging.LogRecord("tests", logging.INFO, __file__, 0, message, None, None)
+
+
+def write_records(path: str, prefix: str, count: int, **options: object) -> None:
+    handler = CompressingRotatingFileHandler(path, **options)  # type: ignore[arg-type]
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    try:
+        for index in range(count):
+            handler.handle(make_record(f"{prefix} {index:04d} " + "x" * 40))
+    finally:
+        handler.close()
+
+
+def read_all_lines(path: Path) -> List[str]:
+    """Lines of the log file and all its archives, decompressed"""
+    lines = []
+    for segment in sorted(path.parent.glob(path.name + "*")):
+        if segment.name.endswith((".lock", ".tmp")):
+            continue
+        with open_log_segment(str(segment)) as f:
+            lines += f.read().decode("utf-8").splitlines()
+    return lines
+
+
+def test_rotates_by_size_and_compresses_archives(tmp_path: Path) -> None:
+    path = tmp_path / "app.log"
+
+    write_records(str(path), "record", 100, max_bytes=1000, backup_count=50, compression="gzip")
+
+    archives = sorted(name.name for name in tmp_path.glob("app.log.*.gz"))
+    assert archives and "app.log.1.gz" in archives
+    assert not list(tmp_path.glob("app.log.[0-9]"))
+    assert os.path.getsize(path) <= 1000
+    assert sorted(read_all_lines(path)) == sorted(f"record {index:04d} " + "x" * 40 for index in range(100))
+    with gzip.open(tmp_path / "app.log.1.gz", "rt") as f:
+        assert f.readline().startswith("record ")
+
+
+def test_keeps_backup_count_archives(tmp_path: Path) -> None:
+    path = tmp_path / "app.log"
+
+    write_records(str(path), "record", 100, max_bytes=500, backup_count=2, compression="none")
+
+    assert sorted(name.name for name in tmp_path.glob("app.log.*") if name.suffix != ".lock") == [
+        "app.log.1",
+        "app.log.2",
+    ]
+    # The newest records survive
+    assert f"record {99:04d} " + "x" * 40 in read_all_lines(path)
+
+
+def test_rotates_by_age_of_last_rotation(tmp_path: Path) -> None:
+    path = tmp_path / "app.log"
+    write_records(str(path), "old", 1, max_age=60, compression="none")
+    # The last rotation happened two minutes ago, also for a restarted process
+    past = time.time() - 120
+    os.utime(str(path) + ".lock", (past, past))
+
+    write_records(str(path), "new", 1, max_age=60, compression="none")
+
+    assert (tmp_path / "app.log.1").read_text().startswith("old")
+    assert path.read_text().startswith("new")
+
+
+def test_workers_rotating_same_file_lose_no_records(tmp_path: Path) -> None:
+    path = tmp_path / "app.log"
+    context = multiprocessing.get_context("fork")
+    options = {"max_bytes": 2000, "backup_count": 1000, "compression": "gzip"}
+    workers = [
+        context.Process(target=write_records, args=(str(path), f"worker-{worker}", 300), kwargs=options)
+        for worker in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+
+    lines = read_all_lines(path)
+
+    expected = [f"worker-{worker} {index:04d} " + "x" * 40 for worker in range(4) for index in range(300)]
+    assert sorted(lines) == sorted(expected)
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_rejects_unknown_compression(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        CompressingRotatingFileHandler(str(tmp_path / "app.log"), compression="brotli")
@@ -0,0 +1,82 @@
+import gzip
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+from src.config.log_tail import LogCursor, read_compressed_tail, read_log_tail, read_tail
+
+LINES = [f"line {index:03d}" for index in range(100)]
+
+
+@pytest.fixture
+def log_file(tmp_path: Path) -> Path:
+    path = tmp_path / "app.log"
+    path.write_text("".join(f"{line}\n" for line in LINES))
+    return path
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 64, 65536])
+def test_read_tail_returns_last_lines_for_any_block_size(log_file: Path, block_size: int) -> None:
+    lines, cursor = read_tail(str(log_file), 10, block_size=block_size)
+
+    assert lines == LINES[-10:]
+    assert cursor == log_file.read_bytes().index(b"line 090")
+
+
+def test_read_tail_pages_back_to_the_beginning(log_file: Path) -> None:
+    pages: List[List[str]] = []
+    cursor: Optional[int] = None
+    while True:
+        lines, cursor = read_tail(str(log_file), 30, before=cursor, block_size=16)
+        pages.insert(0, lines)
+        if cursor is None:
+            break
+
+    assert [line for page in pages for line in page] == LINES
+    assert [len(page) for page in pages] == [10, 30, 30, 30]
+
+
+def test_read_tail_keeps_last_line_without_newline(tmp_path: Path) -> None:
+    path = tmp_path / "app.log"
+    path.write_bytes(b"first\r\nsecond\r\nunfinished")
+
+    lines, cursor = read_tail(str(path), 2)
+
+    assert lines == ["second", "unfinished"]
+    assert cursor == len(b"first\r\n")
+
+
+def test_read_tail_of_empty_file_returns_nothing(tmp_path: Path) -> None:
+    path = tmp_path / "app.log"
+    path.write_bytes(b"")
+
+    assert read_tail(str(path), 10) == ([], None)
+
+
+def test_read_compressed_tail_matches_uncompressed(tmp_path: Path, log_file: Path) -> None:
+    archive = tmp_path / "app.log.1.gz"
+    archive.write_bytes(gzip.compress(log_file.read_bytes()))
+
+    assert read_compressed_tail(str(archive), 10) == read_tail(str(log_file), 10)
+    before = read_tail(str(log_file), 10)[1]
+    assert read_compressed_tail(str(archive), 5, before) == read_tail(str(log_file), 5, before)
+
+
+def test_read_log_tail_continues_into_rotated_archives(tmp_path: Path) -> None:
+    path = tmp_path / "app.log"
+    path.write_text("".join(f"{line}\n" for line in LINES[80:]))
+    (tmp_path / "app.log.1.gz").write_bytes(gzip.compress("".join(f"{line}\n" for line in LINES[40:80]).encode()))
+    (tmp_path / "app.log.2").write_text("".join(f"{line}\n" for line in LINES[:40]))
+
+    lines, cursor = read_log_tail(str(path), 30)
+    assert lines == LINES[70:]
+    assert cursor is not None and cursor[0] == 1
+
+    collected = lines
+    page_cursor: Optional[LogCursor] = cursor
+    while page_cursor is not None:
+        lines, page_cursor = read_log_tail(str(path), 30, page_cursor)
+        collected = lines + collected
+
+    assert collected == LINES
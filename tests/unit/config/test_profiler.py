@@ -0,0 +1,86 @@
+import threading
+import time
+from typing import Iterator
+
+import pytest
+
+from src.config import profiler
+from src.config.profiler import ProfilerBusyError, SamplingProfiler
+
+
+def spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy_thread() -> Iterator[threading.Thread]:
+    """A thread burning CPU in ``spin`` and one waiting idle, for the duration of the test"""
+    stop = threading.Event()
+    busy = threading.Thread(target=spin, args=(stop,), name="busy")
+    idle = threading.Thread(target=stop.wait, name="idle")
+    busy.start()
+    idle.start()
+    yield busy
+    stop.set()
+    busy.join()
+    idle.join()
+
+
+def test_run_samples_busy_thread(busy_thread: threading.Thread) -> None:
+    profile = SamplingProfiler(hz=200).run(0.2)
+
+    assert 0.2 <= profile.duration < 1
+    assert profile.samples > 10
+    assert 0 < profile.overhead < profile.duration
+    busy_samples = sum(count for (thread, _), count in profile.stacks.items() if thread == "busy")
+    assert busy_samples >= profile.samples // 2
+
+
+def test_run_leaves_out_idle_threads_unless_asked(busy_thread: threading.Thread) -> None:
+    threads = {thread for thread, _ in SamplingProfiler(hz=200).run(0.1).stacks}
+    all_threads = {thread for thread, _ in SamplingProfiler(hz=200, include_idle=True).run(0.1).stacks}
+
+    assert "idle" not in threads
+    assert "idle" in all_threads
+
+
+def test_collapsed_renders_one_line_per_stack(busy_thread: threading.Thread) -> None:
+    profile = SamplingProfiler(hz=200).run(0.2)
+
+    lines = profile.collapsed().splitlines()
+
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy
+    stack, count = busy[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert "spin (" in stack and "test_profiler.py:" in stack
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == sum(profile.stacks.values())
+
+
+def test_speedscope_renders_sampled_profile_per_thread(busy_thread: threading.Thread) -> None:
+    profile = SamplingProfiler(hz=200).run(0.2)
+
+    document = profile.speedscope()
+
+    frames = document["shared"]["frames"]
+    busy = next(entry for entry in document["profiles"] if entry["name"] == "busy")
+    assert busy["type"] == "sampled"
+    assert len(busy["samples"]) == len(busy["weights"])
+    assert busy["endValue"] == pytest.approx(sum(busy["weights"]))
+    assert any(frames[index]["name"] == "spin" for sample in busy["samples"] for index in sample)
+
+
+def test_run_rejects_concurrent_profile() -> None:
+    with profiler._profile_lock:
+        with pytest.raises(ProfilerBusyError):
+            SamplingProfiler().run(0.01)
+
+
+def test_run_releases_lock_after_profile() -> None:
+    SamplingProfiler().run(0.01)
+
+    started = time.perf_counter()
+    SamplingProfiler().run(0.01)
+
+    assert time.perf_counter() - started < 1
@@ -0,0 +1,125 @@
+import gzip
+import os
+import struct
+import zlib
+from typing import Any, List
+
+import pytest
+
+from src.controller.blueprint import compression
+from src.controller.blueprint.compression import StreamCompressor, _StreamDecompressor, negotiate
+from src.models import PayloadTooLargeError
+
+zstandard = compression.zstandard
+needs_zstd = pytest.mark.skipif(zstandard is None, reason="zstandard is not installed")
+
+# Compressible, but not to a handful of bytes, so it spans several zstd blocks
+BODY = b"".join(b'{"id": %d, "value": "%s"}\n' % (index, os.urandom(8).hex().encode()) for index in range(20000))
+
+
+def chunks(data: bytes, size: int) -> List[bytes]:
+    return [data[start : start + size] for start in range(0, len(data), size)]  # noqa: E203
+
+
+def decompress_in_chunks(decompressor: _StreamDecompressor, data: bytes, size: int) -> bytes:
+    return b"".join(decompressor.decompress(chunk) for chunk in chunks(data, size))
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, None),
+        ("", None),
+        ("gzip", "gzip"),
+        ("gzip, zstd", "zstd"),
+        ("gzip;q=1.0, zstd;q=0.5", "gzip"),
+        ("zstd;q=0, gzip", "gzip"),
+        ("*", "zstd"),
+        ("*;q=0.1, gzip;q=0.2", "gzip"),
+        ("identity", None),
+        ("gzip;q=invalid", None),
+    ],
+)
+def test_negotiate_picks_best_encoding_for_client(accept_encoding: str, expected: str) -> None:
+    assert negotiate(accept_encoding, ["zstd", "br", "gzip"]) == expected
+
+
+@pytest.mark.parametrize("encoding", ["gzip", pytest.param("zstd", marks=needs_zstd)])
+def test_stream_compressor_flushes_decodable_prefixes(encoding: str) -> None:
+    compressor = StreamCompressor(encoding, 3)
+    # Decoders of clients, which return all output decodable so far
+    client: Any = zlib.decompressobj(31) if encoding == "gzip" else zstandard.ZstdDecompressor().decompressobj()
+    received = b""
+    for chunk in chunks(BODY, 100000):
+        received += client.decompress(compressor.compress(chunk, flush=True))
+        # Streamed responses reach the client chunk by chunk
+        assert received == BODY[: len(received)] and len(received) % 100000 in (0, len(BODY) % 100000)
+    received += client.decompress(compressor.finish())
+
+    assert received == BODY
+
+
+@pytest.mark.parametrize("encoding", ["gzip", pytest.param("zstd", marks=needs_zstd)])
+def test_stream_decompressor_restores_compressed_body(encoding: str) -> None:
+    decompressor = _StreamDecompressor(encoding, len(BODY))
+
+    received = decompress_in_chunks(decompressor, compression.compress(BODY, encoding, 3), 4096)
+
+    assert received == BODY
+    assert decompressor.finished
+
+
+def test_gzip_decompressor_reports_truncated_body() -> None:
+    data = gzip.compress(BODY)
+    decompressor = _StreamDecompressor("gzip", len(BODY))
+
+    decompress_in_chunks(decompressor, data[:-10], 4096)
+
+    assert not decompressor.finished
+
+
+def test_decompressor_rejects_body_over_limit() -> None:
+    data = zlib.compress(bytes(10_000_000), wbits=31)
+    decompressor = _StreamDecompressor("gzip", 1_000_000)
+
+    with pytest.raises(PayloadTooLargeError):
+        decompress_in_chunks(decompressor, data, 4096)
+    # No more than one piece is decompressed beyond the limit
+    assert decompressor.size <= 1_000_000 + compression._DECOMPRESS_CHUNK
+
+
+@needs_zstd
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096, 1 << 20])
+@pytest.mark.parametrize("checksum", [False, True])
+def test_zstd_decompressor_finishes_only_at_end_of_frame(chunk_size: int, checksum: bool) -> None:
+    data = zstandard.ZstdCompressor(level=3, write_checksum=checksum).compress(BODY)
+    decompressor = _StreamDecompressor("zstd", len(BODY))
+
+    received = decompress_in_chunks(decompressor, data[:-1], chunk_size)
+    assert not decompressor.finished
+    received += decompressor.decompress(data[-1:])
+
+    assert decompressor.finished
+    assert received == BODY
+
+
+@needs_zstd
+def test_zstd_decompressor_follows_several_and_skippable_frames() -> None:
+    compressor = zstandard.ZstdCompressor(level=3)
+    skippable = struct.pack("<II", 0x184D2A50, 5) + b"skip!"
+    data = compressor.compress(BODY[:1000]) + skippable + compressor.compress(BODY[1000:])
+    decompressor = _StreamDecompressor("zstd", len(BODY))
+
+    received = decompress_in_chunks(decompressor, data, 333)
+
+    assert decompressor.finished
+    assert received == BODY
+
+
+@needs_zstd
+def test_zstd_decompressor_rejects_body_over_limit() -> None:
+    data = zstandard.ZstdCompressor(level=3).compress(bytes(10_000_000))
+    decompressor = _StreamDecompressor("zstd", 1_000_000)
+
+    with pytest.raises(PayloadTooLargeError):
+        decompress_in_chunks(decompressor, data, 4096)
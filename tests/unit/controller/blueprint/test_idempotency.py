@@ -0,0 +1,123 @@
+import asyncio
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.controller.blueprint.idempotency import (
+    Handler,
+    IdempotencyManager,
+    IdempotencyStore,
+    MemoryIdempotencyStore,
+    SqliteIdempotencyStore,
+)
+from src.models import ConflictError, ValidationError
+
+
+def make_request(body: bytes = b"{}", key: str = "key-1") -> Request:
+    async def receive() -> dict:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/orders",
+        "query_string": b"",
+        "headers": [(b"idempotency-key", key.encode())],
+    }
+    return Request(scope, receive)
+
+
+def counting_handler(status_code: int = 201, delay: float = 0.0) -> Tuple[Handler, List[bytes]]:
+    calls: List[bytes] = []
+
+    async def handler(request: Request) -> Response:
+        calls.append(await request.body())
+        await asyncio.sleep(delay)
+        return Response(f"response {len(calls)}".encode(), status_code=status_code)
+
+    return handler, calls
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request: pytest.FixtureRequest, tmp_path: Path) -> IdempotencyStore:
+    if request.param == "sqlite":
+        return SqliteIdempotencyStore(str(tmp_path / "idempotency.db"))
+    return MemoryIdempotencyStore()
+
+
+async def test_repeated_key_replays_first_response(store: IdempotencyStore) -> None:
+    handler, calls = counting_handler()
+    wrapped = IdempotencyManager(store).wrap(handler, "/orders")
+
+    first = await wrapped(make_request())
+    second = await wrapped(make_request())
+
+    assert len(calls) == 1
+    assert (second.status_code, second.body) == (first.status_code, first.body)
+    assert second.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+
+
+async def test_key_reused_for_other_body_is_rejected(store: IdempotencyStore) -> None:
+    handler, calls = counting_handler()
+    wrapped = IdempotencyManager(store).wrap(handler, "/orders")
+    await wrapped(make_request(b'{"amount": 1}'))
+
+    with pytest.raises(ValidationError):
+        await wrapped(make_request(b'{"amount": 2}'))
+    assert len(calls) == 1
+
+
+async def test_server_errors_are_not_stored(store: IdempotencyStore) -> None:
+    handler, calls = counting_handler(status_code=503)
+    wrapped = IdempotencyManager(store).wrap(handler, "/orders")
+
+    await wrapped(make_request())
+    await wrapped(make_request())
+
+    assert len(calls) == 2
+
+
+async def test_concurrent_duplicates_wait_for_first_request(store: IdempotencyStore) -> None:
+    handler, calls = counting_handler(delay=0.05)
+    wrapped = IdempotencyManager(store).wrap(handler, "/orders")
+
+    responses = await asyncio.gather(*(wrapped(make_request()) for _ in range(5)))
+
+    assert len(calls) == 1
+    assert {response.body for response in responses} == {b"response 1"}
+
+
+async def test_requests_without_key_are_not_deduplicated(store: IdempotencyStore) -> None:
+    handler, calls = counting_handler()
+    wrapped = IdempotencyManager(store).wrap(handler, "/orders")
+    request = make_request()
+    request.scope["headers"] = []
+
+    await wrapped(request)
+    await wrapped(request)
+
+    assert len(calls) == 2
+
+
+async def test_duplicate_in_other_worker_waits_for_slow_first_request(tmp_path: Path) -> None:
+    path = str(tmp_path / "idempotency.db")
+    first_worker = IdempotencyManager(SqliteIdempotencyStore(path))
+    second_worker = IdempotencyManager(SqliteIdempotencyStore(path))
+    for manager in (first_worker, second_worker):
+        manager.configure(wait_timeout=0.15)
+    handler, calls = counting_handler(delay=0.6)
+
+    first = asyncio.create_task(first_worker.wrap(handler, "/orders")(make_request()))
+    # Longer than the claim's lease, which the running request renews
+    await asyncio.sleep(0.25)
+    with pytest.raises(ConflictError):
+        await second_worker.wrap(handler, "/orders")(make_request())
+    await first
+    replayed = await second_worker.wrap(handler, "/orders")(make_request())
+
+    assert len(calls) == 1
+    assert replayed.headers["idempotent-replayed"] == "true"
@@ -0,0 +1,109 @@
+import logging
+from typing import Iterator, List
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from src.config.log_format import MAX_HELD_RECORDS, RequestContextFilter, SamplingFilter, SamplingRule
+from src.controller.blueprint.logging_middleware import LoggingContextMiddleware
+
+logger = logging.getLogger("tests.sampled")
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: List[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+    @property
+    def messages(self) -> List[str]:
+        return [record.getMessage() for record in self.records]
+
+
+@pytest.fixture
+def handler() -> Iterator[CollectingHandler]:
+    """Collects the records of ``logger`` that a sampling rule keeping none of the INFO records lets through"""
+    collecting = CollectingHandler()
+    collecting.addFilter(RequestContextFilter())
+    collecting.addFilter(SamplingFilter([SamplingRule(rate=0.0, logger="tests")]))
+    logger.addHandler(collecting)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    yield collecting
+    logger.removeHandler(collecting)
+
+
+async def succeed(request: Request) -> PlainTextResponse:
+    logger.info("handling %s", request.url.path)
+    return PlainTextResponse("ok")
+
+
+async def fail_with_status(request: Request) -> PlainTextResponse:
+    logger.info("handling %s", request.url.path)
+    logger.warning("upstream answered 503")
+    return PlainTextResponse("unavailable", status_code=503)
+
+
+async def raise_error(request: Request) -> PlainTextResponse:
+    logger.info("handling %s", request.url.path)
+    raise RuntimeError("boom")
+
+
+async def log_many(request: Request) -> PlainTextResponse:
+    for index in range(MAX_HELD_RECORDS + 10):
+        logger.debug("step %d", index)
+    return PlainTextResponse("failed", status_code=500)
+
+
+@pytest.fixture
+def client() -> Iterator[TestClient]:
+    routes = [
+        Route("/ok", succeed),
+        Route("/unavailable", fail_with_status),
+        Route("/error", raise_error),
+        Route("/many", log_many),
+    ]
+    app = Starlette(routes=routes)
+    app.add_middleware(LoggingContextMiddleware)
+    with TestClient(app, raise_server_exceptions=False) as test_client:
+        yield test_client
+
+
+def test_sampled_records_of_successful_request_are_dropped(client: TestClient, handler: CollectingHandler) -> None:
+    assert client.get("/ok").status_code == 200
+
+    assert handler.messages == []
+
+
+def test_sampled_records_of_5xx_request_are_written(client: TestClient, handler: CollectingHandler) -> None:
+    assert client.get("/unavailable").status_code == 503
+
+    assert handler.messages == ["upstream answered 503", "handling /unavailable"]
+    assert all(record.route == "/unavailable" for record in handler.records)
+
+
+def test_sampled_records_of_failing_request_are_written(client: TestClient, handler: CollectingHandler) -> None:
+    assert client.get("/error").status_code == 500
+
+    assert handler.messages == ["handling /error"]
+
+
+def test_held_records_are_bounded_per_request(client: TestClient, handler: CollectingHandler) -> None:
+    client.get("/many")
+
+    assert len(handler.records) == MAX_HELD_RECORDS
+    assert handler.messages[0] == "step 0"
+
+
+def test_held_records_do_not_leak_into_next_request(client: TestClient, handler: CollectingHandler) -> None:
+    client.get("/ok")
+    client.get("/unavailable")
+
+    assert "handling /ok" not in handler.messages
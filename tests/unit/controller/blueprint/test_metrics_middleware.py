@@ -0,0 +1,119 @@
+from typing import Iterator, Optional
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.types import Receive, Scope, Send
+
+from src.controller.blueprint.metrics_middleware import UNMATCHED_ROUTE, RequestMetricsMiddleware
+
+
+def requests_total(method: str, route: str, status_class: str) -> float:
+    value: Optional[float] = REGISTRY.get_sample_value(
+        "http_requests_total", {"method": method, "route": route, "status_class": status_class}
+    )
+    return value or 0.0
+
+
+def in_progress(method: str, route: str) -> float:
+    value = REGISTRY.get_sample_value("http_requests_in_progress", {"method": method, "route": route})
+    return value or 0.0
+
+
+class FailingMiddleware:
+    """Raises before the response starts for paths under /fail-early"""
+
+    def __init__(self, app: object) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith("/metrics-test/fail-early"):
+            raise RuntimeError("boom")
+        await self.app(scope, receive, send)  # type: ignore[operator]
+
+
+@pytest.fixture
+def app() -> FastAPI:
+    app = FastAPI()
+    observed = {}
+
+    @app.get("/metrics-test/items/{item_id}")
+    async def get_item(item_id: int) -> dict:
+        observed["in_progress"] = in_progress("GET", "/metrics-test/items/{item_id}")
+        return {"id": item_id}
+
+    @app.get("/metrics-test/fail-early")
+    async def fail_early() -> dict:
+        return {}
+
+    sub_app = Starlette(routes=[Route("/inner", lambda request: PlainTextResponse("inner"))])
+    app.mount("/metrics-test/mounted", sub_app)
+    app.add_middleware(FailingMiddleware)
+    app.add_middleware(RequestMetricsMiddleware)
+    app.state.observed = observed
+    return app
+
+
+@pytest.fixture
+def client(app: FastAPI) -> Iterator[TestClient]:
+    with TestClient(app, raise_server_exceptions=False) as test_client:
+        yield test_client
+
+
+def test_requests_are_labeled_with_route_template(client: TestClient) -> None:
+    before = requests_total("GET", "/metrics-test/items/{item_id}", "2xx")
+
+    for item_id in range(3):
+        assert client.get(f"/metrics-test/items/{item_id}").status_code == 200
+
+    assert requests_total("GET", "/metrics-test/items/{item_id}", "2xx") == before + 3
+    assert requests_total("GET", "/metrics-test/items/0", "2xx") == 0
+
+
+def test_request_is_in_progress_under_its_route_while_handled(client: TestClient, app: FastAPI) -> None:
+    # The first request of a path resolves the template by matching all routes, later ones remember it
+    for _ in range(2):
+        client.get("/metrics-test/items/7")
+        assert app.state.observed["in_progress"] >= 1
+
+    assert in_progress("GET", "/metrics-test/items/{item_id}") == 0
+
+
+def test_unknown_paths_share_unmatched_label(client: TestClient) -> None:
+    before = requests_total("GET", UNMATCHED_ROUTE, "4xx")
+
+    client.get("/metrics-test/unknown/1")
+    client.get("/metrics-test/unknown/2")
+
+    assert requests_total("GET", UNMATCHED_ROUTE, "4xx") == before + 2
+
+
+def test_method_mismatch_is_labeled_with_route_template(client: TestClient) -> None:
+    before = requests_total("POST", "/metrics-test/items/{item_id}", "4xx")
+
+    assert client.post("/metrics-test/items/1").status_code == 405
+
+    assert requests_total("POST", "/metrics-test/items/{item_id}", "4xx") == before + 1
+
+
+def test_error_before_response_start_counts_as_5xx(client: TestClient) -> None:
+    before = requests_total("GET", "/metrics-test/fail-early", "5xx")
+
+    assert client.get("/metrics-test/fail-early").status_code == 500
+
+    assert requests_total("GET", "/metrics-test/fail-early", "5xx") == before + 1
+    assert in_progress("GET", "/metrics-test/fail-early") == 0
+
+
+def test_mounted_app_is_labeled_with_mount_path(client: TestClient) -> None:
+    before = requests_total("GET", "/metrics-test/mounted", "2xx")
+
+    for _ in range(2):
+        assert client.get("/metrics-test/mounted/inner").text == "inner"
+
+    assert requests_total("GET", "/metrics-test/mounted", "2xx") == before + 2
+    assert requests_total("GET", "/inner", "2xx") == 0
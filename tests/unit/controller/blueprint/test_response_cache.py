@@ -0,0 +1,190 @@
+import gzip
+import time
+from typing import Iterator, List
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from src.controller.blueprint.response_cache import CachedResponse, ResponseCache, _etag_matches
+
+# Large enough to be compressed
+PAYLOAD = {"items": [f"item {index}" for index in range(200)]}
+
+
+def entry(body: bytes = b"{}", expires: float = float("inf")) -> CachedResponse:
+    return CachedResponse(body, 200, [(b"content-type", b"application/json")], '"tag"', expires)
+
+
+class Endpoint:
+    """Counts its calls; ``on_call`` runs while a response is being computed"""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.on_call: List[ResponseCache] = []
+
+    async def __call__(self, request: Request) -> Response:
+        self.calls += 1
+        for cache in self.on_call:
+            cache.clear()
+        if request.query_params.get("status") == "500":
+            return JSONResponse({"error": True}, status_code=500)
+        return JSONResponse(PAYLOAD)
+
+
+@pytest.fixture
+def cache() -> ResponseCache:
+    return ResponseCache(max_entries=4, ttl=60)
+
+
+@pytest.fixture
+def endpoint() -> Endpoint:
+    return Endpoint()
+
+
+@pytest.fixture
+def client(cache: ResponseCache, endpoint: Endpoint) -> Iterator[TestClient]:
+    route = Route("/items", endpoint)
+    cache.cache_route(route)
+    with TestClient(Starlette(routes=[route])) as test_client:
+        yield test_client
+
+
+def test_get_evicts_least_recently_used(cache: ResponseCache) -> None:
+    for key in "abcd":
+        cache.put(key, entry())
+    cache.get("a")
+
+    cache.put("e", entry())
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert len(cache) == 4
+
+
+def test_get_drops_expired_entries(cache: ResponseCache) -> None:
+    cache.put("a", entry(expires=time.monotonic() - 1))
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_put_discards_responses_computed_before_clear(cache: ResponseCache) -> None:
+    generation = cache.generation
+    cache.clear()
+
+    cache.put("a", entry(), generation)
+
+    assert cache.get("a") is None
+
+
+def test_configure_drops_entries_and_advances_generation(cache: ResponseCache) -> None:
+    cache.put("a", entry())
+    generation = cache.generation
+
+    cache.configure(max_entries=10, ttl=5)
+
+    assert len(cache) == 0
+    assert cache.generation == generation + 1
+
+
+@pytest.mark.parametrize(
+    "if_none_match, matches",
+    [
+        ('"tag"', True),
+        ('W/"tag"', True),
+        ('"other", W/"tag"', True),
+        ("*", True),
+        ('"other"', False),
+        ('"tag-gzip"', False),
+        ("tag", False),
+    ],
+)
+def test_etag_matches_uses_weak_comparison(if_none_match: str, matches: bool) -> None:
+    assert _etag_matches(if_none_match, '"tag"') is matches
+
+
+def test_cached_route_serves_repeated_requests_from_cache(client: TestClient, endpoint: Endpoint) -> None:
+    first = client.get("/items", headers={"accept-encoding": "identity"})
+    second = client.get("/items", headers={"accept-encoding": "identity"})
+
+    assert endpoint.calls == 1
+    assert first.json() == second.json() == PAYLOAD
+    assert first.headers["etag"] == second.headers["etag"]
+
+
+def test_cached_route_keys_by_query_string(client: TestClient, endpoint: Endpoint) -> None:
+    client.get("/items?page=1")
+    client.get("/items?page=2")
+
+    assert endpoint.calls == 2
+
+
+def test_cached_route_does_not_store_errors(client: TestClient, endpoint: Endpoint) -> None:
+    client.get("/items?status=500")
+    client.get("/items?status=500")
+
+    assert endpoint.calls == 2
+
+
+def test_cached_route_does_not_store_response_computed_during_clear(
+    client: TestClient, cache: ResponseCache, endpoint: Endpoint
+) -> None:
+    # A configuration reload while the endpoint runs may have changed its output
+    endpoint.on_call.append(cache)
+    client.get("/items")
+    endpoint.on_call.clear()
+
+    client.get("/items")
+
+    assert endpoint.calls == 2
+
+
+def test_cached_route_answers_matching_if_none_match_with_304(client: TestClient) -> None:
+    etag = client.get("/items", headers={"accept-encoding": "identity"}).headers["etag"]
+
+    response = client.get("/items", headers={"accept-encoding": "identity", "if-none-match": f"W/{etag}"})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+
+def test_cached_route_serves_encoded_variants_with_own_etags(client: TestClient) -> None:
+    identity = client.get("/items", headers={"accept-encoding": "identity"})
+    encoded = client.get("/items", headers={"accept-encoding": "gzip"})
+
+    assert encoded.headers["content-encoding"] == "gzip"
+    assert encoded.headers["etag"] != identity.headers["etag"]
+    assert "accept-encoding" in encoded.headers["vary"].lower()
+    assert encoded.json() == PAYLOAD
+
+    # The unencoded entity tag does not validate the gzip variant, and vice versa
+    stale = client.get("/items", headers={"accept-encoding": "gzip", "if-none-match": identity.headers["etag"]})
+    assert stale.status_code == 200
+    fresh = client.get("/items", headers={"accept-encoding": "gzip", "if-none-match": encoded.headers["etag"]})
+    assert fresh.status_code == 304
+
+
+def test_cached_route_compresses_variant_once(client: TestClient, cache: ResponseCache) -> None:
+    client.get("/items", headers={"accept-encoding": "gzip"})
+    cached = cache.get("/items?")
+    assert cached is not None
+    variant = cached.variants["gzip"]
+
+    client.get("/items", headers={"accept-encoding": "gzip"})
+
+    assert cached.variants["gzip"] is variant
+    assert gzip.decompress(variant) == cached.body
+
+
+def test_disabled_cache_calls_endpoint_every_time(client: TestClient, cache: ResponseCache, endpoint: Endpoint) -> None:
+    cache.configure(max_entries=4, ttl=60, enabled=False)
+
+    client.get("/items")
+    client.get("/items")
+
+    assert endpoint.calls == 2
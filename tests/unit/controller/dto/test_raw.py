@@ -0,0 +1,103 @@
+import json
+from typing import Any, Dict
+
+import pytest
+from fastapi.exceptions import RequestValidationError
+
+from src.controller.dto import raw
+from src.controller.dto.raw import project_json_object, validate_json_object
+
+
+@pytest.fixture(params=["msgspec", "orjson", "json"])
+def parser(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Run a test with each parser, disabling the faster ones"""
+    if request.param in ("orjson", "json"):
+        monkeypatch.setattr(raw, "msgspec", None)
+    if request.param == "json":
+        monkeypatch.setattr(raw, "orjson", None)
+    if request.param != "json" and getattr(raw, request.param) is None:
+        pytest.skip(f"{request.param} is not installed")
+    return str(request.param)
+
+
+def error_of(body: bytes, **members: Any) -> Dict[str, Any]:
+    with pytest.raises(RequestValidationError) as info:
+        validate_json_object(body, **members)
+    return dict(info.value.errors()[0])
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b'{"data": {"a": [1, 2]}}',
+        b'  {"data": {}, "metadata": null, "other": 1}',
+        b'{"data": {}, "metadata": {"source": "test"}}',
+    ],
+)
+def test_validate_json_object_accepts_valid_bodies(parser: str, body: bytes) -> None:
+    validate_json_object(body, required=("data",), nullable=("metadata",))
+
+
+@pytest.mark.parametrize("body", [b"", b"{", b'{"data": {}} trailing', b'{"data": {"a": }}'])
+def test_validate_json_object_rejects_malformed_json(parser: str, body: bytes) -> None:
+    error = error_of(body)
+
+    assert error["type"] == "json_invalid"
+    assert error["loc"] == ("body",)
+
+
+@pytest.mark.parametrize("body", [b"[]", b'"text"', b"null", b"1"])
+def test_validate_json_object_rejects_other_top_level_values(parser: str, body: bytes) -> None:
+    assert error_of(body)["type"] == "json_invalid"
+
+
+def test_validate_json_object_rejects_missing_required_member(parser: str) -> None:
+    error = error_of(b'{"metadata": {}}', required=("data",))
+
+    assert error["type"] == "missing"
+    assert error["loc"] == ("body", "data")
+
+
+@pytest.mark.parametrize("value", [b"[]", b'"text"', b"1", b"null"])
+def test_validate_json_object_rejects_required_member_of_other_type(parser: str, value: bytes) -> None:
+    error = error_of(b'{"data": ' + value + b"}", required=("data",))
+
+    assert error["type"] == "dict_type"
+    assert error["loc"] == ("body", "data")
+
+
+def test_validate_json_object_rejects_optional_member_of_other_type(parser: str) -> None:
+    error = error_of(b'{"data": {}, "metadata": []}', required=("data",), nullable=("metadata",))
+
+    assert error["type"] == "dict_type"
+    assert error["loc"] == ("body", "metadata")
+
+
+def test_validate_json_object_rejects_null_optional_member(parser: str) -> None:
+    assert error_of(b'{"data": null}', optional=("data",))["type"] == "dict_type"
+
+
+def project(body: bytes) -> bytes:
+    members = validate_json_object(body, optional=("data",), nullable=("metadata",))
+    return project_json_object(body, members, {"data": b"{}", "metadata": b"{}"})
+
+
+def test_project_json_object_returns_body_of_same_shape(parser: str) -> None:
+    body = b'{"metadata": {"b": 2}, "data": {"a": [1.50, "\\u00e9"]}}'
+
+    assert project(body) is body
+
+
+@pytest.mark.parametrize(
+    "body, expected",
+    [
+        (b"{}", {"data": {}, "metadata": {}}),
+        (b'{"data": {"a": 1}}', {"data": {"a": 1}, "metadata": {}}),
+        (b'{"data": {"a": 1}, "metadata": null}', {"data": {"a": 1}, "metadata": {}}),
+        (b'{"data": {"a": 1}, "metadata": {"b": 2}, "other": [3]}', {"data": {"a": 1}, "metadata": {"b": 2}}),
+    ],
+)
+def test_project_json_object_fills_defaults_and_drops_other_members(
+    parser: str, body: bytes, expected: Dict[str, Any]
+) -> None:
+    assert json.loads(project(body)) == expected
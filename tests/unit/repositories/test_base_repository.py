@@ -0,0 +1,226 @@
+import asyncio
+from contextlib import aclosing
+from pathlib import Path
+from typing import AsyncIterator, List
+
+import pytest
+
+from src.models import ServiceUnavailableError
+from src.repositories import BaseRepository, ConnectionPool, Database, DatabaseConnection, DatabaseSettings
+from src.repositories.sqlite_backend import connect_sqlite
+
+
+class ItemRepository(BaseRepository):
+    table = "items"
+
+
+class CountingConnect:
+    """Opens SQLite connections, counting them, or fails while ``fail`` is set"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.opened = 0
+        self.fail = False
+
+    async def __call__(self) -> DatabaseConnection:
+        if self.fail:
+            raise OSError("unable to open database")
+        self.opened += 1
+        return await connect_sqlite(self.path, 16)
+
+
+@pytest.fixture
+def database_path(tmp_path: Path) -> str:
+    return str(tmp_path / "app.db")
+
+
+@pytest.fixture
+async def database(database_path: str) -> AsyncIterator[Database]:
+    database = Database()
+    await database.start(DatabaseSettings(url=f"sqlite:///{database_path}", pool_size=2, pool_timeout=0.1))
+    repository = ItemRepository(database)
+    await repository.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+    yield database
+    await database.close()
+
+
+async def test_pool_reuses_returned_connections(database_path: str) -> None:
+    connect = CountingConnect(database_path)
+    pool = ConnectionPool(connect, max_size=2)
+
+    async with pool.acquire() as first:
+        pass
+    async with pool.acquire() as second:
+        assert pool.in_use == 1
+
+    assert second is first
+    assert connect.opened == 1
+    assert pool.size == 1 and pool.in_use == 0
+    await pool.close()
+
+
+async def test_pool_fails_with_503_when_exhausted(database_path: str) -> None:
+    pool = ConnectionPool(CountingConnect(database_path), max_size=1, acquire_timeout=0.05)
+
+    async with pool.acquire():
+        with pytest.raises(ServiceUnavailableError) as info:
+            async with pool.acquire():
+                pass
+
+    assert info.value.code == "database_pool_exhausted"
+    await pool.close()
+
+
+async def test_pool_returns_slot_when_opening_connection_fails(database_path: str) -> None:
+    connect = CountingConnect(database_path)
+    pool = ConnectionPool(connect, max_size=1, acquire_timeout=0.05)
+    connect.fail = True
+
+    with pytest.raises(OSError):
+        async with pool.acquire():
+            pass
+    connect.fail = False
+
+    async with pool.acquire():
+        assert pool.size == 1
+    await pool.close()
+
+
+async def test_pool_discards_connection_of_cancelled_task(database_path: str) -> None:
+    pool = ConnectionPool(CountingConnect(database_path), max_size=1, acquire_timeout=0.05)
+    acquired = asyncio.Event()
+
+    async def hold() -> None:
+        async with pool.acquire():
+            acquired.set()
+            await asyncio.sleep(10)
+
+    task = asyncio.create_task(hold())
+    await acquired.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert pool.size == 0
+    async with pool.acquire():
+        assert pool.in_use == 1
+    await pool.close()
+
+
+async def test_pool_rolls_back_open_transaction_on_return(database: Database) -> None:
+    async with database.pool.acquire() as connection:
+        await connection.begin()
+        await connection.execute("INSERT INTO items (name) VALUES (?)", ("uncommitted",))
+
+    assert await ItemRepository(database).fetch_all("SELECT * FROM items") == []
+
+
+async def test_pool_rejects_acquire_after_close(database_path: str) -> None:
+    pool = ConnectionPool(CountingConnect(database_path))
+    await pool.close()
+
+    with pytest.raises(RuntimeError):
+        async with pool.acquire():
+            pass
+
+
+async def test_transaction_commits_on_success(database: Database) -> None:
+    repository = ItemRepository(database)
+
+    async with repository.transaction() as connection:
+        await connection.execute("INSERT INTO items (name) VALUES (?)", ("a",))
+        await connection.execute("INSERT INTO items (name) VALUES (?)", ("b",))
+
+    rows = await repository.fetch_all("SELECT name FROM items ORDER BY id")
+    assert rows == [{"name": "a"}, {"name": "b"}]
+
+
+async def test_transaction_rolls_back_on_exception(database: Database) -> None:
+    repository = ItemRepository(database)
+
+    with pytest.raises(ValueError):
+        async with repository.transaction() as connection:
+            await connection.execute("INSERT INTO items (name) VALUES (?)", ("a",))
+            raise ValueError("abort")
+
+    assert await repository.fetch_one("SELECT * FROM items") is None
+    assert database.pool.in_use == 0
+
+
+async def test_stream_yields_all_rows_in_batches(database: Database) -> None:
+    repository = ItemRepository(database)
+    await repository.insert_many({"name": f"item {index}"} for index in range(25))
+
+    names = [row["name"] async for row in repository.stream("SELECT name FROM items ORDER BY id", batch_size=10)]
+
+    assert names == [f"item {index}" for index in range(25)]
+    assert database.pool.in_use == 0
+
+
+async def test_stream_closed_early_returns_connection(database: Database) -> None:
+    repository = ItemRepository(database)
+    await repository.insert_many({"name": f"item {index}"} for index in range(25))
+    names: List[str] = []
+
+    async with aclosing(repository.stream("SELECT name FROM items ORDER BY id", batch_size=10)) as rows:
+        async for row in rows:
+            names.append(row["name"])
+            if len(names) == 3:
+                break
+
+    assert names == ["item 0", "item 1", "item 2"]
+    assert database.pool.in_use == 0
+
+
+async def test_insert_many_writes_rows_in_chunks(database: Database) -> None:
+    repository = ItemRepository(database)
+
+    count = await repository.insert_many(({"id": index, "name": str(index)} for index in range(7)), chunk_size=3)
+
+    assert count == 7
+    assert len(await repository.fetch_all("SELECT * FROM items")) == 7
+
+
+async def test_upsert_many_updates_existing_rows(database: Database) -> None:
+    repository = ItemRepository(database)
+    await repository.insert_many([{"id": 1, "name": "old"}])
+
+    await repository.upsert_many([{"id": 1, "name": "new"}, {"id": 2, "name": "added"}], ["id"])
+
+    rows = await repository.fetch_all("SELECT id, name FROM items ORDER BY id")
+    assert rows == [{"id": 1, "name": "new"}, {"id": 2, "name": "added"}]
+
+
+async def test_insert_many_requires_table(database: Database) -> None:
+    with pytest.raises(TypeError):
+        await BaseRepository(database).insert_many([{"id": 1}])
+
+
+async def test_insert_many_rejects_invalid_column_names(database: Database) -> None:
+    with pytest.raises(ValueError):
+        await ItemRepository(database).insert_many([{"name; DROP TABLE items": "x"}])
+
+
+async def test_database_uses_one_connection_for_in_memory_sqlite() -> None:
+    database = Database()
+    await database.start(DatabaseSettings(url="sqlite://", pool_size=5))
+    repository = ItemRepository(database)
+
+    await repository.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+    await repository.insert_many([{"name": "a"}])
+
+    assert database.pool.max_size == 1
+    assert await repository.fetch_one("SELECT name FROM items") == {"name": "a"}
+    await database.close()
+
+
+def test_database_settings_detect_in_memory_urls() -> None:
+    assert DatabaseSettings(url="sqlite://").in_memory
+    assert DatabaseSettings(url="sqlite:///:memory:").in_memory
+    assert not DatabaseSettings(url="sqlite:///data/app.db").in_memory
+    assert not DatabaseSettings(url="postgresql://db/app").in_memory
+
+
+async def test_database_pool_requires_start() -> None:
+    with pytest.raises(RuntimeError):
+        Database().pool
@@ -0,0 +1,131 @@
+import asyncio
+import gc
+import threading
+from typing import List, Union
+
+import pytest
+
+from src.services import MicroBatcher, configure_batchers
+from src.services import batching
+
+
+class BatchFunction:
+    """Doubles its items and records the batches it was called with"""
+
+    def __init__(self) -> None:
+        self.batches: List[List[int]] = []
+
+    async def __call__(self, items: List[int]) -> List[Union[int, Exception]]:
+        self.batches.append(items)
+        return [ValueError(f"negative item {item}") if item < 0 else item * 2 for item in items]
+
+
+async def test_load_batches_concurrent_calls() -> None:
+    function = BatchFunction()
+    batcher = MicroBatcher(function, "test", window=0)
+
+    results = await asyncio.gather(*(batcher.load(item) for item in range(5)))
+
+    assert results == [0, 2, 4, 6, 8]
+    assert function.batches == [[0, 1, 2, 3, 4]]
+
+
+async def test_load_collects_calls_within_window() -> None:
+    function = BatchFunction()
+    batcher = MicroBatcher(function, "test", window=0.05)
+
+    async def load_later(item: int) -> int:
+        await asyncio.sleep(0.01)
+        return await batcher.load(item)
+
+    results = await asyncio.gather(batcher.load(1), load_later(2))
+
+    assert results == [2, 4]
+    assert function.batches == [[1, 2]]
+
+
+async def test_load_dispatches_full_batches_right_away() -> None:
+    function = BatchFunction()
+    batcher = MicroBatcher(function, "test", window=10, max_batch_size=2)
+
+    results = await asyncio.wait_for(asyncio.gather(*(batcher.load(item) for item in range(4))), 1)
+
+    assert results == [0, 2, 4, 6]
+    assert function.batches == [[0, 1], [2, 3]]
+
+
+async def test_load_raises_exception_returned_for_item() -> None:
+    batcher = MicroBatcher(BatchFunction(), "test", window=0)
+
+    results = await asyncio.gather(batcher.load(1), batcher.load(-1), return_exceptions=True)
+
+    assert results[0] == 2
+    assert isinstance(results[1], ValueError)
+
+
+async def test_load_raises_exception_of_batch_function_to_all_callers() -> None:
+    async def failing(items: List[int]) -> List[int]:
+        raise ConnectionError("down")
+
+    batcher = MicroBatcher(failing, "test", window=0)
+
+    results = await asyncio.gather(batcher.load(1), batcher.load(2), return_exceptions=True)
+
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+async def test_load_fails_when_result_count_does_not_match() -> None:
+    async def short(items: List[int]) -> List[int]:
+        return items[:1]
+
+    batcher = MicroBatcher(short, "test", window=0)
+
+    with pytest.raises(ValueError, match="returned 1 results for 2 items"):
+        await asyncio.gather(batcher.load(1), batcher.load(2))
+
+
+async def test_load_runs_sync_batch_function_in_thread_pool() -> None:
+    threads: List[threading.Thread] = []
+
+    def sync_function(items: List[int]) -> List[int]:
+        threads.append(threading.current_thread())
+        return [item + 1 for item in items]
+
+    batcher = MicroBatcher(sync_function, "test", window=0)
+
+    assert await asyncio.gather(batcher.load(1), batcher.load(2)) == [2, 3]
+    assert threads and threads[0] is not threading.main_thread()
+
+
+async def test_cancelled_caller_does_not_fail_the_batch() -> None:
+    function = BatchFunction()
+    batcher = MicroBatcher(function, "test", window=0.02)
+    cancelled = asyncio.create_task(batcher.load(1))
+    kept = asyncio.create_task(batcher.load(2))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+
+    assert await kept == 4
+    assert function.batches == [[1, 2]]
+
+
+def test_configure_batchers_keeps_constructor_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(batching, "_defaults", {})
+    batcher = MicroBatcher(BatchFunction(), "test", window=0.5)
+
+    configure_batchers(window=0.01, max_batch_size=8)
+
+    assert batcher.window == 0.5
+    assert batcher.max_batch_size == 8
+    assert MicroBatcher(BatchFunction(), "later").max_batch_size == 8
+
+
+def test_registry_does_not_keep_batchers_alive() -> None:
+    batcher = MicroBatcher(BatchFunction(), "test")
+    assert batcher in batching._batchers
+
+    del batcher
+    gc.collect()
+
+    assert all(batcher.name != "test" for batcher in batching._batchers)
@@ -0,0 +1,251 @@
+import asyncio
+import gc
+import threading
+import time
+from typing import Any, List, Optional
+
+import pytest
+
+from src.services import ReadThroughCache, invalidate_cache, read_through
+from src.services import cache as cache_module
+
+
+class FakeTime:
+    """Stands in for the time module of the cache, with a clock moved by the tests"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return time.perf_counter()
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeTime:
+    fake = FakeTime()
+    monkeypatch.setattr(cache_module, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def name(request: pytest.FixtureRequest) -> str:
+    """A cache name unique to the test"""
+    return request.node.name
+
+
+class Loader:
+    """Returns the queued values in order and counts its calls"""
+
+    def __init__(self, *values: Any, delay: float = 0.0) -> None:
+        self.values = list(values)
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self) -> Any:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        value = self.values.pop(0)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+
+async def test_get_loads_once_and_serves_hits(name: str, clock: FakeTime) -> None:
+    cache = ReadThroughCache(name, ttl=10)
+    loader = Loader("a")
+
+    assert await cache.get("key", loader) == "a"
+    assert await cache.get("key", loader) == "a"
+    assert loader.calls == 1
+
+
+async def test_get_reloads_after_ttl(name: str, clock: FakeTime) -> None:
+    cache = ReadThroughCache(name, ttl=10, stale_ttl=0)
+    loader = Loader("a", "b")
+    await cache.get("key", loader)
+
+    clock.now += 10
+
+    assert await cache.get("key", loader) == "b"
+    assert loader.calls == 2
+
+
+async def test_get_caches_none_for_negative_ttl(name: str, clock: FakeTime) -> None:
+    cache = ReadThroughCache(name, ttl=10, negative_ttl=2)
+    loader = Loader(None, "found")
+    await cache.get("key", loader)
+
+    clock.now += 1
+    assert await cache.get("key", loader) is None
+    clock.now += 1
+    assert await cache.get("key", loader) == "found"
+
+
+async def test_get_does_not_cache_none_without_negative_ttl(name: str, clock: FakeTime) -> None:
+    cache = ReadThroughCache(name, ttl=10, negative_ttl=0)
+    loader = Loader(None, "found")
+
+    assert await cache.get("key", loader) is None
+    assert await cache.get("key", loader) == "found"
+
+
+async def test_get_does_not_cache_failed_loads(name: str, clock: FakeTime) -> None:
+    cache = ReadThroughCache(name, ttl=10)
+    loader = Loader(ConnectionError("down"), "a")
+
+    with pytest.raises(ConnectionError):
+        await cache.get("key", loader)
+    assert await cache.get("key", loader) == "a"
+
+
+async def test_get_coalesces_concurrent_misses(name: str) -> None:
+    cache = ReadThroughCache(name, ttl=10)
+    loader = Loader("a", delay=0.01)
+
+    results = await asyncio.gather(*(cache.get("key", loader) for _ in range(10)))
+
+    assert results == ["a"] * 10
+    assert loader.calls == 1
+
+
+async def test_get_serves_stale_value_while_reloading(name: str, clock: FakeTime) -> None:
+    cache = ReadThroughCache(name, ttl=10, stale_ttl=5)
+    loader = Loader("old", "new")
+    await cache.get("key", loader)
+    clock.now += 12
+
+    assert await cache.get("key", loader) == "old"
+    # Lets the background reload complete
+    await asyncio.sleep(0.01)
+
+    assert await cache.get("key", loader) == "new"
+    assert loader.calls == 2
+
+
+async def test_get_waits_for_reload_after_stale_ttl(name: str, clock: FakeTime) -> None:
+    cache = ReadThroughCache(name, ttl=10, stale_ttl=5)
+    loader = Loader("old", "new")
+    await cache.get("key", loader)
+    clock.now += 15
+
+    assert await cache.get("key", loader) == "new"
+
+
+async def test_get_evicts_least_recently_used(name: str, clock: FakeTime) -> None:
+    cache = ReadThroughCache(name, max_entries=2, ttl=10)
+    await cache.get("a", Loader(1))
+    await cache.get("b", Loader(2))
+    await cache.get("a", Loader(1))
+
+    await cache.get("c", Loader(3))
+
+    loader = Loader(20)
+    assert await cache.get("b", loader) == 20
+    assert loader.calls == 1
+    assert len(cache) == 2
+
+
+async def test_invalidate_drops_value_and_running_load(name: str) -> None:
+    cache = ReadThroughCache(name, ttl=10)
+    slow = Loader("outdated", delay=0.01)
+    load = asyncio.create_task(cache.get("key", slow))
+    await asyncio.sleep(0)
+
+    cache.invalidate("key")
+
+    assert await load == "outdated"
+    assert await cache.get("key", Loader("current")) == "current"
+
+
+async def test_disabled_cache_always_loads(name: str) -> None:
+    cache = ReadThroughCache(name, ttl=10)
+    cache.configure(enabled=False)
+    loader = Loader("a", "b")
+
+    assert await cache.get("key", loader) == "a"
+    assert await cache.get("key", loader) == "b"
+
+
+async def test_read_through_caches_method_results_by_arguments(name: str) -> None:
+    class Repository:
+        users = ReadThroughCache(name, ttl=10)
+
+        def __init__(self) -> None:
+            self.loaded: List[int] = []
+
+        @read_through(users)
+        async def get_by_id(self, user_id: int, active: bool = True) -> Optional[dict]:
+            self.loaded.append(user_id)
+            return {"id": user_id}
+
+    repository = Repository()
+    await repository.get_by_id(1)
+    await repository.get_by_id(user_id=1, active=True)
+    await repository.get_by_id(2)
+
+    Repository.get_by_id.invalidate(1)  # type: ignore[attr-defined]
+    await repository.get_by_id(1)
+
+    assert repository.loaded == [1, 2, 1]
+
+
+async def test_invalidate_cache_by_name(name: str) -> None:
+    cache = ReadThroughCache(name, ttl=10)
+    await cache.get("a", Loader(1))
+    await cache.get("b", Loader(2))
+
+    invalidate_cache(name, "a")
+    assert len(cache) == 1
+
+    invalidate_cache(name)
+    assert len(cache) == 0
+
+
+def test_invalidate_cache_of_unknown_name_fails() -> None:
+    with pytest.raises(KeyError):
+        invalidate_cache("no such cache")
+
+
+def test_cache_names_are_unique_while_cache_is_alive(name: str) -> None:
+    cache = ReadThroughCache(name)
+
+    with pytest.raises(ValueError):
+        ReadThroughCache(name)
+
+    del cache
+    gc.collect()
+    ReadThroughCache(name)
+
+
+def test_configure_keeps_constructor_settings(name: str) -> None:
+    cache = ReadThroughCache(name, ttl=3)
+
+    cache.configure(max_entries=1, ttl=60, negative_ttl=1)
+
+    assert cache.ttl == 3
+    assert cache.negative_ttl == 1
+    assert cache.max_entries == 1
+
+
+async def test_get_is_safe_while_reconfigured_from_another_thread(name: str, clock: FakeTime) -> None:
+    cache = ReadThroughCache(name, ttl=10)
+    await cache.get("key", Loader("a"))
+    watcher = threading.Thread(target=cache.configure, kwargs={"max_entries": 0})
+    monotonic = clock.monotonic
+
+    def reload_during_lookup() -> float:
+        # Like a config reload on the watcher thread that evicts the entry being looked up; it has to wait
+        # for the lookup to complete
+        if not watcher.is_alive() and watcher.ident is None:
+            watcher.start()
+            watcher.join(0.05)
+        return monotonic()
+
+    clock.monotonic = reload_during_lookup  # type: ignore[method-assign]
+
+    assert await cache.get("key", Loader("b")) == "a"
+    watcher.join()
+    assert len(cache) == 0